@@ -0,0 +1,390 @@
+# app/backtest.py
+"""
+과거 캔들 + 기록된 웹훅 신호로 진입 / 익절 / 손절 로직을 재현하는 백테스트 엔진
+
+- 신호 처리는 switch_position 과 동일: 같은 방향 보유 중이면 무시, 반대 방향이면 청산 후 재진입
+- 수량·가격 양자화는 ContractSpec.round_qty / round_price 와 동일 (floor / ceil × 10^scale)
+- TP/SL/레버리지 조합 K 개를 (K, 봉 수) 배열 연산으로 한 번에 평가, 조합을 나눠 프로세스 풀로 병렬 실행
+
+사용 예:
+  python -m app.backtest --candles ETHUSDT_1m.csv --signals signals.csv \\
+      --tp1 0.002:0.006:0.001 --tp2 0.005:0.012:0.001 --sl 0.002:0.006:0.001 --leverage 5,10,20
+"""
+
+import argparse
+import csv
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.config import TRADE_LEVERAGE, TP1_PCT, TP2_PCT, SL_PCT, TP1_PART, TP2_PART
+from app.services.contracts import ContractSpec
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 그리드 축 (기본값 = 실거래 설정)
+PARAMS = ("tp1", "tp2", "sl", "leverage", "tp1_part", "tp2_part")
+DEFAULTS = {
+    "tp1": TP1_PCT, "tp2": TP2_PCT, "sl": SL_PCT,
+    "leverage": TRADE_LEVERAGE, "tp1_part": TP1_PART, "tp2_part": TP2_PART,
+}
+
+FEE_RATE = 0.0006   # 시장가 테이커 수수료
+BALANCE = 1000.0    # 초기 잔고 (USDT)
+
+
+def param_grid(**axes) -> dict[str, np.ndarray]:
+    """
+    축별 후보값의 데카르트 곱 → 조합별 1차원 배열 (지정하지 않은 축은 기본값 고정)
+    """
+    values = [np.atleast_1d(np.asarray(axes.get(k, DEFAULTS[k]), dtype=float)) for k in PARAMS]
+    mesh = np.meshgrid(*values, indexing="ij")
+    return {k: m.ravel() for k, m in zip(PARAMS, mesh)}
+
+
+def _first(hit: np.ndarray) -> np.ndarray:
+    # 행별 최초 True 위치, 없으면 열 수 (= 구간 안에서 미체결)
+    n = hit.shape[1]
+    return np.where(hit.any(axis=1), hit.argmax(axis=1), n)
+
+
+class _Book:
+    """
+    조합별 포지션 / 잔고 상태 (모든 필드가 길이 K 배열)
+    """
+
+    def __init__(self, grid: dict[str, np.ndarray], spec: ContractSpec, balance: float, fee_rate: float):
+        k = len(grid["tp1"])
+        self.g = grid
+        self.spec = spec
+        self.fee_rate = fee_rate
+        self.f_px = spec.price_factor
+        self.f_qty = spec.size_factor
+
+        self.equity = np.full(k, float(balance))
+        self.peak = self.equity.copy()
+        self.max_dd = np.zeros(k)
+        self.side = np.zeros(k, dtype=np.int8)   # 1 롱 / -1 숏 / 0 무포지션
+        self.entry = np.zeros(k)
+        self.remain = np.zeros(k)
+        self.tp1_px = np.zeros(k)
+        self.tp1_qty = np.zeros(k)
+        self.tp2_px = np.zeros(k)
+        self.tp2_qty = np.zeros(k)
+        self.sl_px = np.zeros(k)
+        self.tp1_done = np.zeros(k, dtype=bool)
+        self.tp2_done = np.zeros(k, dtype=bool)
+        self.trade_pnl = np.zeros(k)              # 진행 중 거래의 누적 손익 (수수료 포함)
+
+        self.trades = np.zeros(k, dtype=np.int64)
+        self.wins = np.zeros(k, dtype=np.int64)
+        self.tp1_hits = np.zeros(k, dtype=np.int64)
+        self.tp2_hits = np.zeros(k, dtype=np.int64)
+        self.sl_hits = np.zeros(k, dtype=np.int64)
+        self.fees = np.zeros(k)
+
+    # —— 체결 ——
+    def _fill(self, idx: np.ndarray, price, amount):
+        # idx 조합의 포지션 일부(amount) 청산
+        fee = self.fee_rate * price * amount
+        pnl = self.side[idx] * (price - self.entry[idx]) * amount - fee
+        self.equity[idx] += pnl
+        self.trade_pnl[idx] += pnl
+        self.fees[idx] += fee
+        self.remain[idx] -= amount
+
+    def _finish(self, idx: np.ndarray):
+        self.trades[idx] += 1
+        self.wins[idx] += self.trade_pnl[idx] > 0
+        self.side[idx] = 0
+        self.remain[idx] = 0.0
+
+    def _mark(self):
+        # 실현 잔고 기준 최대 낙폭
+        np.maximum(self.peak, self.equity, out=self.peak)
+        np.maximum(self.max_dd, (self.peak - self.equity) / self.peak, out=self.max_dd)
+
+    # —— 구간 [lo, hi) 봉에서 플랜 주문 트리거 ——
+    def run_triggers(self, high: np.ndarray, low: np.ndarray, lo: int, hi: int):
+        idx = np.flatnonzero(self.side != 0)
+        if hi <= lo or idx.size == 0:
+            return
+        h, l = high[lo:hi], low[lo:hi]
+        up = (self.side[idx] == 1)[:, None]
+
+        # 롱: 고가 ≥ TP / 저가 ≤ SL, 숏: 반대
+        tp1 = self.tp1_px[idx, None]
+        tp2 = self.tp2_px[idx, None]
+        sl = self.sl_px[idx, None]
+        t1 = _first(np.where(up, h >= tp1, l <= tp1))
+        t2 = _first(np.where(up, h >= tp2, l <= tp2))
+        s = _first(np.where(up, l <= sl, h >= sl))
+
+        # 같은 봉에서 TP/SL 동시 도달 시 손절 우선 (보수적 가정)
+        hit1 = ~self.tp1_done[idx] & (t1 < s)
+        if hit1.any():
+            i = idx[hit1]
+            self._fill(i, self.tp1_px[i], np.minimum(self.tp1_qty[i], self.remain[i]))
+            self.tp1_done[i] = True
+            self.tp1_hits[i] += 1
+
+        hit2 = ~self.tp2_done[idx] & (t2 < s)
+        if hit2.any():
+            i = idx[hit2]
+            self._fill(i, self.tp2_px[i], np.minimum(self.tp2_qty[i], self.remain[i]))
+            self.tp2_done[i] = True
+            self.tp2_hits[i] += 1
+        self._mark()
+
+        stopped = s < (hi - lo)
+        if stopped.any():
+            i = idx[stopped]
+            self._fill(i, self.sl_px[i], self.remain[i].copy())
+            self.sl_hits[i] += 1
+            self._finish(i)
+            self._mark()
+
+    # —— 신호 (switch_position 과 동일한 전환 규칙) ——
+    def signal(self, action: int, price: float):
+        closing = np.flatnonzero(self.side == -action)
+        if closing.size:
+            self._fill(closing, price, self.remain[closing].copy())
+            self._finish(closing)
+            self._mark()
+
+        g = self.g
+        opening = (self.side == 0) & (self.equity > 0)
+        qty = np.floor(self.equity * 0.98 * g["leverage"] / price * self.f_qty) / self.f_qty
+        opening &= qty >= self.spec.min_qty
+        i = np.flatnonzero(opening)
+        if i.size == 0:
+            return
+
+        q = qty[i]
+        f_px, f_qty = self.f_px, self.f_qty
+        self.side[i] = action
+        self.entry[i] = price
+        self.remain[i] = q
+        self.tp1_px[i] = np.ceil(price * (1 + action * g["tp1"][i]) * f_px) / f_px
+        self.tp1_qty[i] = np.floor(q * g["tp1_part"][i] * f_qty) / f_qty
+        self.tp2_px[i] = np.ceil(price * (1 + action * g["tp2"][i]) * f_px) / f_px
+        self.tp2_qty[i] = np.floor((q - self.tp1_qty[i]) * g["tp2_part"][i] * f_qty) / f_qty
+        self.sl_px[i] = np.floor(price * (1 - action * g["sl"][i]) * f_px) / f_px
+        self.tp1_done[i] = False
+        self.tp2_done[i] = False
+
+        fee = self.fee_rate * price * q
+        self.equity[i] -= fee
+        self.fees[i] += fee
+        self.trade_pnl[i] = -fee
+
+    def close_all(self, price: float):
+        idx = np.flatnonzero(self.side != 0)
+        if idx.size:
+            self._fill(idx, price, self.remain[idx].copy())
+            self._finish(idx)
+            self._mark()
+
+    def result(self, balance: float) -> dict[str, np.ndarray]:
+        trades = np.maximum(self.trades, 1)
+        return {
+            **self.g,
+            "pnl": self.equity - balance,
+            "return_pct": (self.equity / balance - 1) * 100,
+            "max_drawdown_pct": self.max_dd * 100,
+            "trades": self.trades,
+            "hit_rate": np.where(self.trades > 0, self.wins / trades, 0.0),
+            "tp1_hits": self.tp1_hits,
+            "tp2_hits": self.tp2_hits,
+            "sl_hits": self.sl_hits,
+            "fees": self.fees,
+        }
+
+
+def simulate(candles: dict[str, np.ndarray], signals: dict[str, np.ndarray], grid: dict[str, np.ndarray],
+             spec: ContractSpec, balance: float = BALANCE, fee_rate: float = FEE_RATE) -> dict[str, np.ndarray]:
+    """
+    단일 프로세스에서 그리드 전체 평가
+    candles: ts / high / low / close, signals: ts / action (1 = BUY, -1 = SELL)
+    신호는 해당 봉 종가에 체결, 플랜 주문은 다음 봉부터 고가/저가로 트리거
+    """
+    ts, high, low, close = candles["ts"], candles["high"], candles["low"], candles["close"]
+    bars = np.searchsorted(ts, signals["ts"], side="right") - 1
+    valid = bars >= 0
+    bars, actions = bars[valid], signals["action"][valid]
+
+    book = _Book(grid, spec, balance, fee_rate)
+    cursor = len(ts)
+    for bar, action in zip(bars, actions):
+        if cursor < len(ts):
+            book.run_triggers(high, low, cursor, bar + 1)
+        book.signal(int(action), float(close[bar]))
+        cursor = bar + 1
+
+    # 마지막 신호 이후 구간 트리거 → 잔여 포지션은 마지막 종가로 정리
+    book.run_triggers(high, low, cursor, len(ts))
+    if len(ts):
+        book.close_all(float(close[-1]))
+    return book.result(balance)
+
+
+# —— 프로세스 풀 (캔들/신호는 워커당 1회만 전달) ——
+_ctx: tuple | None = None
+
+
+def _init_worker(candles, signals, spec, balance, fee_rate):
+    global _ctx
+    _ctx = (candles, signals, spec, balance, fee_rate)
+
+
+def _simulate_chunk(grid: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    candles, signals, spec, balance, fee_rate = _ctx
+    return simulate(candles, signals, grid, spec, balance, fee_rate)
+
+
+def sweep(candles: dict[str, np.ndarray], signals: dict[str, np.ndarray], grid: dict[str, np.ndarray],
+          spec: ContractSpec, balance: float = BALANCE, fee_rate: float = FEE_RATE,
+          workers: int | None = None) -> dict[str, np.ndarray]:
+    """
+    그리드를 워커 수만큼 나눠 병렬 평가 (결과 순서는 grid 순서 유지)
+    """
+    k = len(grid["tp1"])
+    workers = min(workers or os.cpu_count() or 1, k)
+    if workers <= 1:
+        return simulate(candles, signals, grid, spec, balance, fee_rate)
+
+    chunks = [{name: v[c] for name, v in grid.items()} for c in np.array_split(np.arange(k), workers)]
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(candles, signals, spec, balance, fee_rate)) as pool:
+        parts = list(pool.map(_simulate_chunk, chunks))
+    return {name: np.concatenate([p[name] for p in parts]) for name in parts[0]}
+
+
+def table(result: dict[str, np.ndarray], sort_by: str = "pnl", top: int | None = None) -> list[dict]:
+    # 조합별 결과 행 (sort_by 내림차순)
+    order = np.argsort(-result[sort_by], kind="stable")
+    if top is not None:
+        order = order[:top]
+    return [{k: v[i].item() for k, v in result.items()} for i in order]
+
+
+# —— 입력 로더 ——
+def _to_seconds(ts: np.ndarray) -> np.ndarray:
+    # 밀리초 타임스탬프 자동 변환
+    ts = np.asarray(ts, dtype=float)
+    return ts / 1000 if ts.size and ts.max() > 1e11 else ts
+
+
+def load_candles(path: str) -> dict[str, np.ndarray]:
+    """
+    CSV (헤더: ts, open, high, low, close[, volume]) → 시간순 정렬된 열 배열
+    """
+    rows = np.genfromtxt(path, delimiter=",", names=True, dtype=float)
+    ts = _to_seconds(rows["ts"])
+    order = np.argsort(ts, kind="stable")
+    return {
+        "ts": ts[order],
+        "high": rows["high"][order],
+        "low": rows["low"][order],
+        "close": rows["close"][order],
+    }
+
+
+def load_signals(path: str, symbol: str | None = None) -> dict[str, np.ndarray]:
+    """
+    CSV (헤더: ts, action[, symbol]) → 웹훅 신호 배열 (action: BUY / SELL)
+    """
+    ts, actions = [], []
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            if symbol and row.get("symbol") and row["symbol"].upper().replace("/", "") != symbol:
+                continue
+            action = row["action"].strip().upper()
+            if action in ("BUY", "SELL"):
+                ts.append(float(row["ts"]))
+                actions.append(1 if action == "BUY" else -1)
+    return _signals(ts, actions)
+
+
+def signals_from_fills(fills: list[dict], symbol: str) -> dict[str, np.ndarray]:
+    """
+    저널 체결 원장의 진입 기록 → 신호 (long 진입 = BUY, short 진입 = SELL)
+    """
+    entries = [r for r in fills if r["symbol"] == symbol and r["leg"] == "entry"]
+    return _signals([r["ts"] for r in entries], [1 if r["side"] == "long" else -1 for r in entries])
+
+
+def _signals(ts: list[float], actions: list[int]) -> dict[str, np.ndarray]:
+    ts_arr = _to_seconds(ts)
+    order = np.argsort(ts_arr, kind="stable")
+    return {"ts": ts_arr[order], "action": np.asarray(actions, dtype=np.int8)[order]}
+
+
+def _axis(text: str) -> np.ndarray:
+    # "0.002:0.006:0.001" (양끝 포함 범위) 또는 "5,10,20"
+    if ":" in text:
+        start, stop, step = (float(x) for x in text.split(":"))
+        return np.round(np.arange(start, stop + step / 2, step), 10)
+    return np.array([float(x) for x in text.split(",")])
+
+
+def main(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(description="TP/SL/레버리지 파라미터 스윕 백테스트")
+    p.add_argument("--candles", required=True, help="캔들 CSV (ts,open,high,low,close)")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--signals", help="신호 CSV (ts,action[,symbol])")
+    src.add_argument("--journal", help="상태 저널 DB (체결 원장의 진입 기록을 신호로 사용)")
+    p.add_argument("--symbol", default="ETHUSDT")
+    for name in PARAMS:
+        p.add_argument(f"--{name.replace('_', '-')}", dest=name, type=_axis, default=None)
+    p.add_argument("--price-scale", type=int, default=2)
+    p.add_argument("--size-scale", type=int, default=2)
+    p.add_argument("--min-qty", type=float, default=0.01)
+    p.add_argument("--balance", type=float, default=BALANCE)
+    p.add_argument("--fee", type=float, default=FEE_RATE)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--sort", default="pnl")
+    p.add_argument("--top", type=int, default=20)
+    p.add_argument("--out", help="전체 결과 CSV 저장 경로")
+    args = p.parse_args(argv)
+
+    candles = load_candles(args.candles)
+    if args.signals:
+        signals = load_signals(args.signals, args.symbol)
+    else:
+        from app.services.journal import StateJournal
+        signals = signals_from_fills(StateJournal(args.journal).load_fills(), args.symbol)
+
+    spec = ContractSpec(args.symbol, args.min_qty, args.price_scale, args.size_scale)
+    grid = param_grid(**{k: getattr(args, k) for k in PARAMS if getattr(args, k) is not None})
+
+    t0 = time.perf_counter()
+    result = sweep(candles, signals, grid, spec, args.balance, args.fee, args.workers)
+    logger.info(
+        f"[BACKTEST] 조합 {len(grid['tp1'])}개 × 봉 {len(candles['ts'])}개 × 신호 {len(signals['ts'])}개 "
+        f"→ {time.perf_counter() - t0:.2f}s"
+    )
+
+    rows = table(result, args.sort)
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(result))
+            w.writeheader()
+            w.writerows(rows)
+
+    for r in rows[:args.top]:
+        print(
+            f"tp1={r['tp1']:.4f} tp2={r['tp2']:.4f} sl={r['sl']:.4f} lev={r['leverage']:g} "
+            f"| pnl={r['pnl']:+.2f} ({r['return_pct']:+.2f}%) mdd={r['max_drawdown_pct']:.2f}% "
+            f"trades={r['trades']} hit={r['hit_rate'] * 100:.1f}% "
+            f"tp1/tp2/sl={r['tp1_hits']}/{r['tp2_hits']}/{r['sl_hits']}"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,15 +1,362 @@
+import base64
+import hashlib
+import hmac
+import json
 import logging
-from bitget.client import Client
-from app.config import EX_API_KEY, EX_API_SECRET, EX_API_PASSPHRASE
+import random
+import time
+from urllib.parse import urlencode
+
+import asyncio
+
+import aiohttp
+
+from app import deadline, metrics
+from app.clients.rate_limit import RequestScheduler
+from app.config import (
+    DRY_RUN, EX_API_KEY, EX_API_SECRET, EX_API_PASSPHRASE,
+    BITGET_REST_URL, HTTP_POOL_SIZE, HTTP_KEEPALIVE, RATE_LIMIT_ENABLED,
+    HTTP_PREWARM, KEEPALIVE_INTERVAL, CLOCK_RESYNC_INTERVAL,
+    HTTP_REQUEST_TIMEOUT, READ_RETRIES, READ_RETRY_BASE,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-_bitget_client: Client | None = None  # Python 3.10 이상 OK
 
-def get_bitget_client() -> Client:
+class BitgetAPIError(Exception):
+    """
+    Bitget REST 응답 오류 (HTTP 오류 또는 code != "00000")
+    """
+    def __init__(self, status: int, code: str | None, msg: str, path: str):
+        super().__init__(f"[{status}] {path} code={code} msg={msg}")
+        self.status = status
+        self.code = code
+        self.msg = msg
+        self.path = path
+
+
+def _retryable_read(e: Exception) -> bool:
+    # 조회 재시도 대상: 네트워크 오류 / 시간 초과 / 429 / 5xx (예산 소진은 제외)
+    if isinstance(e, BitgetAPIError):
+        return e.status == 429 or e.status >= 500
+    return isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+def _clean(params: dict) -> dict:
+    # None 값 파라미터 제거
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def base_symbol(inst_id: str) -> str:
+    # 거래소 심볼/instId ("BTCUSDT_UMCBL") → 내부 심볼 ("BTCUSDT")
+    return (inst_id or "").split("_")[0]
+
+
+class BitgetClient:
+    """
+    aiohttp 기반 Bitget Mix(v1) 비동기 클라이언트
+    - keep-alive 커넥션 풀을 가진 단일 세션 재사용
+    - 서버시간 오프셋 캐시 (최초 서명 요청 시 1회 동기화)
+    - 엔드포인트별 요청 예산 (주문 우선) + 진행 중인 동일 GET 합치기
+    """
+    def __init__(self, api_key: str, api_secret: str, passphrase: str, base_url: str = BITGET_REST_URL):
+        self._api_key = api_key
+        self._api_secret = api_secret.encode()
+        self._passphrase = passphrase
+        self._base_url = base_url.rstrip("/")
+        self._session: aiohttp.ClientSession | None = None
+        self._time_offset_ms: int | None = None
+        self._synced_at = 0.0
+        self._last_used = 0.0
+        self._scheduler = RequestScheduler() if RATE_LIMIT_ENABLED else None
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        self.mix_account_api = MixAccountApi(self)
+        self.mix_market_api = MixMarketApi(self)
+        self.mix_order_api = MixOrderApi(self)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_SIZE,
+                keepalive_timeout=HTTP_KEEPALIVE,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"Content-Type": "application/json", "locale": "en-US"},
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def sync_server_time(self) -> int:
+        """
+        서버시간 - 로컬시간 오프셋(ms) 갱신. 왕복 시간의 절반을 보정
+        """
+        t0 = time.time()
+        resp = await self.request("GET", "/api/spot/v1/public/time", signed=False)
+        t1 = time.time()
+        server_ms = int(resp["data"])
+        self._time_offset_ms = server_ms - int((t0 + t1) / 2 * 1000)
+        self._synced_at = time.monotonic()
+        metrics.clock_offset_ms.set(self._time_offset_ms)
+        logger.info(f"[CLOCK] 서버시간 오프셋 {self._time_offset_ms}ms")
+        return self._time_offset_ms
+
+    async def _ping(self):
+        # 가벼운 인증 요청 (합치기 없이 직접 전송 → 동시 호출 수만큼 커넥션 사용)
+        await self._send("GET", "/api/mix/v1/account/accounts", "/api/mix/v1/account/accounts?productType=umcbl",
+                         "", True)
+
+    async def warm_up(self, connections: int = HTTP_PREWARM):
+        """
+        첫 신호 전에 DNS / TLS / 서버시간 동기화를 끝내고 커넥션 풀을 채워 둠
+        """
+        t0 = time.perf_counter()
+        await self.sync_server_time()
+        await asyncio.gather(*(self._ping() for _ in range(connections)))
+        logger.info(f"[WARMUP] 커넥션 {connections}개 예열 완료 ({(time.perf_counter() - t0) * 1000:.0f}ms)")
+
+    async def keepalive_loop(self):
+        """
+        유휴 상태에서도 풀 커넥션이 닫히지 않도록 주기적 ping + 서버시간 재동기화
+        """
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            try:
+                if time.monotonic() - self._synced_at >= CLOCK_RESYNC_INTERVAL:
+                    await self.sync_server_time()
+                if time.monotonic() - self._last_used >= KEEPALIVE_INTERVAL:
+                    await asyncio.gather(*(self._ping() for _ in range(HTTP_PREWARM)))
+            except Exception as e:
+                logger.warning(f"[KEEPALIVE] ping 실패: {e}")
+
+    async def _timestamp(self) -> str:
+        if self._time_offset_ms is None:
+            await self.sync_server_time()
+        return str(int(time.time() * 1000) + self._time_offset_ms)
+
+    def _sign(self, timestamp: str, method: str, request_path: str, body: str) -> str:
+        message = timestamp + method + request_path + body
+        digest = hmac.new(self._api_secret, message.encode(), hashlib.sha256).digest()
+        return base64.b64encode(digest).decode()
+
+    async def request(self, method: str, path: str, params: dict | None = None,
+                      body: dict | None = None, signed: bool = True) -> dict:
+        request_path = path
+        if params:
+            request_path += "?" + urlencode(_clean(params))
+        payload = json.dumps(_clean(body), separators=(",", ":")) if body else ""
+
+        if method != "GET":
+            # 주문은 재시도하지 않음 + 예산이 남았을 때만 제출 (전송 후에는 결과가 불확실해지므로 끊지 않음)
+            deadline.check(path)
+            return await self._send(method, path, request_path, payload, signed)
+
+        # ✅ 조회는 멱등 → 남은 예산 안에서만 지터 백오프 재시도
+        attempt = 0
+        while True:
+            try:
+                return await self._get(path, request_path, signed)
+            except Exception as e:
+                attempt += 1
+                if attempt > READ_RETRIES or not _retryable_read(e):
+                    raise
+                delay = random.uniform(0, READ_RETRY_BASE * 2 ** (attempt - 1))
+                left = deadline.remaining()
+                if left is not None and left <= delay:
+                    raise
+                metrics.retries.inc(kind="read", path=path)
+                logger.warning(f"[RETRY] GET {path} {attempt}회 실패 → {delay * 1000:.0f}ms 후 재시도: {e!r}")
+                await asyncio.sleep(delay)
+
+    async def _get(self, path: str, request_path: str, signed: bool) -> dict:
+        wait = deadline.timeout(HTTP_REQUEST_TIMEOUT, path)
+
+        # ✅ 같은 조회가 진행 중이면 새로 보내지 않고 그 응답을 공유 (응답 dict 는 읽기 전용으로 사용)
+        # 공유 요청 자체는 예산과 무관 (HTTP_REQUEST_TIMEOUT 상한), 호출자마다 자기 남은 예산만큼만 대기
+        fut = self._inflight.get(request_path)
+        if fut is not None:
+            metrics.coalesced.inc(path=path)
+        else:
+            fut = deadline.spawn(self._send("GET", path, request_path, "", signed))
+            self._inflight[request_path] = fut
+            fut.add_done_callback(lambda f: self._forget(request_path, f))
+        try:
+            return await asyncio.wait_for(asyncio.shield(fut), wait)
+        except asyncio.TimeoutError:
+            # 남은 예산만큼 기다린 경우 → 예산 소진, 아니면 호출 상한 초과 (재시도 대상)
+            if not fut.done() and wait < HTTP_REQUEST_TIMEOUT:
+                raise deadline.exceeded(path) from None
+            raise
+
+    def _forget(self, request_path: str, fut: asyncio.Future):
+        if self._inflight.get(request_path) is fut:
+            del self._inflight[request_path]
+        if not fut.cancelled():
+            fut.exception()   # 대기자가 모두 취소된 경우 "never retrieved" 경고 방지
+
+    async def _send(self, method: str, path: str, request_path: str, payload: str, signed: bool) -> dict:
+        if self._scheduler is not None:
+            await self._scheduler.acquire(path)
+            deadline.check(path)    # 요청 예산 대기 중에 신호 예산이 끝난 경우 (조회는 분리된 컨텍스트라 해당 없음)
+
+        headers = {}
+        if signed:
+            ts = await self._timestamp()
+            headers = {
+                "ACCESS-KEY": self._api_key,
+                "ACCESS-SIGN": self._sign(ts, method, request_path, payload),
+                "ACCESS-TIMESTAMP": ts,
+                "ACCESS-PASSPHRASE": self._passphrase,
+            }
+
+        session = self._get_session()
+        self._last_used = time.monotonic()
+        t0 = time.perf_counter()
+        try:
+            async with session.request(method, self._base_url + request_path, data=payload or None,
+                                       headers=headers, timeout=aiohttp.ClientTimeout(total=HTTP_REQUEST_TIMEOUT)) as resp:
+                data = await resp.json(content_type=None)
+        except Exception as e:
+            metrics.bitget_errors.inc(path=path, reason=type(e).__name__)
+            raise
+        finally:
+            metrics.bitget_request_seconds.observe(time.perf_counter() - t0, method=method, path=path)
+
+        if resp.status != 200 or (isinstance(data, dict) and data.get("code") not in (None, "00000")):
+            code = data.get("code") if isinstance(data, dict) else None
+            msg = data.get("msg") if isinstance(data, dict) else str(data)
+            metrics.bitget_errors.inc(path=path, reason=str(code or resp.status))
+            if resp.status == 429 and self._scheduler is not None:
+                self._scheduler.penalize(path)
+            raise BitgetAPIError(resp.status, code, msg, path)
+        return data
+
+
+class MixAccountApi:
+    def __init__(self, client: BitgetClient):
+        self._client = client
+
+    async def set_leverage(self, symbol: str, marginCoin: str, leverage, holdSide: str | None = None) -> dict:
+        return await self._client.request("POST", "/api/mix/v1/account/setLeverage", body={
+            "symbol": symbol, "marginCoin": marginCoin, "leverage": str(leverage), "holdSide": holdSide,
+        })
+
+    async def get_account(self, symbol: str, marginCoin: str = "USDT") -> dict:
+        return await self._client.request("GET", "/api/mix/v1/account/account", params={
+            "symbol": symbol, "marginCoin": marginCoin,
+        })
+
+    async def get_all_positions(self, productType: str, marginCoin: str = "USDT") -> dict:
+        return await self._client.request("GET", "/api/mix/v1/position/allPosition-v2", params={
+            "productType": productType, "marginCoin": marginCoin,
+        })
+
+
+class MixMarketApi:
+    def __init__(self, client: BitgetClient):
+        self._client = client
+
+    async def get_ticker(self, symbol: str, productType: str | None = None) -> dict:
+        return await self._client.request("GET", "/api/mix/v1/market/ticker",
+                                          params={"symbol": symbol}, signed=False)
+
+    async def get_tickers(self, productType: str) -> dict:
+        return await self._client.request("GET", "/api/mix/v1/market/tickers",
+                                          params={"productType": productType}, signed=False)
+
+    async def get_all_symbols(self, productType: str) -> dict:
+        return await self._client.request("GET", "/api/mix/v1/market/contracts",
+                                          params={"productType": productType}, signed=False)
+
+    async def get_candles(self, symbol: str, granularity: str, startTime: int, endTime: int,
+                          limit: int = 100) -> dict:
+        # data: [[시작 ms, 시가, 고가, 저가, 종가, 거래량, 거래대금], ...] 오래된 순
+        return await self._client.request("GET", "/api/mix/v1/market/candles", params={
+            "symbol": symbol, "granularity": granularity, "startTime": startTime, "endTime": endTime,
+            "limit": limit,
+        }, signed=False)
+
+
+class MixOrderApi:
+    def __init__(self, client: BitgetClient):
+        self._client = client
+
+    async def place_order(self, symbol: str, marginCoin: str, size: str, side: str, orderType: str,
+                          price: str | None = None, reduceOnly: bool | None = None,
+                          clientOid: str | None = None, productType: str | None = None) -> dict:
+        return await self._client.request("POST", "/api/mix/v1/order/placeOrder", body={
+            "symbol": symbol, "marginCoin": marginCoin, "size": size, "side": side,
+            "orderType": orderType, "price": price, "reduceOnly": reduceOnly, "clientOid": clientOid,
+        })
+
+    async def place_plan_order(self, symbol: str, marginCoin: str, size: str, side: str, orderType: str,
+                               triggerPrice: str, triggerType: str, executePrice: str | None = None,
+                               clientOid: str | None = None) -> dict:
+        return await self._client.request("POST", "/api/mix/v1/plan/placePlan", body={
+            "symbol": symbol, "marginCoin": marginCoin, "size": size, "side": side,
+            "orderType": orderType, "triggerPrice": triggerPrice, "executePrice": executePrice,
+            "triggerType": triggerType, "clientOid": clientOid,
+        })
+
+    async def cancel_plan_order(self, symbol: str, marginCoin: str, orderId: str,
+                                planType: str = "normal_plan") -> dict:
+        return await self._client.request("POST", "/api/mix/v1/plan/cancelPlan", body={
+            "symbol": symbol, "marginCoin": marginCoin, "orderId": orderId, "planType": planType,
+        })
+
+    async def get_plan_orders(self, symbol: str, isPlan: str = "plan") -> dict:
+        return await self._client.request("GET", "/api/mix/v1/plan/currentPlan",
+                                          params={"symbol": symbol, "isPlan": isPlan})
+
+    async def get_plan_history(self, symbol: str, startTime: int, endTime: int, pageSize: int = 100,
+                               isPlan: str = "plan") -> dict:
+        return await self._client.request("GET", "/api/mix/v1/plan/historyPlan", params={
+            "symbol": symbol, "startTime": startTime, "endTime": endTime, "pageSize": pageSize, "isPlan": isPlan,
+        })
+
+    async def get_fills(self, productType: str, startTime: int, endTime: int,
+                        lastEndId: str | None = None, limit: int = 100) -> dict:
+        # 최신 체결부터 내림차순, 다음 페이지는 lastEndId (이전 페이지 마지막 tradeId) 이전 체결
+        return await self._client.request("GET", "/api/mix/v1/order/allFills", params={
+            "productType": productType, "startTime": startTime, "endTime": endTime,
+            "lastEndId": lastEndId, "limit": limit,
+        })
+
+    async def get_order_detail(self, symbol: str, orderId: str) -> dict:
+        return await self._client.request("GET", "/api/mix/v1/order/detail",
+                                          params={"symbol": symbol, "orderId": orderId})
+
+    async def get_all_open_orders(self, productType: str, symbol: str | None = None) -> dict:
+        if symbol:
+            return await self._client.request("GET", "/api/mix/v1/order/current", params={"symbol": symbol})
+        return await self._client.request("GET", "/api/mix/v1/order/marginCoinCurrent",
+                                          params={"productType": productType})
+
+    async def cancel_order(self, symbol: str, orderId: str, marginCoin: str = "USDT",
+                           productType: str | None = None) -> dict:
+        return await self._client.request("POST", "/api/mix/v1/order/cancel-order", body={
+            "symbol": symbol, "marginCoin": marginCoin, "orderId": orderId,
+        })
+
+
+_bitget_client: BitgetClient | None = None  # Python 3.10 이상 OK
+_keepalive: asyncio.Task | None = None
+
+def get_bitget_client() -> BitgetClient:
     global _bitget_client
 
+    # ✅ DRY_RUN: 모의 거래소 주입 (키 불필요, 주문·대기·플랜 주문 경로를 그대로 실행)
+    if _bitget_client is None and DRY_RUN:
+        from app.clients.bitget_sim import SimExchange
+        _bitget_client = SimExchange()
+        logger.info("🧪 모의 거래소(SimExchange) 사용")
+
     if _bitget_client is None:
         missing = []
         if not EX_API_KEY:
@@ -23,13 +370,37 @@ def get_bitget_client() -> Client:
             logger.error(f"Bitget API 설정 누락: {', '.join(missing)}")
             raise RuntimeError(f"Bitget API 설정 누락: {', '.join(missing)}")
 
-        # ✅ use_server_time=True 권장 (타임오프셋 문제 방지)
-        _bitget_client = Client(
+        # ✅ 세션은 첫 요청 시 생성, 서버시간 오프셋은 첫 서명 요청 시 동기화
+        _bitget_client = BitgetClient(
             EX_API_KEY,
             EX_API_SECRET,
             EX_API_PASSPHRASE,
-            use_server_time=True
         )
         logger.info("✅ Bitget Client 초기화 완료")
 
-    return _bitget_client
\ No newline at end of file
+    return _bitget_client
+
+
+async def warm_bitget_client():
+    """
+    기동 시 클라이언트 생성 + 연결/시계 예열, 이후 keep-alive 태스크 실행
+    """
+    global _keepalive
+
+    client = get_bitget_client()
+    try:
+        await client.warm_up()
+    except Exception as e:
+        logger.warning(f"[WARMUP] 예열 실패 (첫 요청 시 재시도): {e}")
+    if _keepalive is None:
+        _keepalive = asyncio.create_task(client.keepalive_loop())
+
+
+async def close_bitget_client():
+    global _keepalive
+
+    if _keepalive is not None:
+        _keepalive.cancel()
+        _keepalive = None
+    if _bitget_client is not None:
+        await _bitget_client.close()
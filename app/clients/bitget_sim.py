@@ -0,0 +1,493 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
+
+from app import deadline
+from app.clients.bitget_client import BitgetAPIError, BitgetClient, base_symbol
+from app.config import (
+    SIM_BALANCE, SIM_FEE, SIM_LATENCY, SIM_JITTER, SIM_PARTIAL_FILL,
+    SIM_FEED, SIM_FEED_INTERVAL, SIM_VOLATILITY, SIM_PRICES, SIM_SEED, POSITION_MODE,
+)
+
+logger = logging.getLogger("bitget_sim")
+logger.setLevel(logging.INFO)
+
+# 기본 상장 목록: 심볼 → (가격 소수 자릿수, 수량 소수 자릿수, 최소 수량, 시작 가격)
+_LISTINGS = {
+    "BTCUSDT": (1, 3, 0.001, 60000.0),
+    "ETHUSDT": (2, 2, 0.01, 3000.0),
+    "SOLUSDT": (3, 1, 0.1, 150.0),
+    "XRPUSDT": (4, 0, 1.0, 0.5),
+}
+
+# 주문 side → (방향, 감소 전용 여부, hedge 모드 대상 포지션 — None 이면 감소 전용 여부로 결정)
+_SIDES = {
+    "open_long": (1, False, "long"), "open_short": (-1, False, "short"),
+    "close_long": (-1, True, "long"), "close_short": (1, True, "short"),
+    "buy": (1, False, None), "sell": (-1, False, None),
+    "buy_single": (1, False, None), "sell_single": (-1, False, None),
+}
+ORDER_HISTORY = 1000
+
+
+def _ok(data) -> dict:
+    return {"code": "00000", "msg": "success", "requestTime": int(time.time() * 1000), "data": data}
+
+
+class _SimPosition:
+    __slots__ = ("qty", "entry")   # qty: 부호 있는 수량 (롱 +, 숏 -)
+
+    def __init__(self):
+        self.qty = 0.0
+        self.entry = 0.0
+
+
+class _PlanOrder:
+    __slots__ = ("order_id", "symbol", "side", "size", "trigger", "rising", "client_oid", "created_at")
+
+    def __init__(self, order_id: str, symbol: str, side: str, size: float, trigger: float, rising: bool,
+                 client_oid: str | None = None):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.size = size
+        self.trigger = trigger
+        self.rising = rising          # True: 가격이 trigger 이상으로 오르면 발동
+        self.client_oid = client_oid or order_id
+        self.created_at = time.time()
+
+
+class SimExchange:
+    """
+    프로세스 내 모의 Bitget (DRY_RUN / 부하 테스트용)
+    - BitgetClient 와 같은 mix_account_api / mix_market_api / mix_order_api 호출 제공, 응답 형식도 동일
+    - 포지션 모드: one_way (심볼당 순포지션 1개) / hedge (심볼당 롱·숏 각각), 기본은 POSITION_MODE
+    - USDT 잔고, 시장가 즉시 체결 (확률적 분할 체결), 플랜 주문은 가격 피드로 트리거
+    - 모든 호출에 네트워크 지연 + 지터 적용
+    """
+
+    def __init__(self, balance: float = SIM_BALANCE, fee: float = SIM_FEE,
+                 latency: float = SIM_LATENCY, jitter: float = SIM_JITTER,
+                 partial_fill: float = SIM_PARTIAL_FILL, feed: str = SIM_FEED, seed: int | None = SIM_SEED,
+                 latencies: dict[str, float] | None = None, position_mode: str = POSITION_MODE):
+        self.position_mode = position_mode
+        self.balance = balance       # 실현 잔고 (수수료/실현손익 반영)
+        self.fee = fee
+        self.latency = latency
+        self.latencies = latencies or {}   # 호출별 지연 지정 (예: {"place_order": 0.03}), 없으면 latency
+        self.jitter = jitter
+        self.partial_fill = partial_fill
+        self.feed = feed
+        self._rng = random.Random(seed)
+
+        self.specs = {s: (p, q, m) for s, (p, q, m, _) in _LISTINGS.items()}
+        self.prices = {s: px for s, (*_, px) in _LISTINGS.items()}
+        for item in filter(None, SIM_PRICES.split(",")):
+            symbol, price = item.split("=")
+            symbol = symbol.strip().upper()
+            self.specs.setdefault(symbol, (4, 2, 0.01))
+            self.prices[symbol] = float(price)
+
+        self.leverage: dict[str, float] = {}
+        self.positions: dict[tuple[str, str], _SimPosition] = {}   # (심볼, "net" / "long" / "short")
+        self.plans: dict[str, _PlanOrder] = {}
+        self.open_orders: dict[str, dict] = {}    # 분할 체결 중인 시장가 주문
+        self.orders: dict[str, dict] = {}         # 최근 주문 (상세 조회용, orderId → 체결 정보)
+        self.fills: list[dict] = []               # 체결 내역 (tradeId 오름차순)
+        self.plan_history: dict[str, dict] = {}   # 발동/취소된 플랜 주문 (orderId → 이력)
+        self.plan_oids: dict[str, str] = {}       # 플랜 주문 clientOid → orderId (중복 제출 거절)
+        self._trade_seq = 0
+        self._feed_task: asyncio.Task | None = None
+
+        self.mix_account_api = _SimAccountApi(self)
+        self.mix_market_api = _SimMarketApi(self)
+        self.mix_order_api = _SimOrderApi(self)
+
+    # —— 공통 ——
+    async def _rtt(self, op: str):
+        self._ensure_feed()
+        deadline.check(op)
+        delay = self.latencies.get(op, self.latency) + self._rng.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(delay, 0.0))
+
+    def _spec(self, symbol: str) -> tuple[int, int, float]:
+        spec = self.specs.get(base_symbol(symbol))
+        if spec is None:
+            raise BitgetAPIError(400, "40034", "Parameter symbol does not exist", "sim")
+        return spec
+
+    def _position(self, symbol: str, leg: str = "net") -> _SimPosition:
+        pos = self.positions.get((symbol, leg))
+        if pos is None:
+            pos = self.positions[(symbol, leg)] = _SimPosition()
+        return pos
+
+    def _route(self, side: str, reduce_only: bool) -> tuple[str, int, bool]:
+        """
+        주문 side → (대상 포지션, 방향, 감소 전용 여부)
+        hedge: open_/close_ 은 해당 방향 포지션, buy/sell 은 감소 전용이면 반대 포지션 청산 / 아니면 신규
+        """
+        direction, side_reduce, leg = _SIDES[side]
+        reduce_only = reduce_only or side_reduce
+        if self.position_mode == "one_way":
+            return "net", direction, reduce_only
+        if side.endswith("_single"):
+            raise BitgetAPIError(400, "40774", "The order type for unilateral position must also be the unilateral position type.", "sim")
+        if leg is None:
+            leg = ("short" if direction > 0 else "long") if reduce_only else ("long" if direction > 0 else "short")
+        return leg, direction, reduce_only
+
+    def net_qty(self, symbol: str) -> float:
+        return sum(p.qty for (s, _), p in self.positions.items() if s == symbol)
+
+    def used_margin(self) -> float:
+        return sum(
+            abs(p.qty) * p.entry / self.leverage.get(s, 1.0)
+            for (s, _), p in self.positions.items() if p.qty
+        )
+
+    def unrealized(self) -> float:
+        return sum(p.qty * (self.prices[s] - p.entry) for (s, _), p in self.positions.items() if p.qty)
+
+    @property
+    def available(self) -> float:
+        return self.balance + min(self.unrealized(), 0.0) - self.used_margin()
+
+    # —— 체결 ——
+    def _fill(self, symbol: str, leg: str, direction: int, size: float, reduce_only: bool) -> float:
+        """
+        대상 포지션에 direction * size 반영, 실제 체결 수량 반환 (감소 전용은 보유 수량으로 제한)
+        """
+        pos = self._position(symbol, leg)
+        price = self.prices[symbol]
+        if reduce_only:
+            if pos.qty * direction >= 0:
+                return 0.0
+            size = min(size, abs(pos.qty))
+
+        delta = direction * size
+        if pos.qty and pos.qty * delta < 0:
+            # 기존 포지션 감소 → 실현손익
+            closed = min(abs(delta), abs(pos.qty))
+            self.balance += (price - pos.entry) * closed * (1 if pos.qty > 0 else -1)
+            new_qty = pos.qty + delta
+            if abs(new_qty) < 1e-12:
+                pos.qty, pos.entry = 0.0, 0.0
+            elif new_qty * pos.qty < 0:
+                pos.qty, pos.entry = new_qty, price    # 반대 방향으로 넘어감
+            else:
+                pos.qty = new_qty
+        else:
+            total = abs(pos.qty) + size
+            pos.entry = (abs(pos.qty) * pos.entry + size * price) / total
+            pos.qty += delta
+
+        self.balance -= self.fee * price * size
+        return size
+
+    def _record_fill(self, order: dict, filled: float):
+        # 주문 상세의 누적 체결 수량 / 평균 체결가 갱신 + 체결 내역 1건
+        price = self.prices[base_symbol(order["symbol"])]
+        total = order["filledQty"] + filled
+        if total > 0:
+            order["priceAvg"] = (order["filledQty"] * order["priceAvg"] + filled * price) / total
+        order["filledQty"] = total
+        order["state"] = "filled" if total >= order["size"] - 1e-12 else "partially_filled"
+        if filled > 0:
+            self._trade_seq += 1
+            self.fills.append({
+                "tradeId": str(self._trade_seq), "orderId": order["orderId"], "symbol": order["symbol"],
+                "side": order["side"], "price": str(price), "sizeQty": str(filled),
+                "fee": str(-self.fee * price * filled), "fillAmount": str(price * filled),
+                "cTime": str(int(time.time() * 1000)),
+            })
+            del self.fills[:-ORDER_HISTORY * 4]
+
+    def _new_order(self, symbol: str, side: str, size: float, reduce_only: bool) -> dict:
+        order_id = uuid.uuid4().hex[:18]
+        order = {
+            "orderId": order_id, "symbol": f"{symbol}_UMCBL", "side": side, "size": size,
+            "filledQty": 0.0, "priceAvg": 0.0, "reduceOnly": reduce_only, "state": "new",
+            "cTime": str(int(time.time() * 1000)),
+        }
+        self.orders[order_id] = order
+        while len(self.orders) > ORDER_HISTORY:
+            self.orders.pop(next(iter(self.orders)))
+        return order
+
+    def _retire_plan(self, plan: _PlanOrder, status: str, execute_order_id: str = ""):
+        self.plan_history[plan.order_id] = {
+            "orderId": plan.order_id, "executeOrderId": execute_order_id, "symbol": f"{plan.symbol}_UMCBL",
+            "side": plan.side, "size": str(plan.size), "triggerPrice": str(plan.trigger),
+            "planType": "normal_plan", "planStatus": status,
+            "cTime": str(int(plan.created_at * 1000)), "uTime": str(int(time.time() * 1000)),
+        }
+        while len(self.plan_history) > ORDER_HISTORY:
+            self.plan_history.pop(next(iter(self.plan_history)))
+
+    async def _fill_rest(self, order_id: str, symbol: str, leg: str, direction: int, size: float,
+                         reduce_only: bool):
+        # 분할 체결 잔량: 다음 지연 주기에 체결
+        await self._rtt("fill")
+        order = self.open_orders.pop(order_id, None)
+        if order is not None:
+            self._record_fill(order, self._fill(symbol, leg, direction, size, reduce_only))
+
+    def place_market(self, symbol: str, side: str, size: float, reduce_only: bool) -> str:
+        leg, direction, reduce_only = self._route(side, reduce_only)
+        _, _, min_qty = self._spec(symbol)
+        if size < min_qty:
+            raise BitgetAPIError(400, "45111", f"less than the minimum order quantity {min_qty}", "sim")
+
+        pos = self._position(symbol, leg)
+        if not reduce_only and pos.qty * direction >= 0:
+            margin = size * self.prices[symbol] / self.leverage.get(symbol, 1.0)
+            if margin > self.available:
+                raise BitgetAPIError(400, "40762", "The order amount exceeds the balance", "sim")
+
+        order = self._new_order(symbol, side, size, reduce_only)
+        order_id = order["orderId"]
+
+        if self.partial_fill and self._rng.random() < self.partial_fill:
+            first = size * self._rng.uniform(0.3, 0.9)
+            self._record_fill(order, self._fill(symbol, leg, direction, first, reduce_only))
+            self.open_orders[order_id] = order
+            deadline.spawn(self._fill_rest(order_id, symbol, leg, direction, size - first, reduce_only))
+        else:
+            self._record_fill(order, self._fill(symbol, leg, direction, size, reduce_only))
+        return order_id
+
+    # —— 가격 피드 / 플랜 주문 트리거 ——
+    def set_price(self, symbol: str, price: float):
+        self.prices[symbol] = price
+        for plan in [p for p in self.plans.values() if p.symbol == symbol]:
+            if (price >= plan.trigger) if plan.rising else (price <= plan.trigger):
+                self.plans.pop(plan.order_id, None)
+                leg, direction, _ = self._route(plan.side, True)
+                # 실거래소처럼 발동 시 별도 orderId 의 시장가 주문으로 체결
+                order = self._new_order(symbol, plan.side, plan.size, True)
+                filled = self._fill(symbol, leg, direction, plan.size, True)
+                self._record_fill(order, filled)
+                self._retire_plan(plan, "triggered", order["orderId"])
+                logger.info(f"[SIM] 플랜 주문 발동 {symbol} {plan.side} {filled} @ {price}")
+
+    def _ensure_feed(self):
+        if self._feed_task is None and self.feed != "none":
+            self._feed_task = deadline.spawn(self._feed_loop())
+
+    async def _feed_loop(self):
+        """
+        random: 심볼별 랜덤워크, live: 실거래소 공개 시세 (인증 불필요) 를 그대로 반영
+        """
+        public = BitgetClient("", "", "") if self.feed == "live" else None
+        while True:
+            try:
+                if public is not None:
+                    resp = await public.mix_market_api.get_tickers(productType="umcbl")
+                    for t in resp.get("data", []):
+                        symbol = base_symbol(t.get("symbol"))
+                        if symbol in self.specs:
+                            self.set_price(symbol, float(t["last"]))
+                else:
+                    for symbol, price in list(self.prices.items()):
+                        self.set_price(symbol, price * (1 + self._rng.gauss(0, SIM_VOLATILITY)))
+            except Exception:
+                logger.exception("[SIM] 가격 피드 오류")
+            await asyncio.sleep(SIM_FEED_INTERVAL)
+
+    # 실 클라이언트와 같은 수명주기 인터페이스 (연결 예열 불필요)
+    async def sync_server_time(self) -> int:
+        return 0
+
+    async def warm_up(self):
+        self._ensure_feed()
+
+    async def keepalive_loop(self):
+        return
+
+    async def close(self):
+        if self._feed_task is not None:
+            self._feed_task.cancel()
+            self._feed_task = None
+
+
+class _SimAccountApi:
+    def __init__(self, ex: SimExchange):
+        self._ex = ex
+
+    async def set_leverage(self, symbol: str, marginCoin: str, leverage, holdSide: str | None = None) -> dict:
+        await self._ex._rtt("set_leverage")
+        self._ex._spec(symbol)
+        self._ex.leverage[base_symbol(symbol)] = float(leverage)
+        return _ok({"symbol": symbol, "marginCoin": marginCoin, "longLeverage": leverage, "shortLeverage": leverage})
+
+    async def get_account(self, symbol: str, marginCoin: str = "USDT") -> dict:
+        ex = self._ex
+        await ex._rtt("get_account")
+        equity = ex.balance + ex.unrealized()
+        return _ok({
+            "marginCoin": marginCoin,
+            "locked": "0",
+            "available": str(ex.available),
+            "equity": str(equity),
+            "usdtEquity": str(equity),
+            "unrealizedPL": str(ex.unrealized()),
+            # 서비스 코드가 total 을 해당 심볼 순포지션 (롱 +, 숏 -) 으로 읽음 (hedge: 롱 - 숏)
+            "total": str(ex.net_qty(base_symbol(symbol))),
+        })
+
+    async def get_all_positions(self, productType: str, marginCoin: str = "USDT") -> dict:
+        ex = self._ex
+        await ex._rtt("get_all_positions")
+        return _ok([
+            {
+                "symbol": f"{s}_UMCBL",
+                "marginCoin": marginCoin,
+                "holdSide": leg if leg != "net" else "long" if p.qty > 0 else "short",
+                "total": str(abs(p.qty)),
+                "available": str(abs(p.qty)),
+                "averageOpenPrice": str(p.entry),
+                "leverage": ex.leverage.get(s, 1.0),
+                "unrealizedPL": str(p.qty * (ex.prices[s] - p.entry)),
+            }
+            for (s, leg), p in ex.positions.items() if p.qty
+        ])
+
+
+class _SimMarketApi:
+    def __init__(self, ex: SimExchange):
+        self._ex = ex
+
+    def _ticker(self, symbol: str) -> dict:
+        price = self._ex.prices[symbol]
+        return {
+            "symbol": f"{symbol}_UMCBL", "last": str(price), "markPrice": str(price),
+            "bestAsk": str(price), "bestBid": str(price), "timestamp": str(int(time.time() * 1000)),
+        }
+
+    async def get_ticker(self, symbol: str, productType: str | None = None) -> dict:
+        await self._ex._rtt("get_ticker")
+        self._ex._spec(symbol)
+        return _ok(self._ticker(base_symbol(symbol)))
+
+    async def get_tickers(self, productType: str) -> dict:
+        await self._ex._rtt("get_tickers")
+        return _ok([self._ticker(s) for s in self._ex.prices])
+
+    async def get_all_symbols(self, productType: str) -> dict:
+        await self._ex._rtt("get_all_symbols")
+        return _ok([
+            {"symbol": f"{s}_UMCBL", "priceScale": str(p), "sizeScale": str(q), "minTradeNum": str(m)}
+            for s, (p, q, m) in self._ex.specs.items()
+        ])
+
+    async def get_candles(self, symbol: str, granularity: str, startTime: int, endTime: int,
+                          limit: int = 100) -> dict:
+        # 모의 거래소는 과거 시세가 없음 → 지표는 가격 피드 틱으로만 채워짐
+        await self._ex._rtt("get_candles")
+        self._ex._spec(symbol)
+        return _ok([])
+
+
+class _SimOrderApi:
+    def __init__(self, ex: SimExchange):
+        self._ex = ex
+
+    async def place_order(self, symbol: str, marginCoin: str, size: str, side: str, orderType: str,
+                          price: str | None = None, reduceOnly: bool | None = None,
+                          clientOid: str | None = None, productType: str | None = None) -> dict:
+        await self._ex._rtt("place_order")
+        order_id = self._ex.place_market(base_symbol(symbol), side, float(size), bool(reduceOnly))
+        return _ok({"orderId": order_id, "clientOid": clientOid or order_id})
+
+    async def place_plan_order(self, symbol: str, marginCoin: str, size: str, side: str, orderType: str,
+                               triggerPrice: str, triggerType: str, executePrice: str | None = None,
+                               clientOid: str | None = None) -> dict:
+        ex = self._ex
+        await ex._rtt("place_plan_order")
+        symbol = base_symbol(symbol)
+        ex._spec(symbol)
+        if side not in _SIDES:
+            raise BitgetAPIError(400, "40808", f"Parameter side error: {side}", "sim")
+        ex._route(side, True)
+        if clientOid and clientOid in ex.plan_oids:
+            raise BitgetAPIError(400, "40786", "Duplicate clientOid", "sim")
+        trigger = float(triggerPrice)
+        order_id = uuid.uuid4().hex[:18]
+        ex.plans[order_id] = _PlanOrder(order_id, symbol, side, float(size), trigger, trigger >= ex.prices[symbol],
+                                        clientOid)
+        if clientOid:
+            ex.plan_oids[clientOid] = order_id
+            while len(ex.plan_oids) > ORDER_HISTORY:
+                ex.plan_oids.pop(next(iter(ex.plan_oids)))
+        return _ok({"orderId": order_id, "clientOid": clientOid or order_id})
+
+    async def cancel_plan_order(self, symbol: str, marginCoin: str, orderId: str,
+                                planType: str = "normal_plan") -> dict:
+        await self._ex._rtt("cancel_plan_order")
+        plan = self._ex.plans.pop(orderId, None)
+        if plan is None:
+            raise BitgetAPIError(400, "40768", "Order does not exist", "sim")
+        self._ex._retire_plan(plan, "cancel")
+        return _ok({"orderId": orderId, "clientOid": orderId})
+
+    async def get_plan_orders(self, symbol: str, isPlan: str = "plan") -> dict:
+        await self._ex._rtt("get_plan_orders")
+        symbol = base_symbol(symbol)
+        return _ok([
+            {"orderId": p.order_id, "clientOid": p.client_oid, "symbol": f"{symbol}_UMCBL", "side": p.side,
+             "size": str(p.size),
+             "triggerPrice": str(p.trigger), "planType": "normal_plan", "state": "not_trigger",
+             "cTime": str(int(p.created_at * 1000))}
+            for p in self._ex.plans.values() if p.symbol == symbol
+        ])
+
+    async def get_plan_history(self, symbol: str, startTime: int, endTime: int, pageSize: int = 100,
+                               isPlan: str = "plan") -> dict:
+        await self._ex._rtt("get_plan_history")
+        symbol = f"{base_symbol(symbol)}_UMCBL"
+        history = [
+            h for h in reversed(self._ex.plan_history.values())
+            if h["symbol"] == symbol and int(startTime) <= int(h["cTime"]) <= int(endTime)
+        ]
+        return _ok(history[:pageSize])
+
+    async def get_fills(self, productType: str, startTime: int, endTime: int,
+                        lastEndId: str | None = None, limit: int = 100) -> dict:
+        await self._ex._rtt("get_fills")
+        # 실거래소와 같이 최신순, lastEndId 보다 이전 체결만
+        before = int(lastEndId) if lastEndId else None
+        page = []
+        for f in reversed(self._ex.fills):
+            if before is not None and int(f["tradeId"]) >= before:
+                continue
+            if int(f["cTime"]) < int(startTime):
+                break
+            if int(f["cTime"]) <= int(endTime):
+                page.append(f)
+                if len(page) >= limit:
+                    break
+        return _ok(page)
+
+    async def get_order_detail(self, symbol: str, orderId: str) -> dict:
+        await self._ex._rtt("get_order_detail")
+        order = self._ex.orders.get(orderId)
+        if order is None:
+            raise BitgetAPIError(400, "40768", "Order does not exist", "sim")
+        return _ok(dict(order))
+
+    async def get_all_open_orders(self, productType: str, symbol: str | None = None) -> dict:
+        await self._ex._rtt("get_all_open_orders")
+        orders = self._ex.open_orders.values()
+        if symbol:
+            orders = [o for o in orders if base_symbol(o["symbol"]) == base_symbol(symbol)]
+        return _ok(list(orders))
+
+    async def cancel_order(self, symbol: str, orderId: str, marginCoin: str = "USDT",
+                           productType: str | None = None) -> dict:
+        await self._ex._rtt("cancel_order")
+        if self._ex.open_orders.pop(orderId, None) is None:
+            raise BitgetAPIError(400, "40768", "Order does not exist", "sim")
+        return _ok({"orderId": orderId})
@@ -0,0 +1,196 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import random
+import time
+from typing import Callable
+
+import websockets
+
+from app.config import BITGET_WS_PUBLIC_URL, BITGET_WS_PRIVATE_URL, WS_PING_INTERVAL, WS_RECONNECT_MAX
+
+logger = logging.getLogger("bitget_ws")
+logger.setLevel(logging.INFO)
+
+inst_type = "MC"              # USDT-M 선물 (공개 채널)
+private_inst_type = "UMCBL"   # USDT-M 선물 (개인 채널)
+
+
+class BitgetStream:
+    """
+    Bitget WebSocket 공통 연결 관리
+    - 끊기면 지수 백오프로 재연결 후 구독 복원
+    - "ping" 하트비트, pong 이 WS_PING_INTERVAL * 2 동안 없으면 강제 재연결
+    """
+    def __init__(self, url: str):
+        self._url = url
+        self._ws = None
+        self._subscriptions: set[tuple[str, str, str]] = set()   # (instType, channel, instId)
+        self._last_recv = 0.0
+        self.connected = False
+
+    # —— 하위 클래스 확장 지점 ——
+    async def _on_open(self, ws):
+        """연결 직후, 구독 복원 전에 호출 (로그인 등)"""
+
+    def _on_data(self, arg: dict, data: list, action: str):
+        """채널 데이터 수신 (action: "snapshot" 또는 "update")"""
+
+    def _on_event(self, msg: dict):
+        if msg.get("event") == "error":
+            logger.warning(f"[WS] 오류 응답: {msg}")
+
+    # —— 구독 관리 ——
+    @staticmethod
+    def _arg(sub: tuple[str, str, str]) -> dict:
+        return {"instType": sub[0], "channel": sub[1], "instId": sub[2]}
+
+    async def _send(self, op: str, subs: list[tuple[str, str, str]]):
+        if self._ws is None or not self.connected or not subs:
+            return
+        await self._ws.send(json.dumps({"op": op, "args": [self._arg(s) for s in subs]}))
+
+    async def subscribe(self, *subs: tuple[str, str, str]):
+        new = [s for s in subs if s not in self._subscriptions]
+        self._subscriptions.update(new)
+        await self._send("subscribe", new)
+
+    async def unsubscribe(self, *subs: tuple[str, str, str]):
+        old = [s for s in subs if s in self._subscriptions]
+        self._subscriptions.difference_update(old)
+        await self._send("unsubscribe", old)
+
+    # —— 연결 루프 ——
+    async def _heartbeat(self, ws):
+        while True:
+            await asyncio.sleep(WS_PING_INTERVAL)
+            if time.time() - self._last_recv > WS_PING_INTERVAL * 2:
+                logger.warning("[WS] 하트비트 응답 없음 → 재연결")
+                await ws.close()
+                return
+            await ws.send("ping")
+
+    async def _session(self):
+        async with websockets.connect(self._url, ping_interval=None) as ws:
+            self._ws = ws
+            self._last_recv = time.time()
+            await self._on_open(ws)
+            self.connected = True
+            logger.info(f"[WS] 연결됨: {self._url} (구독 {len(self._subscriptions)}개 복원)")
+            await self._send("subscribe", list(self._subscriptions))
+
+            heartbeat = asyncio.create_task(self._heartbeat(ws))
+            try:
+                async for raw in ws:
+                    self._last_recv = time.time()
+                    if raw == "pong":
+                        continue
+                    msg = json.loads(raw)
+                    if "event" in msg:
+                        self._on_event(msg)
+                    elif "data" in msg:
+                        self._on_data(msg.get("arg", {}), msg["data"], msg.get("action") or "snapshot")
+            finally:
+                heartbeat.cancel()
+
+    async def run(self):
+        backoff = 1.0
+        while True:
+            started = time.time()
+            try:
+                await self._session()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[WS] 연결 끊김: {type(e).__name__}: {e}")
+            finally:
+                self.connected = False
+                self._ws = None
+
+            # 오래 유지된 연결이었다면 백오프 초기화
+            if time.time() - started > WS_RECONNECT_MAX:
+                backoff = 1.0
+            await asyncio.sleep(backoff * (0.5 + random.random() / 2))
+            backoff = min(backoff * 2, WS_RECONNECT_MAX)
+
+
+class BitgetPublicStream(BitgetStream):
+    """
+    공개 ticker 채널 구독 → on_ticker(symbol, last, mark_price) 콜백
+    """
+    def __init__(self, on_ticker: Callable[[str, float, float], None], url: str = BITGET_WS_PUBLIC_URL):
+        super().__init__(url)
+        self._on_ticker = on_ticker
+
+    async def subscribe_ticker(self, symbol: str):
+        await self.subscribe((inst_type, "ticker", symbol))
+
+    async def unsubscribe_ticker(self, symbol: str):
+        await self.unsubscribe((inst_type, "ticker", symbol))
+
+    def _on_data(self, arg: dict, data: list, action: str):
+        if arg.get("channel") != "ticker":
+            return
+        for item in data:
+            try:
+                last = float(item["last"])
+                mark = float(item.get("markPrice") or last)
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._on_ticker(item.get("instId") or arg.get("instId"), last, mark)
+
+
+class BitgetPrivateStream(BitgetStream):
+    """
+    개인 채널 (account / positions / orders) 구독
+    - 연결마다 로그인 후 구독 복원, 복원 직후 snapshot 으로 로컬 상태 재동기화
+    - on_data(channel, action, data) 콜백, action 은 "snapshot" 또는 "update"
+    """
+    channels = ("account", "positions", "orders")
+
+    def __init__(self, api_key: str, api_secret: str, passphrase: str,
+                 on_data: Callable[[str, str, list], None],
+                 on_reset: Callable[[], None] | None = None,
+                 url: str = BITGET_WS_PRIVATE_URL):
+        super().__init__(url)
+        self._api_key = api_key
+        self._api_secret = api_secret.encode()
+        self._passphrase = passphrase
+        self._on_private = on_data
+        self._on_reset = on_reset
+        self._subscriptions.update((private_inst_type, ch, "default") for ch in self.channels)
+
+    def _login_args(self) -> dict:
+        ts = str(int(time.time()))
+        digest = hmac.new(self._api_secret, (ts + "GET" + "/user/verify").encode(), hashlib.sha256).digest()
+        return {
+            "apiKey": self._api_key,
+            "passphrase": self._passphrase,
+            "timestamp": ts,
+            "sign": base64.b64encode(digest).decode(),
+        }
+
+    async def _on_open(self, ws):
+        # 이전 연결의 상태는 끊긴 사이 변경분을 알 수 없으므로 폐기
+        if self._on_reset is not None:
+            self._on_reset()
+
+        await ws.send(json.dumps({"op": "login", "args": [self._login_args()]}))
+        while True:
+            raw = await asyncio.wait_for(ws.recv(), timeout=WS_PING_INTERVAL)
+            if raw == "pong":
+                continue
+            msg = json.loads(raw)
+            if msg.get("event") == "login":
+                if str(msg.get("code", 0)) not in ("0", "00000"):
+                    raise ConnectionError(f"WS 로그인 실패: {msg}")
+                logger.info("[WS] 개인 채널 로그인 완료")
+                return
+            if msg.get("event") == "error":
+                raise ConnectionError(f"WS 로그인 실패: {msg}")
+
+    def _on_data(self, arg: dict, data: list, action: str):
+        self._on_private(arg.get("channel", ""), action, data)
@@ -0,0 +1,131 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from app import metrics
+from app.config import RATE_LIMIT_GLOBAL
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+# 요청 우선순위 (작을수록 먼저): 주문/취소 > 계정/포지션 > 시세
+PRIORITY_ORDER = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_MARKET = 2
+
+# Bitget Mix v1 엔드포인트별 공개 한도 (초당 요청 수)
+ENDPOINT_LIMITS = {
+    "/api/mix/v1/order/placeOrder": 10,
+    "/api/mix/v1/order/cancel-order": 10,
+    "/api/mix/v1/order/current": 20,
+    "/api/mix/v1/order/detail": 20,
+    "/api/mix/v1/order/marginCoinCurrent": 20,
+    "/api/mix/v1/order/allFills": 10,
+    "/api/mix/v1/plan/placePlan": 10,
+    "/api/mix/v1/plan/cancelPlan": 10,
+    "/api/mix/v1/plan/currentPlan": 10,
+    "/api/mix/v1/plan/historyPlan": 10,
+    "/api/mix/v1/account/account": 20,
+    "/api/mix/v1/account/setLeverage": 5,
+    "/api/mix/v1/position/allPosition-v2": 5,
+    "/api/mix/v1/market/ticker": 20,
+    "/api/mix/v1/market/tickers": 20,
+    "/api/mix/v1/market/contracts": 20,
+    "/api/mix/v1/market/candles": 20,
+    "/api/spot/v1/public/time": 20,
+}
+DEFAULT_LIMIT = 10
+
+
+def priority_of(path: str) -> int:
+    # 서버시간 동기화는 서명 요청의 선행 조건 → 주문과 같은 우선순위
+    if "/order/" in path or "/plan/" in path or path.endswith("/public/time"):
+        return PRIORITY_ORDER
+    if "/market/" in path or "/public/" in path:
+        return PRIORITY_MARKET
+    return PRIORITY_ACCOUNT
+
+
+class TokenBucket:
+    """
+    우선순위 대기열을 가진 토큰 버킷
+    - 토큰이 있고 대기자가 없으면 즉시 통과
+    - 대기 중이면 토큰이 찰 때마다 (우선순위, 도착순) 으로 하나씩 배분
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, priority: int = PRIORITY_ACCOUNT):
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._schedule()
+        await fut
+
+    def drain(self):
+        # 429 수신 시: 남은 토큰을 비워 한 주기 쉬어감
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+    def _schedule(self):
+        if self._timer is None and self._waiters:
+            delay = max((1 - self.tokens) / self.rate, 0.0)
+            self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _release(self):
+        self._timer = None
+        self._refill()
+        while self._waiters and self.tokens >= 1:
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():      # 대기 중 취소됨
+                continue
+            self.tokens -= 1
+            fut.set_result(None)
+        self._schedule()
+
+
+class RequestScheduler:
+    """
+    Bitget REST 호출 예산: 엔드포인트별 버킷 + 전체(IP) 버킷
+    주문/취소는 같은 버킷을 기다리는 시세 조회보다 먼저 토큰을 받음
+    """
+
+    def __init__(self, global_rate: float = RATE_LIMIT_GLOBAL):
+        self._global = TokenBucket(global_rate)
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def _bucket(self, path: str) -> TokenBucket:
+        bucket = self._buckets.get(path)
+        if bucket is None:
+            bucket = self._buckets[path] = TokenBucket(ENDPOINT_LIMITS.get(path, DEFAULT_LIMIT))
+        return bucket
+
+    async def acquire(self, path: str):
+        priority = priority_of(path)
+        t0 = time.perf_counter()
+        await self._bucket(path).acquire(priority)
+        await self._global.acquire(priority)
+        metrics.ratelimit_wait_seconds.observe(time.perf_counter() - t0, priority=str(priority))
+
+    def penalize(self, path: str):
+        logger.warning(f"[RATE LIMIT] 429 수신: {path} 버킷 비움")
+        self._bucket(path).drain()
+        self._global.drain()
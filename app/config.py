@@ -10,9 +10,14 @@ EX_API_SECRET = os.getenv("BITGET_API_SECRET")
 EX_API_PASSPHRASE = os.getenv("BITGET_API_PASSPHRASE")
 
 # ⚙️ 시스템 환경 설정
-DRY_RUN = os.getenv("DRY_RUN", "false").lower() == "true"         # 드라이런 모드 여부
+DRY_RUN = os.getenv("DRY_RUN", "false").lower() == "true"         # 드라이런 모드 여부 (모의 거래소로 전체 경로 실행)
 POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", 1.0))            # 신호 체크 간격 (초)
 MAX_WAIT = int(os.getenv("MAX_WAIT", 10))                         # 포지션 대기 시간 (초)
+WEBHOOK_ASYNC = os.getenv("WEBHOOK_ASYNC", "false").lower() == "true"  # 웹훅 즉시 응답(202) 후 큐 실행
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", 1000))                 # 상태 조회용 작업 보관 개수
+SIGNAL_DEDUP_TTL = float(os.getenv("SIGNAL_DEDUP_TTL", 300))      # 멱등 키(id/time) 보관 시간 (초)
+SIGNAL_COALESCE_WINDOW = float(os.getenv("SIGNAL_COALESCE_WINDOW", 0))  # 처리 중인 심볼에 몰린 신호 병합 대기 (초, 0 = 대기 없음)
+SIGNAL_DEADLINE = float(os.getenv("SIGNAL_DEADLINE", 20))         # 신호 1건 처리 예산 (초, 수신 시각부터, 0 = 제한 없음)
 
 # ⚖️ 매매 전략 설정
 BUY_PCT = float(os.getenv("BUY_PCT", 0.98))                       # 자본 비율 사용
@@ -20,3 +25,92 @@ TRADE_LEVERAGE = float(os.getenv("TRADE_LEVERAGE", 3.0))         # 레버리지
 TP_RATIO = float(os.getenv("TP_RATIO", 1.01))                    # 익절 기준 비율
 TP_PART_RATIO = float(os.getenv("TP_PART_RATIO", 0.3))           # 1차 익절 비율
 SL_RATIO = float(os.getenv("SL_RATIO", 0.99))                    # 손절 기준 비율
+TP1_PCT = float(os.getenv("TP1_PCT", 0.003))                      # 1차 익절 거리 (진입가 대비)
+TP2_PCT = float(os.getenv("TP2_PCT", 0.007))                      # 2차 익절 거리 (진입가 대비)
+SL_PCT = float(os.getenv("SL_PCT", 0.003))                        # 손절 거리 (진입가 대비)
+TP1_PART = float(os.getenv("TP1_PART", 0.2))                      # 1차 익절 수량 (진입 수량 대비)
+TP2_PART = float(os.getenv("TP2_PART", 0.5))                      # 2차 익절 수량 (1차 익절 후 남은 수량 대비)
+PLAN_ORDER_RETRIES = int(os.getenv("PLAN_ORDER_RETRIES", 2))      # TP/SL 주문 실패 시 재시도 횟수
+PLAN_ORDER_RETRY_DELAY = float(os.getenv("PLAN_ORDER_RETRY_DELAY", 0.2))  # 재시도 간격 (초, 회차 비례)
+TRIGGER_MODE = os.getenv("TRIGGER_MODE", "exchange")               # TP/SL 체결 주체: exchange (플랜 주문) / client (틱마다 엔진이 시장가 실행)
+TRAIL_PCT = float(os.getenv("TRAIL_PCT", 0.0))                     # 트레일링 스톱 거리 (고점 대비 비율, 0 = 끔, client 모드)
+BREAKEVEN_AFTER_TP1 = os.getenv("BREAKEVEN_AFTER_TP1", "true").lower() == "true"  # 1차 익절 후 손절을 진입가로 이동 (client 모드)
+BACKSTOP_PCT = float(os.getenv("BACKSTOP_PCT", 0.002))             # client 모드 거래소 비상 손절: 손절가보다 이 비율만큼 더 멀리
+ORDER_SWEEP_INTERVAL = float(os.getenv("ORDER_SWEEP_INTERVAL", 60))  # 남은 TP/SL 주문 점검 주기 (초, 0 = 끔)
+FILL_SYNC_INTERVAL = float(os.getenv("FILL_SYNC_INTERVAL", 5))     # 체결 내역 대사 주기 (초, 0 = 끔 → 트리거 레벨 도달 시점 가격으로 기록)
+FILL_RESOLVE_MAX_AGE = float(os.getenv("FILL_RESOLVE_MAX_AGE", 120))  # 플랜 이력에 아직 없는 청산 체결을 기다리는 최대 시간 (초, 넘으면 수수료만 기록)
+POSITION_MODE = os.getenv("POSITION_MODE", "hedge")               # 계정 포지션 모드: hedge (양방향) / one_way (단방향)
+REVERSAL_MODE = os.getenv("REVERSAL_MODE", "sequential")          # 반대 신호 처리: sequential (청산→대기→진입) / single (1회 전환)
+
+# 📈 서버 자체 신호 (틱 → 봉 → 스트리밍 지표 → switch_position, 웹훅과 같은 실행 큐)
+STRATEGY_ENABLED = os.getenv("STRATEGY_ENABLED", "false").lower() == "true"  # 지표 신호 사용 여부 (리더 워커에서만 평가)
+STRATEGY_SYMBOLS = os.getenv("STRATEGY_SYMBOLS", "")               # 대상 심볼 (예: "ETHUSDT,BTCUSDT")
+STRATEGY_TIMEFRAMES = os.getenv("STRATEGY_TIMEFRAMES", "5m")       # 봉 주기 (예: "1m,5m,1H")
+STRATEGY_EMA_FAST = int(os.getenv("STRATEGY_EMA_FAST", 9))          # 단기 EMA 기간
+STRATEGY_EMA_SLOW = int(os.getenv("STRATEGY_EMA_SLOW", 21))         # 장기 EMA 기간 (단기가 장기를 돌파하면 BUY, 이탈하면 SELL)
+STRATEGY_RSI_PERIOD = int(os.getenv("STRATEGY_RSI_PERIOD", 14))
+STRATEGY_RSI_HIGH = float(os.getenv("STRATEGY_RSI_HIGH", 70))       # 이 이상이면 BUY 보류 (과매수)
+STRATEGY_RSI_LOW = float(os.getenv("STRATEGY_RSI_LOW", 30))         # 이 이하면 SELL 보류 (과매도)
+STRATEGY_ATR_PERIOD = int(os.getenv("STRATEGY_ATR_PERIOD", 14))
+STRATEGY_MIN_ATR_PCT = float(os.getenv("STRATEGY_MIN_ATR_PCT", 0.0))  # ATR/종가(%) 가 이보다 작으면 신호 보류 (횡보 필터, 0 = 끔)
+STRATEGY_BB_PERIOD = int(os.getenv("STRATEGY_BB_PERIOD", 20))
+STRATEGY_BB_K = float(os.getenv("STRATEGY_BB_K", 2.0))             # 볼린저 밴드 폭 (표준편차 배수), 밴드 밖 종가에서는 추격 진입 보류
+STRATEGY_WARMUP = int(os.getenv("STRATEGY_WARMUP", 100))           # 기동 시 과거 봉 적재 개수 (REST)
+
+# 📇 계약 스펙 캐시
+CONTRACT_TTL = float(os.getenv("CONTRACT_TTL", 600))              # 계약 스펙 갱신 주기 (초)
+CONTRACT_MISS_TTL = float(os.getenv("CONTRACT_MISS_TTL", 60))     # 없는 심볼 조회 시 재조회 최소 간격 (초)
+
+# 🌐 Bitget REST 연결
+BITGET_REST_URL = os.getenv("BITGET_REST_URL", "https://api.bitget.com")
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))             # 커넥션 풀 크기
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", 60))           # keep-alive 유지 시간 (초)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"  # 엔드포인트별 요청 예산 적용
+RATE_LIMIT_GLOBAL = float(os.getenv("RATE_LIMIT_GLOBAL", 50))     # 전체 요청 한도 (초당)
+HTTP_REQUEST_TIMEOUT = float(os.getenv("HTTP_REQUEST_TIMEOUT", 10))  # REST 호출 1회 상한 (초, 신호 처리 중이면 남은 예산과 중 작은 값)
+READ_RETRIES = int(os.getenv("READ_RETRIES", 2))                   # 조회(GET) 실패 시 재시도 횟수 (주문은 재시도 없음)
+READ_RETRY_BASE = float(os.getenv("READ_RETRY_BASE", 0.1))         # 조회 재시도 대기 상한 (초, 회차마다 2배, 0~상한 랜덤)
+HTTP_PREWARM = int(os.getenv("HTTP_PREWARM", 3))                  # 기동 시 미리 열어 둘 커넥션 수
+KEEPALIVE_INTERVAL = float(os.getenv("KEEPALIVE_INTERVAL", 20))   # 유휴 시 인증 ping 주기 (초, keep-alive 보다 짧게)
+CLOCK_RESYNC_INTERVAL = float(os.getenv("CLOCK_RESYNC_INTERVAL", 300))  # 서버시간 오프셋 재동기화 주기 (초)
+
+# 📡 Bitget WebSocket
+WS_ENABLED = os.getenv("WS_ENABLED", "true").lower() == "true"    # WS 시세 구독 사용 여부
+BITGET_WS_PUBLIC_URL = os.getenv("BITGET_WS_PUBLIC_URL", "wss://ws.bitget.com/mix/v1/stream")
+BITGET_WS_PRIVATE_URL = os.getenv("BITGET_WS_PRIVATE_URL", "wss://ws.bitget.com/mix/v1/stream")
+WS_PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL", 25))       # 하트비트 간격 (초)
+WS_RECONNECT_MAX = float(os.getenv("WS_RECONNECT_MAX", 30))       # 재연결 최대 대기 (초)
+WS_STALE_AFTER = float(os.getenv("WS_STALE_AFTER", 5))            # 이 시간 동안 푸시 없으면 REST 폴링 (초)
+ORDER_CACHE_SIZE = int(os.getenv("ORDER_CACHE_SIZE", 500))        # 개인 채널 주문 상태 보관 개수
+
+# 💾 상태 저널 (재기동 복구)
+DAILY_REPORT_ENABLED = os.getenv("DAILY_REPORT_ENABLED", "false").lower() == "true"  # 매일 09시 리포트 로그
+JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "true").lower() == "true"
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", "state_dry_run.db" if DRY_RUN else "state.db")                # SQLite(WAL) 파일 경로
+JOURNAL_SNAPSHOT_EVERY = int(os.getenv("JOURNAL_SNAPSHOT_EVERY", 1000))  # 이벤트 N건마다 스냅샷 압축
+
+# 🧩 다중 워커 상태 공유 (uvicorn --workers N)
+SHARED_STATE_ENABLED = os.getenv("SHARED_STATE_ENABLED", "false").lower() == "true"  # 워커 간 상태 공유 (켜면 저널 대신 공유 저장소 사용)
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "shared_dry_run.db" if DRY_RUN else "shared.db")  # 공유 SQLite(WAL) 파일 경로 (락 파일도 같은 위치)
+SHARED_SYNC_INTERVAL = float(os.getenv("SHARED_SYNC_INTERVAL", 0.2))   # 다른 워커 변경분 반영 주기 (초)
+LEADER_RETRY_INTERVAL = float(os.getenv("LEADER_RETRY_INTERVAL", 5))   # 리더 락 재시도 주기 (초, 리더 종료 시 인계 지연 상한)
+
+# 📊 대시보드 실시간 피드 (SSE)
+FEED_INTERVAL = float(os.getenv("FEED_INTERVAL", 0.5))            # 상태 변경 확인 주기 (초)
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", 100))          # 구독자별 밀린 델타 한도
+FEED_HEARTBEAT = float(os.getenv("FEED_HEARTBEAT", 15))           # SSE keep-alive 주기 (초)
+
+# 📈 지표 (/metrics)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# 🧪 모의 거래소 (DRY_RUN)
+SIM_BALANCE = float(os.getenv("SIM_BALANCE", 1000))               # 시작 잔고 (USDT)
+SIM_FEE = float(os.getenv("SIM_FEE", 0.0006))                     # 체결 수수료율
+SIM_LATENCY = float(os.getenv("SIM_LATENCY", 0.05))               # 호출당 네트워크 지연 (초)
+SIM_JITTER = float(os.getenv("SIM_JITTER", 0.02))                 # 지연 흔들림 (± 초)
+SIM_PARTIAL_FILL = float(os.getenv("SIM_PARTIAL_FILL", 0.0))      # 시장가 분할 체결 확률 (0~1)
+SIM_FEED = os.getenv("SIM_FEED", "random")                        # 가격 피드: random / live / none
+SIM_FEED_INTERVAL = float(os.getenv("SIM_FEED_INTERVAL", 1.0))    # 가격 피드 주기 (초)
+SIM_VOLATILITY = float(os.getenv("SIM_VOLATILITY", 0.0005))       # random 피드 틱당 변동성
+SIM_PRICES = os.getenv("SIM_PRICES", "")                          # 시작 가격 지정/추가 (예: "ETHUSDT=2500,DOGEUSDT=0.1")
+SIM_SEED = int(os.getenv("SIM_SEED")) if os.getenv("SIM_SEED") else None  # 재현용 난수 시드
@@ -0,0 +1,89 @@
+# app/deadline.py
+
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+
+from app import metrics
+
+# 현재 신호의 처리 마감 시각 (time.monotonic 기준, None = 제한 없음)
+# contextvar 이므로 신호 처리 중 만든 하위 태스크 (동시 조회 등) 에도 그대로 전달됨
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """
+    신호 처리 예산 소진 → 남은 단계를 진행하지 않고 종료 (stage: 예산이 떨어진 지점)
+    """
+    def __init__(self, stage: str):
+        super().__init__(f"deadline exceeded at {stage}")
+        self.stage = stage
+
+
+def remaining() -> float | None:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def exceeded(stage: str) -> DeadlineExceeded:
+    metrics.deadlines.inc(stage=stage)
+    return DeadlineExceeded(stage)
+
+
+def check(stage: str) -> float | None:
+    # 남은 시간 반환, 이미 소진됐으면 DeadlineExceeded
+    left = remaining()
+    if left is not None and left <= 0:
+        raise exceeded(stage)
+    return left
+
+
+def timeout(cap: float, stage: str) -> float:
+    # 호출 1회 제한 시간: min(상한, 남은 예산)
+    left = check(stage)
+    return cap if left is None else min(cap, left)
+
+
+@contextmanager
+def budget(seconds: float, since: float | None = None):
+    """
+    seconds 예산으로 블록 실행 (since: 예산 시작 epoch, 예: 신호 수신 시각). 0 이하 = 제한 없음
+    바깥에 더 짧은 예산이 있으면 그쪽을 따름
+    """
+    if seconds <= 0:
+        yield
+        return
+    elapsed = time.time() - since if since is not None else 0.0
+    deadline = time.monotonic() + seconds - elapsed
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def unbounded():
+    # 예산과 무관하게 끝까지 진행해야 하는 단계 (진입 후 보호 주문 등)
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def detached() -> contextvars.Context:
+    # 예산이 지워진 현재 컨텍스트 복사본
+    ctx = contextvars.copy_context()
+    ctx.run(_deadline.set, None)
+    return ctx
+
+
+def spawn(coro) -> asyncio.Task:
+    """
+    신호 처리와 수명이 다른 백그라운드 태스크 시작 (예산 없는 컨텍스트에서 실행)
+    create_task(context=) 는 3.11 부터라 3.10 호환을 위해 컨텍스트 안에서 생성 (태스크는 생성 시점 컨텍스트를 복사)
+    """
+    return detached().run(asyncio.get_running_loop().create_task, coro)
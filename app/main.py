@@ -1,36 +1,100 @@
 from fastapi import FastAPI
 from app.routers.webhook import router as webhook_router
-import threading
+from app.routers.dashboard import router as dashboard_router
+from app.routers.report import router as report_router, daily_report
+from app.routers.metrics import router as metrics_router
 import logging
+from app.clients.bitget_client import close_bitget_client, warm_bitget_client
+from app.config import DRY_RUN, WS_ENABLED, JOURNAL_ENABLED, DAILY_REPORT_ENABLED, SHARED_STATE_ENABLED
+from app.services.account_stream import start_account_stream
 from app.services.monitor import start_monitor
+from app.services.contracts import start_contract_cache, stop_contract_cache
+from app.services.journal import start_journal, stop_journal, reconcile_positions
+from app.services.fills import fill_reconciler
+from app.services.order_registry import order_registry
+from app.services.shared_state import shared_state
+from app.services.signals import signal_engine
+from app.services.state_feed import state_feed
+from app.services.triggers import trigger_engine
 from apscheduler.schedulers.background import BackgroundScheduler
 
 app = FastAPI()
 
+async def _start_owner_tasks():
+    """
+    계정당 하나만 돌아야 하는 백그라운드 루프 (다중 워커 모드에서는 리더 워커만)
+    - TP/SL 주문 점검, 체결 대사, 지표 신호, 가격 모니터링, 개인 채널 구독, 일일 리포트
+    """
+    if SHARED_STATE_ENABLED:
+        await reconcile_positions()
+
+    order_registry.start_sweeper()
+    fill_reconciler.start()
+
+    # 지표 신호: 과거 봉 적재 후 모니터 틱으로 갱신
+    try:
+        await signal_engine.start()
+    except Exception:
+        logging.getLogger("signals").exception("지표 신호 시작 실패")
+
+    try:
+        start_monitor()
+    except Exception:
+        logging.getLogger("monitor").exception("Bitget 모니터링 실패")
+
+    # DRY_RUN: 계정 상태는 모의 거래소 REST 응답으로 조회
+    if WS_ENABLED and not DRY_RUN:
+        start_account_stream()
+
+    # ✅ 일일 리포트 (원장 조회만 하므로 상태 리셋 없음)
+    if DAILY_REPORT_ENABLED:
+        sched = BackgroundScheduler(timezone="Asia/Seoul")
+        sched.add_job(daily_report, 'cron', hour=9, minute=0)
+        sched.start()
+
+
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     """
     앱 기동 시:
-    1) 가격 모니터링 스레드 실행
-    2) 일일 리포트 스케줄링 (옵션)
+    0) 거래소 연결 예열 (DNS/TLS/서버시간) + keep-alive
+    1) 상태 복구: 단일 워커는 저널 + 거래소 포지션 대조, 다중 워커는 공유 저장소 (리더 선출 후 대조)
+    2) TP/SL 주문 장부 + 트리거 엔진 (포지션 변경 감시, 복구된 포지션 레벨 재등록)
+    3) 계약 스펙 캐시 로드 + 백그라운드 갱신
+    4) 주문 점검 / 가격 모니터링 / 개인 채널 / 일일 리포트 (다중 워커는 리더만)
+    5) 대시보드 상태 피드 (SSE 델타)
     """
-    def safe_monitor():
-        try:
-            start_monitor()
-        except Exception:
-            logging.getLogger("monitor").exception("Bitget 모니터링 실패")
-
-    thread = threading.Thread(target=safe_monitor, daemon=True)
-    thread.start()
-
-    # ✅ 필요 시 일일 리포트 기능 활성화
-    # from app.routers.report import report
-    # sched = BackgroundScheduler(timezone="Asia/Seoul")
-    # sched.add_job(lambda: report(), 'cron', hour=9, minute=0)
-    # sched.start()
-
-# ✅ 웹훅 라우터 등록
+    await warm_bitget_client()
+
+    if SHARED_STATE_ENABLED:
+        await shared_state.start(on_leader=_start_owner_tasks)
+    elif JOURNAL_ENABLED:
+        await start_journal()
+    order_registry.start()
+    trigger_engine.start()
+
+    await start_contract_cache()
+
+    if not SHARED_STATE_ENABLED:
+        await _start_owner_tasks()
+
+    state_feed.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    # 남은 저널 기록 flush + 리더 락 해제 + keep-alive 세션 정리
+    stop_journal()
+    shared_state.stop()
+    order_registry.stop()
+    fill_reconciler.stop()
+    stop_contract_cache()
+    await close_bitget_client()
+
+# ✅ 웹훅 / 대시보드 / 리포트 / 지표 라우터 등록
 app.include_router(webhook_router)
+app.include_router(dashboard_router)
+app.include_router(report_router)
+app.include_router(metrics_router)
 
 @app.get("/health")
 def health():
@@ -39,4 +103,4 @@ def health():
 # ✅ 직접 실행 시 (개발/로컬 테스트 용도)
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000)
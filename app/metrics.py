@@ -0,0 +1,145 @@
+# app/metrics.py
+
+import functools
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from app.config import METRICS_ENABLED
+
+# 지연 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 신호 수신 시각 (웹훅 → 손절 주문 완료까지 측정용)
+signal_started: ContextVar[float | None] = ContextVar("signal_started", default=None)
+
+
+class Histogram:
+    __slots__ = ("name", "help", "buckets", "_series")
+
+    def __init__(self, name: str, help: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}    # labels → [버킷별 카운트..., sum, count]
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(sorted(labels.items()))
+        s = self._series.get(key)
+        if s is None:
+            s = self._series[key] = [0] * (len(self.buckets) + 2)
+        i = bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            s[i] += 1
+        s[-2] += value
+        s[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, s in self._series.items():
+            cumulative = 0
+            for bound, c in zip(self.buckets, s):
+                cumulative += c
+                lines.append(f"{self.name}_bucket{_labels(key, le=bound)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(key, le='+Inf')} {s[-1]}")
+            lines.append(f"{self.name}_sum{_labels(key)} {s[-2]}")
+            lines.append(f"{self.name}_count{_labels(key)} {s[-1]}")
+        return lines
+
+
+class Counter:
+    __slots__ = ("name", "help", "_series")
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._series: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(sorted(labels.items()))
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(key)} {v}" for key, v in self._series.items()]
+        return lines
+
+
+class Gauge(Counter):
+    __slots__ = ()
+
+    def set(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        self._series[tuple(sorted(labels.items()))] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key: tuple, **extra) -> str:
+    items = list(key) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+# —— 지표 정의 ——
+stage_seconds = Histogram("trade_stage_seconds", "신호 처리 단계별 소요 시간")
+signal_to_sl_seconds = Histogram("signal_to_sl_seconds", "웹훅 수신 → 손절 주문 완료까지 소요 시간")
+bitget_request_seconds = Histogram("bitget_request_seconds", "Bitget REST 호출 지연 (엔드포인트별)")
+bitget_errors = Counter("bitget_request_errors_total", "Bitget REST 호출 오류 수")
+retries = Counter("retries_total", "재시도 횟수")
+monitor_lag_seconds = Gauge("monitor_loop_lag_seconds", "모니터 루프 지연 (예정 주기 초과분)")
+ratelimit_wait_seconds = Histogram("bitget_ratelimit_wait_seconds", "요청 예산(토큰 버킷) 대기 시간")
+coalesced = Counter("bitget_coalesced_total", "진행 중 동일 조회에 합류한 요청 수")
+signals = Counter("signals_total", "웹훅 신호 접수 결과 (accepted / duplicate / superseded)")
+clock_offset_ms = Gauge("bitget_clock_offset_ms", "Bitget 서버시간 - 로컬시간 (ms)")
+triggers_fired = Counter("triggers_fired_total", "클라이언트 트리거 발동 수 (tp / stop / peak)")
+order_cancels = Counter("order_cancels_total", "이전 세대 보호 주문 취소 결과 (cancelled / gone / failed)")
+deadlines = Counter("deadline_exceeded_total", "신호 처리 예산 소진 (단계별)")
+fills_reconciled = Counter("fills_reconciled_total", "체결 대사로 반영한 체결 수 (tp1 / tp2 / sl / fee)")
+
+_ALL = (stage_seconds, signal_to_sl_seconds, bitget_request_seconds, bitget_errors, retries, monitor_lag_seconds,
+        ratelimit_wait_seconds, coalesced, signals, clock_offset_ms, order_cancels,
+        triggers_fired, fills_reconciled, deadlines)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in _ALL:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+def timed(stage: str):
+    """
+    async 함수 소요 시간을 trade_stage_seconds{stage=...} 에 기록
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                stage_seconds.observe(time.perf_counter() - t0, stage=stage)
+        return wrapper
+    return deco
+
+
+def mark_protected():
+    # 손절 주문 완료 시점에 호출 → 신호 수신부터의 경과 시간 기록
+    t0 = signal_started.get()
+    if t0 is not None:
+        signal_to_sl_seconds.observe(time.time() - t0)
@@ -1,88 +1,159 @@
 # app/routers/dashboard.py
 
-from fastapi import APIRouter
-from fastapi.responses import HTMLResponse
-from app.state import monitor_state
+import asyncio
+import os
+import time
+from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from app.config import FEED_HEARTBEAT
+from app.services.state_feed import state_feed
 
 router = APIRouter()
 
-@router.get("/dashboard", response_class=HTMLResponse)
-async def dashboard():
-    data        = monitor_state
-    entry_price = data.get("entry_price", 0.0)
-    entry_time  = data.get("entry_time", "-")
-    qty         = data.get("position_qty", 0.0)
-    pnl         = data.get("pnl", 0.0)
-
-    first_done  = data.get("first_tp_done", False)
-    tp1_price   = data.get("first_tp_price", 0.0)
-    tp1_qty     = data.get("first_tp_qty", 0.0)
-    tp1_time    = data.get("first_tp_time", "-")
-    tp1_pnl     = data.get("first_tp_pnl", 0.0)
-
-    second_done = data.get("second_tp_done", False)
-    tp2_price   = data.get("second_tp_price", 0.0)
-    tp2_qty     = data.get("second_tp_qty", 0.0)
-    tp2_time    = data.get("second_tp_time", "-")
-    tp2_pnl     = data.get("second_tp_pnl", 0.0)
-
-    sl_done     = data.get("sl_done", False)
-    sl_price    = data.get("sl_price", 0.0)
-    sl_qty      = data.get("sl_qty", 0.0)
-    sl_time     = data.get("sl_time", "-")
-    sl_pnl      = data.get("sl_pnl", 0.0)
-
-    html = f"""<!DOCTYPE html>
+# 프로세스별 시작 식별자: 버전 카운터는 워커마다 / 재시작마다 0 부터 → ETag 에 함께 넣어 다른 상태의 304 방지
+_EPOCH = f"{os.getpid():x}-{time.time_ns():x}"
+
+# 정적 셸 페이지: /dashboard/stream 접속 시 snapshot 이벤트로 전체 상태를 받고, 이후 delta 만 반영
+# (/dashboard/state 는 SSE 를 쓰지 않는 폴링 클라이언트용 ETag JSON)
+_SHELL = """<!DOCTYPE html>
 <html lang="ko">
 <head>
   <meta charset="UTF-8" />
   <meta name="viewport" content="width=device-width, initial-scale=1.0" />
   <title>자동매매 대시보드</title>
-  <meta http-equiv="refresh" content="3" />
   <style>
-    body {{ background:#f0f2f5; font-family: Arial; padding:20px; }}
-    h1 {{ text-align:center; margin-bottom:20px; }}
-    .card {{ background:#fff; border-radius:8px; padding:16px; margin:10px 0; box-shadow:0 2px 4px rgba(0,0,0,0.1); }}
-    h2 {{ margin:0 0 10px; }}
-    p {{ margin:4px 0; }}
-    .done {{ color:green; }}
-    .pending {{ color:orange; }}
+    body { background:#f0f2f5; font-family: Arial; padding:20px; }
+    h1 { text-align:center; margin-bottom:20px; }
+    .card { background:#fff; border-radius:8px; padding:16px; margin:10px 0; box-shadow:0 2px 4px rgba(0,0,0,0.1); }
+    h2 { margin:0 0 10px; }
+    h2.symbol { margin:24px 0 0; }
+    p { margin:4px 0; }
+    .done { color:green; }
+    .pending { color:orange; }
+    #conn { text-align:center; color:#888; font-size:12px; }
   </style>
 </head>
 <body>
   <h1>자동매매 상태 대시보드</h1>
+  <p id="conn">연결 중…</p>
+  <div id="counters"></div>
+  <div id="positions"><p>포지션 없음</p></div>
+
+<script>
+let state = {positions: {}, counters: {}};
+
+const ESC = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"};
+const esc = v => String(v ?? "").replace(/[&<>"']/g, c => ESC[c]);
+const f2 = v => Number(v || 0).toFixed(2);
+const f4 = v => Number(v || 0).toFixed(4);
+const badge = (ok, on, off) => `<span class="${ok ? 'done' : 'pending'}">(${ok ? on : off})</span>`;
+
+function card(title, ok, on, off, rows) {
+  return `<div class="card"><h2>${title} ${badge(ok, on, off)}</h2>` +
+    rows.map(([k, v]) => `<p><strong>${k}:</strong> ${esc(v)}</p>`).join("") + `</div>`;
+}
 
-  <div class="card">
-    <h2>진입 정보 <span class="{ 'done' if qty>0 else 'pending' }">({ '진행 중' if qty>0 else '미진행'})</span></h2>
-    <p><strong>시간:</strong> {entry_time}</p>
-    <p><strong>진입가:</strong> {entry_price:.2f} USDT</p>
-    <p><strong>수량:</strong> {qty:.4f}</p>
-    <p><strong>현재 PnL:</strong> {pnl:.2f}%</p>
-  </div>
-
-  <div class="card">
-    <h2>1차 익절 <span class="{ 'done' if first_done else 'pending' }">({ '완료' if first_done else '미완료'})</span></h2>
-    <p><strong>시간:</strong> {tp1_time}</p>
-    <p><strong>체결가:</strong> {tp1_price:.2f} USDT</p>
-    <p><strong>수량:</strong> {tp1_qty:.4f}</p>
-    <p><strong>수익률:</strong> {tp1_pnl:.2f}%</p>
-  </div>
-
-  <div class="card">
-    <h2>2차 익절 <span class="{ 'done' if second_done else 'pending' }">({ '완료' if second_done else '미완료'})</span></h2>
-    <p><strong>시간:</strong> {tp2_time}</p>
-    <p><strong>체결가:</strong> {tp2_price:.2f} USDT</p>
-    <p><strong>수량:</strong> {tp2_qty:.4f}</p>
-    <p><strong>수익률:</strong> {tp2_pnl:.2f}%</p>
-  </div>
-
-  <div class="card">
-    <h2>손절 <span class="{ 'done' if sl_done else 'pending' }">({ '완료' if sl_done else '미완료'})</span></h2>
-    <p><strong>시간:</strong> {sl_time}</p>
-    <p><strong>체결가:</strong> {sl_price:.2f} USDT</p>
-    <p><strong>수량:</strong> {sl_qty:.4f}</p>
-    <p><strong>손익률:</strong> {sl_pnl:.2f}%</p>
-  </div>
+function section(p) {
+  return `<h2 class="symbol">${esc(p.symbol)} <small>${p.side === "long" ? "LONG" : "SHORT"}</small></h2>` +
+    card("진입 정보", p.qty > 0, "진행 중", "미진행", [
+      ["시간", p.entry_time || "-"], ["진입가", f2(p.entry_price) + " USDT"],
+      ["수량", f4(p.qty)], ["현재 PnL", f2(p.pnl) + "%"]]) +
+    card("1차 익절", p.first_tp_done, "완료", "미완료", [
+      ["시간", p.first_tp_time || "-"], ["체결가", f2(p.first_tp_price) + " USDT"],
+      ["수량", f4(p.first_tp_qty)], ["수익률", f2(p.first_tp_pnl) + "%"]]) +
+    card("2차 익절", p.second_tp_done, "완료", "미완료", [
+      ["시간", p.second_tp_time || "-"], ["체결가", f2(p.second_tp_price) + " USDT"],
+      ["수량", f4(p.second_tp_qty)], ["수익률", f2(p.second_tp_pnl) + "%"]]) +
+    card("손절", p.sl_done, "완료", "미완료", [
+      ["시간", p.sl_time || "-"], ["체결가", f2(p.sl_price) + " USDT"],
+      ["수량", f4(p.sl_qty)], ["손익률", f2(p.sl_pnl) + "%"]]);
+}
+
+function summary(c) {
+  return card("누적 현황", true, "오늘", "", [
+    ["거래 횟수", c.trade_count ?? 0], ["1차 익절", c.first_tp_count ?? 0],
+    ["2차 익절", c.second_tp_count ?? 0], ["손절", c.sl_count ?? 0],
+    ["일일 손익", f2(c.daily_pnl) + "%"]]);
+}
+
+function render() {
+  document.getElementById("counters").innerHTML = summary(state.counters || {});
+  const list = Object.values(state.positions)
+    .sort((a, b) => (b.entry_time || "").localeCompare(a.entry_time || ""));
+  document.getElementById("positions").innerHTML = list.map(section).join("") || "<p>포지션 없음</p>";
+}
+
+function merge(target, delta) {
+  for (const [k, v] of Object.entries(delta)) {
+    if (v === null) delete target[k];
+    else if (typeof v === "object" && !Array.isArray(v) && typeof target[k] === "object") merge(target[k], v);
+    else target[k] = v;
+  }
+}
+
+function connect() {
+  const es = new EventSource("/dashboard/stream");
+  es.addEventListener("snapshot", e => { state = JSON.parse(e.data); render(); });
+  es.addEventListener("delta", e => { merge(state, JSON.parse(e.data)); render(); });
+  es.onopen = () => { document.getElementById("conn").textContent = "실시간 연결됨"; };
+  es.onerror = () => { document.getElementById("conn").textContent = "재연결 중…"; };
+}
+
+connect();
+</script>
 </body>
 </html>"""
-    return HTMLResponse(html)
+
+
+def _etag(version: int) -> str:
+    return f'W/"{_EPOCH}-{version}"'
+
+
+@router.get("/dashboard", response_class=HTMLResponse)
+async def dashboard():
+    # 내용이 바뀌지 않는 셸 → 브라우저 캐시 허용
+    return HTMLResponse(_SHELL, headers={"Cache-Control": "public, max-age=300"})
+
+
+@router.get("/dashboard/state")
+async def dashboard_state(request: Request):
+    """
+    버전 붙은 전체 상태 JSON (If-None-Match 일치 시 304)
+    """
+    etag = _etag(state_feed.version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(state_feed.snapshot_json, media_type="application/json", headers=headers)
+
+
+@router.get("/dashboard/stream")
+async def dashboard_stream(request: Request):
+    """
+    SSE: 접속 시 snapshot 1회, 이후 변경된 필드만 delta 로 전송
+    """
+    async def events():
+        q = state_feed.subscribe()
+        try:
+            yield f"id: {state_feed.version}\nevent: snapshot\ndata: {state_feed.snapshot_json}\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(q.get(), timeout=FEED_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if message is None:
+                    yield f"id: {state_feed.version}\nevent: snapshot\ndata: {state_feed.snapshot_json}\n\n"
+                    continue
+                version, delta = message
+                yield f"id: {version}\nevent: delta\ndata: {delta}\n\n"
+        finally:
+            state_feed.unsubscribe(q)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
@@ -0,0 +1,12 @@
+# app/routers/metrics.py
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app import metrics
+
+router = APIRouter()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,45 +1,81 @@
 # app/routers/report.py
 
 import logging
-from fastapi import APIRouter
+import time
+from datetime import date, timedelta
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from datetime import datetime
-from zoneinfo import ZoneInfo
-from app.state import monitor_state
+from app.services.ledger import ledger, trading_day
+from app.state import positions
 
 router = APIRouter()
 logger = logging.getLogger("report")
 
-@router.get("/report", response_class=JSONResponse)
-async def report():
+
+def _parse_day(value: str | None, default: date) -> date:
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"날짜 형식 오류 (YYYY-MM-DD): {value}")
+
+
+def build_report(start: date, end: date, symbol: str | None = None) -> dict:
     """
-    일일 정산 리포트:
-    - period: 보고 대상 날짜 (09시 기준 어제 날짜)
-    - total_trades, tp1_count, tp2_count, sl_count, total_pnl
+    체결 원장 기준 기간 리포트 (읽기 전용, 상태 리셋 없음)
     """
-    now = datetime.now(ZoneInfo("Asia/Seoul"))
-    period_date = (now if now.hour >= 9 else now.replace(day=now.day - 1))\
-                    .strftime("%Y-%m-%d")
-
+    s = ledger.summary(start, end, symbol)
     data = {
-        "period":        period_date,
-        "total_trades":  monitor_state.get("trade_count", 0),
-        "1차_익절횟수":   monitor_state.get("first_tp_count", 0),
-        "2차_익절횟수":   monitor_state.get("second_tp_count", 0),
-        "손절횟수":      monitor_state.get("sl_count", 0),
-        "총_수익률(%)":  round(monitor_state.get("daily_pnl", 0.0), 2),
+        "period":        start.isoformat() if start == end else f"{start.isoformat()}~{end.isoformat()}",
+        "total_trades":  s["entries"],
+        "1차_익절횟수":   s["tp1"],
+        "2차_익절횟수":   s["tp2"],
+        "손절횟수":      s["sl"],
+        "총_수익률(%)":  round(s["pnl"], 2),
+        "실현손익(USDT)": round(s["pnl_usdt"], 2),
+        "수수료(USDT)":  round(s["fee"], 4),
+        "rolling_7d":    ledger.rolling(7, symbol),
     }
+    if symbol is None:
+        data["symbols"] = {
+            sym: v for sym, v in ledger.by_symbol(start, end).items() if any(v.values())
+        }
+    return data
+
 
-    logger.info(f"Daily Report [{period_date}]: {data}")
+def daily_report() -> dict:
+    # 일일 정산 잡용: 직전 정산일(09시 기준 어제) 리포트를 로그로 남김
+    day = trading_day(time.time()) - timedelta(days=1)
+    data = build_report(day, day)
+    logger.info(f"Daily Report [{day.isoformat()}]: {data}")
+    return data
 
-    # 리셋
-    monitor_state.update({
-        "trade_count":      0,
-        "first_tp_count":   0,
-        "second_tp_count":  0,
-        "sl_count":         0,
-        "daily_pnl":        0.0,
-        "last_reset":       period_date
-    })
 
+@router.get("/report", response_class=JSONResponse)
+async def report(start: str | None = None, end: str | None = None, symbol: str | None = None):
+    """
+    정산 리포트 (여러 번 조회해도 결과 동일):
+    - start / end: 정산일 범위 (YYYY-MM-DD, 양끝 포함, 기본값: 09시 기준 오늘 정산일)
+    - symbol: 특정 심볼만 집계 (생략 시 전체 + 심볼별)
+    - positions: 심볼별 현재 포지션 (포지션북 기준)
+    """
+    today = trading_day(time.time())
+    start_day = _parse_day(start, today)
+    end_day = _parse_day(end, today)
+    if end_day < start_day:
+        raise HTTPException(status_code=400, detail="end 가 start 보다 이전입니다")
+
+    sym = symbol.upper().replace("/", "") if symbol else None
+    data = build_report(start_day, end_day, sym)
+    data["positions"] = {
+        p.symbol: {
+            "side":        p.side,
+            "entry_price": p.entry_price,
+            "qty":         p.qty,
+            "pnl(%)":      round(p.pnl, 2),
+        }
+        for p in positions.open_positions()
+        if sym is None or p.symbol == sym
+    }
     return JSONResponse(data)
@@ -1,14 +1,15 @@
 # app/routers/webhook.py
 
 import logging
-from datetime import datetime
-from zoneinfo import ZoneInfo
-from fastapi import APIRouter, HTTPException
+import time
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-from app.config import DRY_RUN
-from app.services.switching import switch_position
-from app.state import monitor_state
+from app import metrics
+from app.config import WEBHOOK_ASYNC
+from app.services.executor import submit, get_job
+from app.services.signals import signal_engine
 
 # 로거 설정
 logger = logging.getLogger("webhook")
@@ -18,61 +19,59 @@ router = APIRouter()
 class AlertPayload(BaseModel):
     symbol: str   # 예: "ETH/USDT"
     action: str   # "BUY" 또는 "SELL"
+    id: str | None = None     # 선택: 알림 고유 ID (멱등 키)
+    time: str | None = None   # 선택: TradingView {{timenow}} 등 발생 시각 (멱등 키로 사용)
 
 # 웹훅 수신 엔드포인트
 @router.post("/webhook")
-async def webhook(payload: AlertPayload):
-    sym = payload.symbol.upper().replace("/", "")  # "ETHUSDT" 형식
-    action = payload.action.upper()                # "BUY" 또는 "SELL"
-
-    if DRY_RUN:
-        logger.info(f"[DRY_RUN] Received {action} for {sym}")
-        return {"status": "dry_run", "symbol": sym, "action": action}
-
+async def webhook(payload: AlertPayload, idempotency_key: str | None = Header(None)):
+    t0 = time.perf_counter()
     try:
-        # Bitget 포지션 스위칭 실행
-        res = switch_position(sym, action)
+        return await _handle(payload, idempotency_key)
+    finally:
+        metrics.stage_seconds.observe(time.perf_counter() - t0, stage="webhook")
 
-        # 이미 동일 방향 포지션이면 스킵 처리
-        if "skipped" in res:
-            logger.info(f"Skipped {action} for {sym} - {res['skipped']}")
-            return {"status": "skipped", "reason": res["skipped"]}
+async def _handle(payload: AlertPayload, idempotency_key: str | None):
+    sym = payload.symbol.upper().replace("/", "")  # "ETHUSDT" 형식
+    action = payload.action.upper()                # "BUY" 또는 "SELL"
 
-        # 거래 정보 추출
-        info = res.get("buy", {}) if action == "BUY" else res.get("sell", {})
-        entry = float(info.get("entry", 0))
-        qty   = float(info.get("filled", 0))
+    if action not in ("BUY", "SELL"):
+        raise HTTPException(status_code=400, detail=f"Unknown action: {action}")
 
-        # 유효하지 않은 거래 정보는 무시
-        if entry <= 0 or qty <= 0:
-            logger.warning(f"[WARNING] Invalid trade info for {sym}: {info}")
-            return {
-                "status": "error",
-                "reason": "Invalid trade data",
-                "symbol": sym,
-                "action": action,
-                "entry": entry,
-                "qty": qty
-            }
+    # 멱등 키: Idempotency-Key 헤더 > payload.id > 심볼+방향+발생시각
+    key = idempotency_key or payload.id
+    if key is None and payload.time:
+        key = f"{sym}:{action}:{payload.time}"
 
-        # 현재 시각
-        now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+    # 심볼별 큐에 적재 (같은 심볼은 순차 실행, 중복은 기존 작업 반환)
+    job = submit(sym, action, key)
 
-        # 모니터 상태 갱신
-        monitor_state.update({
-            "symbol":         sym,
-            "entry_price":    entry,
-            "position_qty":   qty,
-            "entry_time":     now,
-            "first_tp_done":  False,
-            "second_tp_done": False,
-            "sl_done":        False,
+    # ✅ 비동기 모드: 적재 즉시 202 응답, 결과는 /webhook/jobs/{job_id} 로 조회
+    if WEBHOOK_ASYNC:
+        return JSONResponse(status_code=202, content={
+            "status": "accepted",
+            "job_id": job.id,
+            "symbol": sym,
+            "action": action,
+            "status_url": f"/webhook/jobs/{job.id}",
         })
 
-        logger.info(f"[SUCCESS] {action} executed for {sym} @ {entry} qty={qty}")
+    await job.wait()
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status == "deadline_exceeded":
+        raise HTTPException(status_code=504, detail=job.result)
+    return job.result
 
-    except Exception as e:
-        logger.exception(f"[ERROR] Exception during {action} for {sym}")
-        raise HTTPException(status_code=500, detail=f"{type(e).__name__}: {str(e)}")
+# 작업 상태 조회
+@router.get("/webhook/jobs/{job_id}")
+async def webhook_job(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
 
-    return {"status": "ok", "result": res}
\ No newline at end of file
+# 지표 신호 상태 (심볼 × 봉 주기별 지표 값, 다중 워커 모드에서는 리더 워커에만 값이 있음)
+@router.get("/strategy")
+async def strategy_state():
+    return signal_engine.snapshot()
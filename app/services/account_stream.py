@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+
+from app.clients.bitget_client import base_symbol
+from app.clients.bitget_ws import BitgetPrivateStream
+from app.config import EX_API_KEY, EX_API_SECRET, EX_API_PASSPHRASE, ORDER_CACHE_SIZE
+
+logger = logging.getLogger("account_stream")
+logger.setLevel(logging.INFO)
+
+margin_coin = "USDT"
+
+
+def _matches(target_amt: float, current_amt: float) -> bool:
+    if target_amt > 0:
+        return current_amt > 0
+    if target_amt < 0:
+        return current_amt < 0
+    return current_amt == 0
+
+
+class AccountView:
+    """
+    개인 채널 푸시로 유지되는 로컬 계정 상태
+    - available / equity: 증거금 코인 기준 잔고
+    - 심볼별 순포지션 (롱 +, 숏 -)
+    - 최근 주문 상태 (orderId → 마지막 푸시)
+    스트림이 끊기거나 snapshot 수신 전이면 ready=False → 호출 측은 REST 로 대체
+    """
+    def __init__(self):
+        self.stream: BitgetPrivateStream | None = None
+        self.available = 0.0
+        self.equity = 0.0
+        self.updated_at = 0.0
+        self._legs: dict[tuple[str, str], float] = {}   # (symbol, holdSide) → 수량
+        self.orders: dict[str, dict] = {}
+        self._synced: set[str] = set()
+        self._waiters: dict[str, list[tuple[float, asyncio.Future]]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self.stream is not None
+            and self.stream.connected
+            and {"account", "positions"} <= self._synced
+        )
+
+    def reset(self):
+        self._synced.clear()
+
+    def net_position(self, symbol: str) -> float:
+        return self._legs.get((symbol, "long"), 0.0) - self._legs.get((symbol, "short"), 0.0)
+
+    async def wait_position(self, symbol: str, target_amt: float, timeout: float) -> bool:
+        """
+        순포지션이 목표 방향(0 이면 청산 완료)이 될 때까지 푸시 대기
+        """
+        if _matches(target_amt, self.net_position(symbol)):
+            return True
+
+        fut = asyncio.get_running_loop().create_future()
+        waiters = self._waiters.setdefault(symbol, [])
+        waiters.append((target_amt, fut))
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if (target_amt, fut) in waiters:
+                waiters.remove((target_amt, fut))
+
+    def _notify(self, symbol: str):
+        current = self.net_position(symbol)
+        for target_amt, fut in self._waiters.get(symbol, []):
+            if not fut.done() and _matches(target_amt, current):
+                fut.set_result(True)
+
+    # —— 채널별 반영 ——
+    def apply(self, channel: str, action: str, data: list):
+        if channel == "account":
+            self._apply_account(data)
+        elif channel == "positions":
+            self._apply_positions(data, snapshot=(action == "snapshot"))
+        elif channel == "orders":
+            self._apply_orders(data)
+        else:
+            return
+        self._synced.add(channel)
+        self.updated_at = time.time()
+
+    def _apply_account(self, data: list):
+        for item in data:
+            if item.get("marginCoin", margin_coin) != margin_coin:
+                continue
+            self.available = float(item.get("available") or 0)
+            self.equity = float(item.get("equity") or item.get("usdtEquity") or 0)
+
+    def _apply_positions(self, data: list, snapshot: bool):
+        touched = set()
+        if snapshot:
+            touched = {sym for sym, _ in self._legs}
+            self._legs.clear()
+
+        for item in data:
+            symbol = base_symbol(item.get("instId"))
+            side = item.get("holdSide")
+            size = float(item.get("total") or 0)
+            if size > 0:
+                self._legs[(symbol, side)] = size
+            else:
+                self._legs.pop((symbol, side), None)
+            touched.add(symbol)
+
+        for symbol in touched:
+            self._notify(symbol)
+
+    def _apply_orders(self, data: list):
+        for item in data:
+            order_id = item.get("ordId")
+            if not order_id:
+                continue
+            self.orders.pop(order_id, None)
+            self.orders[order_id] = item
+        while len(self.orders) > ORDER_CACHE_SIZE:
+            self.orders.pop(next(iter(self.orders)))
+
+
+account_view = AccountView()
+
+
+def start_account_stream() -> asyncio.Task | None:
+    """
+    개인 채널 구독 시작 (API 키가 없으면 생략 → REST 조회로 동작)
+    """
+    if not (EX_API_KEY and EX_API_SECRET and EX_API_PASSPHRASE):
+        logger.warning("API 키 미설정: 개인 채널 구독 생략")
+        return None
+
+    if account_view.stream is None:
+        account_view.stream = BitgetPrivateStream(
+            EX_API_KEY, EX_API_SECRET, EX_API_PASSPHRASE,
+            on_data=account_view.apply,
+            on_reset=account_view.reset,
+        )
+    logger.info("Bitget 개인 채널 구독 시작")
+    return asyncio.create_task(account_view.stream.run())
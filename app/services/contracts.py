@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import math
+import time
+from functools import lru_cache
+
+from app.clients.bitget_client import get_bitget_client, base_symbol
+from app.config import CONTRACT_TTL, CONTRACT_MISS_TTL
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+product_type = "umcbl"
+
+
+@lru_cache(maxsize=64)
+def _precision(step_size: float) -> int:
+    # step_size → 소수 자릿수 (log10 은 step_size 당 한 번만 계산)
+    return int(round(-math.log10(step_size), 0))
+
+
+def round_step_size(value: float, step_size: float, round_up=False) -> float:
+    factor = 10 ** _precision(step_size)
+    return math.ceil(value * factor) / factor if round_up else math.floor(value * factor) / factor
+
+
+class ContractSpec:
+    """
+    심볼별 계약 스펙 + 미리 계산된 호가/수량 단위 양자화 계수
+    """
+    __slots__ = ("symbol", "min_qty", "tick_size", "step_size", "_price_factor", "_size_factor")
+
+    def __init__(self, symbol: str, min_qty: float, price_scale: int, size_scale: int):
+        self.symbol = symbol
+        self.min_qty = min_qty
+        self.tick_size = 10 ** -price_scale
+        self.step_size = 10 ** -size_scale
+        self._price_factor = 10 ** price_scale
+        self._size_factor = 10 ** size_scale
+
+    @classmethod
+    def from_exchange(cls, item: dict) -> "ContractSpec":
+        # 거래소 심볼 ("BTCUSDT_UMCBL") → 내부 심볼 ("BTCUSDT") 로 키를 맞춤
+        return cls(
+            symbol=base_symbol(item["symbol"]),
+            min_qty=float(item["minTradeNum"]),
+            price_scale=int(item["priceScale"]),
+            size_scale=int(item["sizeScale"]),
+        )
+
+    @property
+    def price_factor(self) -> int:
+        # 10^price_scale (배열 양자화용, round_price 와 같은 계수)
+        return self._price_factor
+
+    @property
+    def size_factor(self) -> int:
+        return self._size_factor
+
+    def round_price(self, value: float, round_up=False) -> float:
+        f = self._price_factor
+        return math.ceil(value * f) / f if round_up else math.floor(value * f) / f
+
+    def round_qty(self, value: float) -> float:
+        f = self._size_factor
+        return math.floor(value * f) / f
+
+
+# 심볼 → ContractSpec
+_specs: dict[str, ContractSpec] = {}
+_loaded_at = 0.0
+_refresher: asyncio.Task | None = None
+_inflight: asyncio.Task | None = None     # 진행 중인 전체 조회 (동시 요청은 같은 조회를 기다림)
+
+
+async def refresh_contract_specs() -> int:
+    """
+    전체 계약 목록을 한 번 내려받아 캐시를 통째로 교체
+    """
+    global _specs, _loaded_at
+
+    client = get_bitget_client()
+    resp = await client.mix_market_api.get_all_symbols(productType=product_type)
+
+    specs = {}
+    for item in resp.get("data", []):
+        try:
+            spec = ContractSpec.from_exchange(item)
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"[CONTRACT] 스펙 파싱 실패: {item.get('symbol')}")
+            continue
+        specs[spec.symbol] = spec
+
+    # 참조 교체 한 번으로 갱신 (조회 측은 락 불필요)
+    _specs = specs
+    _loaded_at = time.time()
+
+    logger.info(f"[CONTRACT] 계약 스펙 {len(specs)}개 로드")
+    return len(specs)
+
+
+async def _refresh_shared():
+    # 단일 비행: 이미 조회 중이면 새로 요청하지 않고 그 결과를 기다림
+    global _inflight
+    if _inflight is None or _inflight.done():
+        _inflight = asyncio.ensure_future(refresh_contract_specs())
+    await asyncio.shield(_inflight)
+
+
+async def get_contract_spec(symbol: str) -> ContractSpec:
+    """
+    캐시된 스펙 조회. 캐시에 없거나 (신규 상장) 백그라운드 갱신 없이 TTL 이 지난 경우에만 REST 조회
+    캐시에 없는 심볼은 마지막 로드가 CONTRACT_MISS_TTL 이내면 재조회 없이 즉시 실패 (없는 심볼 반복 요청 차단)
+    """
+    spec = _specs.get(symbol)
+    age = time.time() - _loaded_at
+    if (spec is None and age > CONTRACT_MISS_TTL) or (age > CONTRACT_TTL and _refresher is None):
+        await _refresh_shared()
+        spec = _specs.get(symbol)
+
+    if spec is None:
+        raise KeyError(f"알 수 없는 심볼: {symbol}")
+    return spec
+
+
+async def _refresh_loop():
+    while True:
+        await asyncio.sleep(CONTRACT_TTL)
+        try:
+            await refresh_contract_specs()
+        except Exception:
+            logger.exception("[CONTRACT] 계약 스펙 갱신 실패")
+
+
+async def start_contract_cache():
+    """
+    기동 시 1회 로드 후 TTL 주기로 백그라운드 갱신
+    """
+    global _refresher
+
+    try:
+        await refresh_contract_specs()
+    except Exception:
+        logger.exception("[CONTRACT] 초기 계약 스펙 로드 실패 (첫 주문 시 재시도)")
+
+    if _refresher is None:
+        _refresher = asyncio.create_task(_refresh_loop())
+
+
+def stop_contract_cache():
+    global _refresher
+    if _refresher is not None:
+        _refresher.cancel()
+        _refresher = None
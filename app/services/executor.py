@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+
+from app import deadline, metrics
+from app.config import JOB_HISTORY, SIGNAL_DEDUP_TTL, SIGNAL_COALESCE_WINDOW, SIGNAL_DEADLINE
+from app.services.shared_state import shared_state
+from app.services.switching import switch_position
+
+logger = logging.getLogger("executor")
+logger.setLevel(logging.INFO)
+
+
+class Job:
+    """
+    웹훅 신호 1건의 실행 단위
+    status: queued → running → done | failed | deadline_exceeded (SIGNAL_DEADLINE 예산 소진, 남은 단계 생략)
+            queued → superseded (실행 전 같은 심볼의 더 최신 신호로 대체)
+            duplicate (다른 워커가 이미 받은 멱등 키)
+    """
+    __slots__ = ("id", "symbol", "action", "status", "result", "error",
+                 "created_at", "started_at", "finished_at", "coalesce", "superseded_by", "_done")
+
+    def __init__(self, symbol: str, action: str):
+        self.id = uuid.uuid4().hex
+        self.symbol = symbol
+        self.action = action
+        self.status = "queued"
+        self.result: dict | None = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.coalesce = False       # 접수 시 같은 심볼 작업이 대기/실행 중 → 실행 전 병합 대기
+        self.superseded_by: Job | None = None
+        self._done = asyncio.Event()
+
+    async def wait(self) -> "Job":
+        await self._done.wait()
+        return self
+
+    def _finish(self, status: str, result: dict | None = None):
+        self.status = status
+        self.result = result
+        self.finished_at = time.time()
+        self._done.set()
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id":      self.id,
+            "symbol":      self.symbol,
+            "action":      self.action,
+            "status":      self.status,
+            "result":      self.result,
+            "error":       self.error,
+            "created_at":  self.created_at,
+            "started_at":  self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+# 최근 작업 (상태 조회용, 오래된 것부터 제거)
+_jobs: "OrderedDict[str, Job]" = OrderedDict()
+# 심볼별 FIFO 큐 + 워커 → 같은 심볼은 순차 실행, 다른 심볼은 서로 독립
+_queues: dict[str, asyncio.Queue] = {}
+_workers: dict[str, asyncio.Task] = {}
+# 심볼별 아직 실행 전인 최신 작업 (새 신호가 오면 대체됨)
+_pending: dict[str, Job] = {}
+# 심볼별 실행 중인 작업
+_running: dict[str, Job] = {}
+
+
+class _IdempotencyKeys:
+    """
+    멱등 키 → 최초 작업 (TTL 동일 → 삽입 순서 = 만료 순서, 조회/정리 모두 O(1) 분할 상환)
+    """
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._keys: "OrderedDict[str, tuple[float, Job]]" = OrderedDict()
+
+    def _evict(self, now: float):
+        while self._keys:
+            key, (expires, _) = next(iter(self._keys.items()))
+            if expires > now:
+                break
+            del self._keys[key]
+
+    def get(self, key: str) -> Job | None:
+        self._evict(time.time())
+        entry = self._keys.get(key)
+        return entry[1] if entry else None
+
+    def put(self, key: str, job: Job):
+        self._keys[key] = (time.time() + self.ttl, job)
+
+
+_idempotency = _IdempotencyKeys(SIGNAL_DEDUP_TTL)
+
+
+async def run_signal(sym: str, action: str) -> dict:
+    """
+    포지션 스위칭 실행 후 웹훅 응답 형태의 dict 반환 (포지션북 갱신은 진입 시 처리)
+    """
+    # Bitget 포지션 스위칭 실행
+    res = await switch_position(sym, action)
+
+    # 이미 동일 방향 포지션이면 스킵 처리
+    if "skipped" in res:
+        logger.info(f"Skipped {action} for {sym} - {res['skipped']}")
+        return {"status": "skipped", "reason": res["skipped"]}
+
+    # 거래 정보 추출
+    info = res.get("buy", {}) if action == "BUY" else res.get("sell", {})
+    entry = float(info.get("entry", 0))
+    qty   = float(info.get("filled", 0))
+
+    # 유효하지 않은 거래 정보는 무시
+    if entry <= 0 or qty <= 0:
+        logger.warning(f"[WARNING] Invalid trade info for {sym}: {info}")
+        return {
+            "status": "error",
+            "reason": "Invalid trade data",
+            "symbol": sym,
+            "action": action,
+            "entry": entry,
+            "qty": qty
+        }
+
+    logger.info(f"[SUCCESS] {action} executed for {sym} @ {entry} qty={qty}")
+    return {"status": "ok", "result": res}
+
+
+async def _worker(symbol: str):
+    queue = _queues[symbol]
+    while True:
+        job: Job = await queue.get()
+
+        # 연속 신호 병합: 이미 처리 중인 심볼에 몰린 신호만 잠깐 기다려 최신 신호만 실행 (유휴 심볼은 즉시)
+        if job.status == "queued" and job.coalesce and SIGNAL_COALESCE_WINDOW > 0:
+            await asyncio.sleep(max(job.created_at + SIGNAL_COALESCE_WINDOW - time.time(), 0.0))
+        if job.status == "superseded":
+            queue.task_done()
+            continue
+        if _pending.get(symbol) is job:
+            del _pending[symbol]
+
+        job.status = "running"
+        job.started_at = time.time()
+        _running[symbol] = job
+        metrics.stage_seconds.observe(job.started_at - job.created_at, stage="queue_wait")
+        metrics.signal_started.set(job.created_at)
+        try:
+            # 예산은 신호 수신 시각부터 (병합 대기·락 대기 포함), 하위 호출은 남은 시간만 사용
+            with deadline.budget(SIGNAL_DEADLINE, since=job.created_at):
+                # 다중 워커: 같은 심볼은 워커 간에도 순차 실행, 실행 직전 다른 워커의 변경분 반영
+                async with shared_state.symbol_lock(job.symbol):
+                    job.result = await run_signal(job.symbol, job.action)
+            job.status = "done"
+        except deadline.DeadlineExceeded as e:
+            logger.warning(f"[DEADLINE] {job.action} {job.symbol} 예산 {SIGNAL_DEADLINE}s 소진 ({e.stage}) → 중단")
+            job.result = {"status": "deadline_exceeded", "stage": e.stage}
+            job.error = str(e)
+            job.status = "deadline_exceeded"
+        except Exception as e:
+            logger.exception(f"[ERROR] Exception during {job.action} for {job.symbol}")
+            job.error = f"{type(e).__name__}: {str(e)}"
+            job.status = "failed"
+        finally:
+            _running.pop(symbol, None)
+            job.finished_at = time.time()
+            job._done.set()
+            queue.task_done()
+
+
+def _duplicate_of(key: str | None) -> Job | None:
+    # 중복 판정은 명시적 멱등 키 (헤더 / 알림 ID / 발생 시각) 가 있을 때만 — 키 없는 같은 방향 신호는 각각 실행
+    original = _idempotency.get(key) if key is not None else None
+    # 대체된 작업은 반환하지 않고 실제로 실행되는 (된) 작업을 따라감
+    while original is not None and original.superseded_by is not None:
+        original = original.superseded_by
+    return original
+
+
+def submit(symbol: str, action: str, key: str | None = None) -> Job:
+    """
+    신호를 심볼별 큐에 적재하고 즉시 반환 (실행은 워커가 순서대로)
+    - 중복 신호 (같은 멱등 키) → 최초 작업 (대체됐으면 대체한 작업) 을 그대로 반환
+    - 실행 전 대기 중인 같은 심볼 신호는 최신 신호로 대체 (최종 방향만 실행)
+    """
+    original = _duplicate_of(key)
+    if original is not None:
+        metrics.signals.inc(outcome="duplicate")
+        logger.info(f"[DUPLICATE] {action} {symbol} → {original.id} 재사용")
+        return original
+
+    job = Job(symbol, action)
+    if key is not None:
+        _idempotency.put(key, job)
+        if not shared_state.claim(key):
+            job._finish("duplicate", {"status": "skipped", "reason": "duplicate"})
+            _jobs[job.id] = job
+            metrics.signals.inc(outcome="duplicate")
+            logger.info(f"[DUPLICATE] {action} {symbol} → 다른 워커에서 처리")
+            return job
+    metrics.signals.inc(outcome="accepted")
+
+    previous = _pending.get(symbol)
+    job.coalesce = symbol in _running or (previous is not None and previous.status == "queued")
+    if previous is not None and previous.status == "queued":
+        previous.superseded_by = job
+        previous._finish("superseded", {"status": "skipped", "reason": "superseded", "superseded_by": job.id})
+        metrics.signals.inc(outcome="superseded")
+        logger.info(f"[COALESCE] {previous.id} {previous.action} → {job.id} {action} {symbol} 로 대체")
+    _pending[symbol] = job
+
+    _jobs[job.id] = job
+    while len(_jobs) > JOB_HISTORY:
+        _jobs.popitem(last=False)
+
+    if symbol not in _queues:
+        _queues[symbol] = asyncio.Queue()
+    worker = _workers.get(symbol)
+    if worker is None or worker.done():
+        _workers[symbol] = asyncio.create_task(_worker(symbol))
+
+    _queues[symbol].put_nowait(job)
+    logger.info(f"[QUEUE] {job.id} {action} {symbol} (대기 {_queues[symbol].qsize()})")
+    return job
+
+
+def get_job(job_id: str) -> Job | None:
+    return _jobs.get(job_id)
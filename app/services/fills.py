@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import time
+
+from app import metrics
+from app.clients.bitget_client import get_bitget_client, base_symbol
+from app.config import FILL_SYNC_INTERVAL, FILL_RESOLVE_MAX_AGE
+from app.services.account_stream import account_view
+from app.services.ledger import ledger
+from app.services.triggers import trigger_engine
+from app.state import Position, positions, monitor_state, counters_changed
+
+logger = logging.getLogger("fills")
+logger.setLevel(logging.INFO)
+
+product_type = "umcbl"
+PAGE_SIZE = 100
+EXECUTED_HISTORY = 1000     # 발동 주문 → 플랜 주문 매핑 보관 개수
+
+
+async def order_fill_price(symbol: str, order_id: str | None, fallback: float) -> float:
+    """
+    시장가 주문 평균 체결가: 개인 채널 푸시 우선, 없으면 주문 상세 1회 조회, 실패 시 fallback (직전 현재가)
+    """
+    if order_id is None:
+        return fallback
+    pushed = account_view.orders.get(order_id) if account_view.ready else None
+    if pushed and float(pushed.get("avgPx") or 0) > 0:
+        return float(pushed["avgPx"])
+    try:
+        detail = await get_bitget_client().mix_order_api.get_order_detail(symbol=symbol, orderId=order_id)
+        price = float((detail.get("data") or {}).get("priceAvg") or 0)
+        if price > 0:
+            return price
+    except Exception as e:
+        logger.warning(f"[FILLS] {symbol} 체결가 조회 실패 → 현재가 사용: {e}")
+    return fallback
+
+
+def _fill_side(fill: dict, pos: Position | None) -> str:
+    side = fill.get("side") or ""
+    if "long" in side:
+        return "long"
+    if "short" in side:
+        return "short"
+    return pos.side if pos else ""
+
+
+class FillReconciler:
+    """
+    거래소 체결 내역 증분 대사
+    - 커서 (마지막 체결 시각 ms + 그 시각의 tradeId) 이후 체결만 조회 → 주기당 비용 O(신규 체결)
+    - 플랜 주문 체결: 발동 시 생긴 주문 (executeOrderId) 을 플랜 이력으로 포지션의 보호 단계에 매핑
+      → 실제 체결가 (주문별 VWAP) · 수수료로 익절/손절 상태·카운터·원장 기록
+    - 그 외 체결 (진입 / 신호 청산 / 엔진 시장가) 은 실행 경로에서 이미 기록 → 수수료만 원장에
+    - 미매핑 청산 체결이 있는데 보호 주문이 미체결 목록에도 플랜 이력에도 없으면 (이력 반영 지연) 그 체결 앞에서 커서를 멈추고
+      다음 주기에 재시도, FILL_RESOLVE_MAX_AGE 가 지나면 수수료만 기록하고 넘어감
+    """
+
+    def __init__(self):
+        self._executed: dict[str, str] = {}    # 발동 주문 orderId → 플랜 orderId
+        self._task: asyncio.Task | None = None
+
+    # —— 커서 ——
+    @staticmethod
+    def _cursor() -> tuple[int, set[str]]:
+        ts, _, ids = (monitor_state.get("fill_cursor") or "").partition(":")
+        return int(ts or 0), set(filter(None, ids.split(",")))
+
+    @staticmethod
+    def _save_cursor(ts: int, ids: set[str]):
+        monitor_state["fill_cursor"] = f"{ts}:{','.join(sorted(ids))}"
+        counters_changed()
+
+    async def _fetch(self, since: int, until: int) -> list[dict]:
+        # 최신순 페이지 → 커서 시각에 닿을 때까지만
+        client = get_bitget_client()
+        fills, last_id = [], None
+        while True:
+            resp = await client.mix_order_api.get_fills(productType=product_type, startTime=since, endTime=until,
+                                                        lastEndId=last_id, limit=PAGE_SIZE)
+            page = resp.get("data") or []
+            fills += page
+            if len(page) < PAGE_SIZE:
+                return fills
+            last_id = page[-1]["tradeId"]
+
+    # —— 매핑 ——
+    @staticmethod
+    def _plan_index() -> dict[str, tuple[Position, str]]:
+        # 포지션북의 보호 주문: 플랜 orderId → (포지션, 단계)
+        return {oid: (pos, leg) for pos in positions for oid, (leg, _) in pos.orders.items()}
+
+    def _resolve(self, order_id: str, index: dict) -> tuple[Position, str] | None:
+        return index.get(order_id) or index.get(self._executed.get(order_id, ""))
+
+    async def _load_plan_history(self, pos: Position) -> set[str]:
+        """
+        미매핑 플랜 주문의 발동 이력 1회 조회 (제출 시각 이후 구간만) → 이력에 있는 (발동/취소) 플랜 orderId
+        """
+        mapped = set(self._executed.values())
+        pending = {oid: placed for oid, (_, placed) in pos.orders.items() if oid not in mapped}
+        if not pending:
+            return set(pos.orders)
+        resp = await get_bitget_client().mix_order_api.get_plan_history(
+            symbol=pos.symbol, startTime=min(pending.values()), endTime=int(time.time() * 1000))
+        found = set(pos.orders) - set(pending)
+        for h in resp.get("data") or []:
+            if h.get("orderId") in pending:
+                found.add(h["orderId"])
+                if h.get("executeOrderId"):
+                    self._executed[h["executeOrderId"]] = h["orderId"]
+        while len(self._executed) > EXECUTED_HISTORY:
+            self._executed.pop(next(iter(self._executed)))
+        return found
+
+    async def _history_lags(self, pos: Position) -> bool:
+        """
+        미매핑 청산 체결이 있을 때: 보호 주문 중 미체결 목록에도 이력에도 없는 것 = 발동됐지만 이력 반영 전
+        """
+        missing = set(pos.orders) - await self._load_plan_history(pos)
+        if not missing:
+            return False
+        resp = await get_bitget_client().mix_order_api.get_plan_orders(symbol=pos.symbol)
+        return bool(missing - {o.get("orderId") for o in resp.get("data") or []})
+
+    # —— 대사 ——
+    async def sync(self) -> int:
+        """
+        커서 이후 체결 반영, 반영한 체결 수 반환 (첫 실행은 커서만 현재 시각으로)
+        """
+        since, seen = self._cursor()
+        now_ms = int(time.time() * 1000)
+        if not since:
+            self._save_cursor(now_ms, set())
+            return 0
+
+        fills = [f for f in await self._fetch(since, now_ms)
+                 if not (int(f["cTime"]) == since and f["tradeId"] in seen)]
+        if not fills:
+            return 0
+        fills.sort(key=lambda f: int(f["cTime"]))
+
+        orders = self._group(fills)
+        index = self._plan_index()
+        lagging = set()
+        for symbol in {base_symbol(fs[0]["symbol"]) for oid, fs in self._unresolved(orders, index)}:
+            try:
+                if await self._history_lags(positions.get(symbol)):
+                    lagging.add(symbol)
+            except Exception:
+                # 커서를 옮기지 않고 다음 주기에 같은 구간 재시도
+                logger.exception(f"[FILLS] {symbol} 플랜 이력 조회 실패 → 다음 주기 재시도")
+                return 0
+
+        waiting = self._waiting(orders, index, lagging, now_ms)
+        if waiting:
+            fills = self._before(fills, waiting)
+            if not fills:
+                return 0
+            orders = self._group(fills)
+
+        for order_id, order_fills in orders.items():
+            self._apply(order_fills, self._resolve(order_id, index))
+
+        last = int(fills[-1]["cTime"])
+        ids = {f["tradeId"] for f in fills if int(f["cTime"]) == last}
+        self._save_cursor(last, ids | seen if last == since else ids)
+        return len(fills)
+
+    @staticmethod
+    def _group(fills: list[dict]) -> dict[str, list[dict]]:
+        orders: dict[str, list[dict]] = {}
+        for f in fills:
+            orders.setdefault(f["orderId"], []).append(f)
+        return orders
+
+    def _unresolved(self, orders: dict[str, list[dict]], index: dict) -> list[tuple[str, list[dict]]]:
+        # 보호 주문이 있는 심볼의 미매핑 청산 체결 (진입 체결은 보호 주문일 수 없으므로 제외)
+        result = []
+        for oid, fs in orders.items():
+            if self._resolve(oid, index) or (fs[0].get("side") or "").startswith("open"):
+                continue
+            pos = positions.get(base_symbol(fs[0]["symbol"]))
+            if pos is not None and pos.orders:
+                result.append((oid, fs))
+        return result
+
+    def _waiting(self, orders: dict[str, list[dict]], index: dict, lagging: set[str], now_ms: int) -> set[str]:
+        """
+        이력 반영이 늦은 심볼의 미매핑 청산 주문 중 아직 기다릴 것 (orderId), 오래된 것은 수수료로 넘김
+        """
+        waiting = set()
+        for oid, fs in self._unresolved(orders, index):
+            if base_symbol(fs[0]["symbol"]) not in lagging:
+                continue
+            age = (now_ms - int(fs[0]["cTime"])) / 1000
+            if age < FILL_RESOLVE_MAX_AGE:
+                waiting.add(oid)
+            else:
+                logger.warning(f"[FILLS] {fs[0]['symbol']} 주문 {oid} 플랜 이력 매핑 실패 ({age:.0f}초) → 수수료만 기록")
+        if waiting:
+            logger.info(f"[FILLS] 플랜 이력 미반영 청산 {len(waiting)}건 → 다음 주기 재시도")
+        return waiting
+
+    @staticmethod
+    def _before(fills: list[dict], waiting: set[str]) -> list[dict]:
+        """
+        대기 주문의 첫 체결 앞까지 (시각순), 경계에 걸친 주문은 통째로 다음 주기로 → 주문 단위로 한 번만 반영
+        """
+        first: dict[str, int] = {}
+        for i, f in enumerate(fills):
+            first.setdefault(f["orderId"], i)
+        cut = min(first[oid] for oid in waiting)
+        while True:
+            earliest = min(first[f["orderId"]] for f in fills[cut:])
+            if earliest == cut:
+                return fills[:cut]
+            cut = earliest
+
+    @staticmethod
+    def _apply(order_fills: list[dict], target: tuple[Position, str] | None):
+        symbol = base_symbol(order_fills[0]["symbol"])
+        qty = sum(float(f["sizeQty"]) for f in order_fills)
+        fee = sum(abs(float(f.get("fee") or 0)) for f in order_fills)
+        price = sum(float(f["price"]) * float(f["sizeQty"]) for f in order_fills) / qty if qty else 0.0
+
+        pos, leg = target if target else (positions.get(symbol), "fee")
+        if target and (positions.get(symbol) is not pos or not pos.is_open):
+            leg = "fee"     # 이미 청산/전환된 포지션의 늦은 체결
+
+        if leg == "sl":
+            trigger_engine.book_stop(pos, price, fee=fee)
+        elif leg != "fee":
+            trigger_engine.book_take_profit(pos, leg, qty, price, fee=fee)
+        else:
+            ledger.record(symbol, "fee", _fill_side(order_fills[0], pos), 0.0, price, fee=fee)
+        metrics.fills_reconciled.inc(len(order_fills), leg=leg)
+
+    async def _loop(self):
+        while True:
+            try:
+                count = await self.sync()
+                if count:
+                    logger.info(f"[FILLS] 체결 {count}건 대사")
+            except Exception:
+                logger.exception("[FILLS] 체결 대사 오류")
+            await asyncio.sleep(FILL_SYNC_INTERVAL)
+
+    def start(self):
+        # 계정당 하나 (리더 워커) 만 실행
+        if self._task is None and FILL_SYNC_INTERVAL > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+fill_reconciler = FillReconciler()
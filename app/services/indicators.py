@@ -0,0 +1,197 @@
+import math
+
+# 스트리밍 지표: 봉 1개 마감마다 O(1) 갱신 (DataFrame 재계산 없음)
+# EMA: 첫 값으로 시드, RSI/ATR: 첫 period 개 단순 평균 후 Wilder 평활, 볼린저: 모표준편차
+
+_TF_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def timeframe_seconds(tf: str) -> int:
+    # "1m" / "15m" / "1H" / "4h" / "1D" → 초
+    return int(tf[:-1]) * _TF_UNITS[tf[-1].lower()]
+
+
+def bitget_granularity(tf: str) -> str:
+    # Bitget 캔들 조회 granularity (분: m, 시간: H, 일: D)
+    unit = tf[-1].lower()
+    return tf[:-1] + ("m" if unit == "m" else unit.upper())
+
+
+class Ring:
+    """
+    고정 크기 링 버퍼 + 구간 합/제곱합 (한 바퀴마다 다시 합산해 부동소수 누적 오차 제거)
+    """
+    __slots__ = ("size", "_values", "_i", "count", "total", "total_sq")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._values = [0.0] * size
+        self._i = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.size
+
+    def push(self, x: float):
+        old = self._values[self._i]
+        self._values[self._i] = x
+        self._i = (self._i + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+            old = 0.0
+        if self._i == 0:
+            self.total = math.fsum(self._values)
+            self.total_sq = math.fsum(v * v for v in self._values)
+        else:
+            self.total += x - old
+            self.total_sq += x * x - old * old
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def std(self) -> float:
+        if not self.count:
+            return 0.0
+        m = self.total / self.count
+        return math.sqrt(max(self.total_sq / self.count - m * m, 0.0))
+
+
+class EMA:
+    __slots__ = ("period", "_alpha", "value", "count")
+
+    def __init__(self, period: int):
+        self.period = period
+        self._alpha = 2 / (period + 1)
+        self.value = 0.0
+        self.count = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    def update(self, x: float) -> float:
+        self.value = x if self.count == 0 else self.value + self._alpha * (x - self.value)
+        self.count += 1
+        return self.value
+
+
+class RSI:
+    __slots__ = ("period", "_prev", "_gain", "_loss", "count", "value")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev: float | None = None
+        self._gain = 0.0
+        self._loss = 0.0
+        self.count = 0
+        self.value = 50.0
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    def update(self, close: float) -> float:
+        if self._prev is None:
+            self._prev = close
+            return self.value
+        change = close - self._prev
+        self._prev = close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self.count += 1
+        if self.count <= self.period:
+            # 첫 period 개는 단순 평균
+            self._gain += (gain - self._gain) / self.count
+            self._loss += (loss - self._loss) / self.count
+        else:
+            self._gain += (gain - self._gain) / self.period
+            self._loss += (loss - self._loss) / self.period
+        if self._loss == 0:
+            self.value = 100.0 if self._gain > 0 else 50.0
+        else:
+            self.value = 100 - 100 / (1 + self._gain / self._loss)
+        return self.value
+
+
+class ATR:
+    __slots__ = ("period", "_prev_close", "count", "value")
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self._prev_close: float | None = None
+        self.count = 0
+        self.value = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self.count >= self.period
+
+    def update(self, high: float, low: float, close: float) -> float:
+        prev = self._prev_close
+        tr = high - low if prev is None else max(high - low, abs(high - prev), abs(low - prev))
+        self._prev_close = close
+        self.count += 1
+        n = min(self.count, self.period)
+        self.value += (tr - self.value) / n
+        return self.value
+
+
+class Bollinger:
+    __slots__ = ("k", "_ring", "mid", "upper", "lower")
+
+    def __init__(self, period: int = 20, k: float = 2.0):
+        self.k = k
+        self._ring = Ring(period)
+        self.mid = self.upper = self.lower = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._ring.full
+
+    def update(self, close: float) -> tuple[float, float, float]:
+        self._ring.push(close)
+        self.mid = self._ring.mean()
+        width = self.k * self._ring.std()
+        self.upper, self.lower = self.mid + width, self.mid - width
+        return self.mid, self.upper, self.lower
+
+
+class Candle:
+    __slots__ = ("start", "open", "high", "low", "close", "ticks")
+
+    def __init__(self, start: int, price: float):
+        self.start = start          # 봉 시작 시각 (epoch 초)
+        self.open = self.high = self.low = self.close = price
+        self.ticks = 1
+
+    def to_dict(self) -> dict:
+        return {"start": self.start, "open": self.open, "high": self.high, "low": self.low, "close": self.close}
+
+
+class CandleAggregator:
+    """
+    틱 → 봉 집계 (진행 중인 봉 1개만 보관), 구간이 바뀌면 마감된 봉 반환
+    """
+    __slots__ = ("seconds", "current")
+
+    def __init__(self, seconds: int):
+        self.seconds = seconds
+        self.current: Candle | None = None
+
+    def on_tick(self, price: float, ts: float) -> Candle | None:
+        start = int(ts // self.seconds) * self.seconds
+        c = self.current
+        if c is not None and c.start == start:
+            c.close = price
+            if price > c.high:
+                c.high = price
+            elif price < c.low:
+                c.low = price
+            c.ticks += 1
+            return None
+        if c is not None and start < c.start:
+            return None     # 늦게 도착한 이전 구간 틱
+        self.current = Candle(start, price)
+        return c
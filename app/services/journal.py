@@ -0,0 +1,238 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+from app.clients.bitget_client import get_bitget_client, base_symbol
+from app.config import STATE_DB_PATH, JOURNAL_SNAPSHOT_EVERY
+from app.services.ledger import ledger
+from app.state import Position, positions, monitor_state, add_listener
+
+logger = logging.getLogger("journal")
+logger.setLevel(logging.INFO)
+
+product_type = "umcbl"
+margin_coin = "USDT"
+
+# 복구 대상 카운터 (일시 플래그 제외)
+_COUNTER_KEYS = ("trade_count", "first_tp_count", "second_tp_count", "sl_count", "daily_pnl", "last_reset",
+                 "fill_cursor")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts      REAL NOT NULL,
+    kind    TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fills (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts      REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id      INTEGER PRIMARY KEY CHECK (id = 1),
+    seq     INTEGER NOT NULL,
+    ts      REAL NOT NULL,
+    state   TEXT NOT NULL
+);
+"""
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _apply(state: dict, kind: str, payload: dict):
+    # 이벤트 1건을 materialized 상태에 반영 (마지막 값 우선)
+    if kind == "position":
+        state["positions"][payload["symbol"]] = payload
+    elif kind == "counters":
+        state["counters"].update(payload)
+
+
+def _load(conn: sqlite3.Connection) -> tuple[dict, int, int]:
+    """
+    스냅샷 + 이후 이벤트 재생 → (상태, 마지막 seq, 재생한 이벤트 수)
+    """
+    state = {"positions": {}, "counters": {}}
+    last_seq = 0
+    row = conn.execute("SELECT seq, state FROM snapshots WHERE id = 1").fetchone()
+    if row:
+        last_seq, state = row[0], json.loads(row[1])
+
+    replayed = 0
+    for seq, kind, payload in conn.execute(
+        "SELECT seq, kind, payload FROM events WHERE seq > ? ORDER BY seq", (last_seq,)
+    ):
+        _apply(state, kind, json.loads(payload))
+        last_seq = seq
+        replayed += 1
+    return state, last_seq, replayed
+
+
+class StateJournal:
+    """
+    SQLite(WAL) append-only 상태 저널
+    - 이벤트 루프는 큐에 넣기만 하고, 디스크 쓰기는 전용 스레드에서 배치 처리
+    - JOURNAL_SNAPSHOT_EVERY 건마다 스냅샷으로 압축 → 재기동 시 재생량 상한
+    """
+    def __init__(self, path: str = STATE_DB_PATH):
+        self._path = path
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._state: dict = {"positions": {}, "counters": {}}
+        self._since_snapshot = 0
+
+    def load(self) -> dict:
+        conn = _connect(self._path)
+        try:
+            t0 = time.perf_counter()
+            self._state, _, self._since_snapshot = _load(conn)
+            logger.info(
+                f"[JOURNAL] 상태 복구: 포지션 {len(self._state['positions'])}개, "
+                f"이벤트 {self._since_snapshot}건 재생 ({(time.perf_counter() - t0) * 1000:.1f}ms)"
+            )
+        finally:
+            conn.close()
+        return self._state
+
+    def load_fills(self) -> list[dict]:
+        # 체결 원장은 압축 대상이 아님 (전체 이력 보존)
+        conn = _connect(self._path)
+        try:
+            return [json.loads(p) for (p,) in conn.execute("SELECT payload FROM fills ORDER BY seq")]
+        finally:
+            conn.close()
+
+    def record(self, kind: str, payload: dict):
+        self._queue.put((time.time(), kind, json.dumps(payload)))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name="state-journal", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _writer(self):
+        conn = _connect(self._path)
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # 쌓여 있는 이벤트는 한 트랜잭션으로
+            while not self._queue.empty() and len(batch) < 500:
+                batch.append(self._queue.get_nowait())
+            if None in batch:
+                stopping = True
+                batch = [e for e in batch if e is not None]
+
+            fills = [(ts, payload) for ts, kind, payload in batch if kind == "fill"]
+            batch = [e for e in batch if e[1] != "fill"]
+
+            try:
+                with conn:
+                    conn.executemany("INSERT INTO events (ts, kind, payload) VALUES (?, ?, ?)", batch)
+                    conn.executemany("INSERT INTO fills (ts, payload) VALUES (?, ?)", fills)
+                for _, kind, payload in batch:
+                    _apply(self._state, kind, json.loads(payload))
+                self._since_snapshot += len(batch)
+
+                if self._since_snapshot >= JOURNAL_SNAPSHOT_EVERY:
+                    self._compact(conn)
+            except Exception:
+                logger.exception("[JOURNAL] 기록 실패")
+        conn.close()
+
+    def _compact(self, conn: sqlite3.Connection):
+        seq = conn.execute("SELECT MAX(seq) FROM events").fetchone()[0] or 0
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (id, seq, ts, state) VALUES (1, ?, ?, ?)",
+                (seq, time.time(), json.dumps(self._state)),
+            )
+            conn.execute("DELETE FROM events WHERE seq <= ?", (seq,))
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._since_snapshot = 0
+        logger.info(f"[JOURNAL] 스냅샷 압축 (seq={seq})")
+
+
+journal = StateJournal()
+
+
+def _on_state_change(kind: str, obj):
+    if kind == "position":
+        journal.record("position", obj.to_dict())
+    elif kind == "counters":
+        journal.record("counters", {k: obj[k] for k in _COUNTER_KEYS if k in obj})
+    elif kind == "fill":
+        journal.record("fill", obj)
+
+
+async def _reconcile():
+    """
+    저널로 복구한 포지션을 거래소 포지션 1회 조회 결과와 대조 (거래소 기준으로 보정)
+    """
+    client = get_bitget_client()
+    resp = await client.mix_account_api.get_all_positions(productType=product_type, marginCoin=margin_coin)
+
+    live: dict[str, tuple[str, float, float]] = {}
+    for item in resp.get("data") or []:
+        qty = float(item.get("total") or 0)
+        if qty > 0:
+            live[base_symbol(item.get("symbol"))] = (
+                item.get("holdSide"), qty, float(item.get("averageOpenPrice") or 0)
+            )
+
+    for pos in positions.open_positions():
+        if pos.symbol not in live:
+            logger.warning(f"[RECONCILE] {pos.symbol} 거래소에 포지션 없음 → 청산 처리")
+            positions.close(pos.symbol)
+
+    for symbol, (side, qty, entry) in live.items():
+        pos = positions.get(symbol)
+        if pos is None or not pos.is_open or pos.side != side:
+            logger.warning(f"[RECONCILE] {symbol} 저널에 없는 {side} {qty} → 거래소 기준으로 등록")
+            positions.open(symbol, side, entry, qty)
+        elif abs(pos.qty - qty) > 1e-12:
+            logger.warning(f"[RECONCILE] {symbol} 수량 보정 {pos.qty} → {qty}")
+            pos.qty = qty
+            positions.touch(symbol)
+
+
+async def start_journal():
+    """
+    기동 시: 저널 복구 (포지션/카운터/체결 원장) → 거래소 대조 → 이후 변경분 기록 시작
+    """
+    state = journal.load()
+    for data in state["positions"].values():
+        positions.restore(Position.from_dict(data))
+    monitor_state.update({k: v for k, v in state["counters"].items() if k in _COUNTER_KEYS})
+    ledger.load(journal.load_fills())
+
+    journal.start()
+    add_listener(_on_state_change)
+
+    await reconcile_positions()
+
+
+async def reconcile_positions():
+    # 복구한 포지션을 거래소 기준으로 보정 (다중 워커 모드에서는 리더 선출 시 1회)
+    try:
+        await _reconcile()
+    except Exception:
+        logger.exception("[RECONCILE] 거래소 포지션 대조 실패 (저장된 상태로 계속)")
+
+
+def stop_journal():
+    journal.stop()
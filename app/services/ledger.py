@@ -0,0 +1,187 @@
+import logging
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.state import notify
+
+logger = logging.getLogger("ledger")
+logger.setLevel(logging.INFO)
+
+KST = ZoneInfo("Asia/Seoul")
+
+# 체결 구분 코드
+LEGS = ("entry", "tp1", "tp2", "sl", "close", "fee")   # fee: 체결 대사로 확인한 수수료만 (수량 0)
+_LEG_CODE = {name: i for i, name in enumerate(LEGS)}
+_SIDE_CODE = {"long": 1, "short": -1}
+
+
+def trading_day(ts: float) -> date:
+    # 정산일: 09시(KST) 기준 → 09시 이전 체결은 전날로 집계
+    return (datetime.fromtimestamp(ts, KST) - timedelta(hours=9)).date()
+
+
+class _Bucket:
+    """
+    (정산일[, 심볼]) 단위 누적 집계
+    """
+    __slots__ = ("counts", "pnl", "pnl_usdt", "fee", "volume")
+
+    def __init__(self):
+        self.counts = [0] * len(LEGS)
+        self.pnl = 0.0          # 수익률 합 (%)
+        self.pnl_usdt = 0.0     # 실현 손익 합 (USDT)
+        self.fee = 0.0
+        self.volume = 0.0       # 체결 금액 합 (USDT)
+
+    def add(self, leg: int, pnl: float, pnl_usdt: float, fee: float, notional: float):
+        self.counts[leg] += 1
+        self.pnl += pnl
+        self.pnl_usdt += pnl_usdt
+        self.fee += fee
+        self.volume += notional
+
+    def merge_into(self, acc: "_Bucket"):
+        for i, c in enumerate(self.counts):
+            acc.counts[i] += c
+        acc.pnl += self.pnl
+        acc.pnl_usdt += self.pnl_usdt
+        acc.fee += self.fee
+        acc.volume += self.volume
+
+
+class TradeLedger:
+    """
+    체결 원장 (NumPy 컬럼 저장) + 정산일/심볼별 집계를 기록 시점에 증분 갱신
+    → 기간 조회는 체결 재스캔 없이 정렬된 정산일 목록 이분 탐색 + O(구간 내 버킷 수) (빈 날짜는 보지 않음)
+    """
+    _COLUMNS = {
+        "ts": np.float64, "symbol": np.int32, "leg": np.int8, "side": np.int8,
+        "qty": np.float64, "price": np.float64, "pnl": np.float64,
+        "pnl_usdt": np.float64, "fee": np.float64,
+    }
+
+    def __init__(self, capacity: int = 1024):
+        self._n = 0
+        self._cols = {name: np.zeros(capacity, dtype=dt) for name, dt in self._COLUMNS.items()}
+        self._symbols: list[str] = []
+        self._symbol_idx: dict[str, int] = {}
+        self._daily: dict[date, _Bucket] = {}
+        self._daily_symbol: dict[tuple[date, int], _Bucket] = {}
+        self._days: list[date] = []                    # 버킷이 있는 정산일 (오름차순)
+        self._symbol_days: dict[int, list[date]] = {}  # 심볼별 버킷이 있는 정산일 (오름차순)
+
+    def __len__(self):
+        return self._n
+
+    def _sym(self, symbol: str) -> int:
+        idx = self._symbol_idx.get(symbol)
+        if idx is None:
+            idx = len(self._symbols)
+            self._symbols.append(symbol)
+            self._symbol_idx[symbol] = idx
+        return idx
+
+    def _grow(self):
+        for name, col in self._cols.items():
+            new = np.zeros(len(col) * 2, dtype=col.dtype)
+            new[:self._n] = col[:self._n]
+            self._cols[name] = new
+
+    def _append(self, ts: float, symbol: str, leg: str, side: str, qty: float, price: float,
+                pnl: float, pnl_usdt: float, fee: float):
+        if self._n == len(self._cols["ts"]):
+            self._grow()
+
+        i = self._n
+        sym = self._sym(symbol)
+        leg_code = _LEG_CODE[leg]
+        row = (ts, sym, leg_code, _SIDE_CODE.get(side, 0), qty, price, pnl, pnl_usdt, fee)
+        for col, value in zip(self._cols.values(), row):
+            col[i] = value
+        self._n += 1
+
+        day = trading_day(ts)
+        notional = qty * price
+        for key, buckets, days in ((day, self._daily, self._days),
+                                   ((day, sym), self._daily_symbol, self._symbol_days.setdefault(sym, []))):
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = _Bucket()
+                insort(days, day)
+            bucket.add(leg_code, pnl, pnl_usdt, fee, notional)
+
+    def record(self, symbol: str, leg: str, side: str, qty: float, price: float,
+               pnl: float = 0.0, pnl_usdt: float = 0.0, fee: float = 0.0, ts: float | None = None):
+        """
+        체결 1건 기록 (leg: entry / tp1 / tp2 / sl / close / fee, pnl: 수익률 %)
+        """
+        ts = time.time() if ts is None else ts
+        self._append(ts, symbol, leg, side, qty, price, pnl, pnl_usdt, fee)
+        notify("fill", {
+            "ts": ts, "symbol": symbol, "leg": leg, "side": side, "qty": qty,
+            "price": price, "pnl": pnl, "pnl_usdt": pnl_usdt, "fee": fee,
+        })
+
+    def load(self, rows: list[dict]):
+        # 저널에서 읽은 과거 체결 적재 (리스너 호출 없음)
+        for r in rows:
+            self._append(r["ts"], r["symbol"], r["leg"], r["side"], r["qty"], r["price"],
+                         r["pnl"], r["pnl_usdt"], r["fee"])
+        logger.info(f"[LEDGER] 체결 {len(rows)}건 적재")
+
+    def summary(self, start: date, end: date, symbol: str | None = None) -> dict:
+        """
+        정산일 [start, end] 구간 집계 (양끝 포함)
+        """
+        acc = _Bucket()
+        sym = self._symbol_idx.get(symbol) if symbol else None
+        if symbol and sym is None:
+            return self._to_dict(acc)
+
+        days = self._days if sym is None else self._symbol_days.get(sym, [])
+        for day in days[bisect_left(days, start):bisect_right(days, end)]:
+            bucket = self._daily[day] if sym is None else self._daily_symbol[(day, sym)]
+            bucket.merge_into(acc)
+        return self._to_dict(acc)
+
+    def by_symbol(self, start: date, end: date) -> dict[str, dict]:
+        return {
+            s: self.summary(start, end, s)
+            for s in self._symbols
+        }
+
+    def rolling(self, days: int, symbol: str | None = None) -> dict:
+        end = trading_day(time.time())
+        return self.summary(end - timedelta(days=days - 1), end, symbol)
+
+    def fills(self, start_ts: float, end_ts: float) -> dict[str, np.ndarray]:
+        """
+        시각 구간 체결 원본 (ts 오름차순 기록 → 이분 탐색 슬라이스)
+        """
+        ts = self._cols["ts"][:self._n]
+        lo, hi = np.searchsorted(ts, [start_ts, end_ts], side="left")
+        out = {name: col[lo:hi] for name, col in self._cols.items()}
+        out["symbol"] = np.array(self._symbols, dtype=object)[out["symbol"]] if hi > lo else np.array([], dtype=object)
+        return out
+
+    @staticmethod
+    def _to_dict(b: _Bucket) -> dict:
+        counts = dict(zip(LEGS, b.counts))
+        return {
+            "entries":   counts["entry"],
+            "tp1":       counts["tp1"],
+            "tp2":       counts["tp2"],
+            "sl":        counts["sl"],
+            "closes":    counts["close"],
+            "pnl":       round(b.pnl, 4),
+            "pnl_usdt":  round(b.pnl_usdt, 4),
+            "fee":       round(b.fee, 6),
+            "volume":    round(b.volume, 4),
+        }
+
+
+ledger = TradeLedger()
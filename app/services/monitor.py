@@ -1,54 +1,120 @@
-import time
+import asyncio
 import logging
+import time
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from threading import Thread
 
-from app.clients.bitget_client import get_bitget_client
-from app.state import monitor_state
-from app.config import POLL_INTERVAL
+from app import metrics
+from app.clients.bitget_client import get_bitget_client, base_symbol
+from app.clients.bitget_ws import BitgetPublicStream
+from app.services.signals import signal_engine
+from app.services.triggers import trigger_engine
+from app.state import positions
+from app.config import DRY_RUN, POLL_INTERVAL, WS_ENABLED, WS_STALE_AFTER
 
 logger = logging.getLogger("monitor")
 logger.setLevel(logging.INFO)
 
 product_type = "umcbl"  # USDT-M 선물 기준
 
-def _poll_price_loop():
-    client = get_bitget_client()
+_stream: BitgetPublicStream | None = None
+_ws_seen: dict[str, float] = {}     # 심볼 → 마지막 WS 시세 푸시 시각
+
+
+def _apply_price(symbol: str, current_price: float, mark_price: float, source: str):
+    """
+    현재가/마크가 반영 + 수익률 갱신 (WS 푸시, REST 폴링 공용)
+    """
+    # 지표 신호 대상 심볼은 포지션 유무와 관계없이 봉 집계
+    signal_engine.on_tick(symbol, current_price)
 
-    symbol = monitor_state.get("symbol")
-    if not symbol:
-        logger.warning("모니터 시작 전 symbol이 설정되지 않았습니다.")
+    pos = positions.get(symbol)
+    if pos is None or not pos.is_open:
         return
 
+    pos.current_price = current_price
+    pos.mark_price = mark_price
+    pos.pnl = pos.pnl_at(current_price)
+    pos.last_checked = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+    pos.price_ts = time.time()
+    pos.price_source = source
+
+    # 넘어선 TP/SL 레벨만 평가
+    trigger_engine.on_price(symbol, current_price)
+
+
+def _on_ticker(symbol: str, last: float, mark: float):
+    _ws_seen[symbol] = time.time()
+    _apply_price(symbol, last, mark, "ws")
+
+
+def _stream_fresh(symbol: str) -> bool:
+    # 소켓 연결 + 최근 WS_STALE_AFTER 초 이내 푸시가 있으면 REST 폴링 생략
+    return (
+        _stream is not None
+        and _stream.connected
+        and time.time() - _ws_seen.get(symbol, 0.0) < WS_STALE_AFTER
+    )
+
+
+async def _sync_subscriptions(subscribed: set[str], wanted: set[str]):
+    # 열린 포지션 + 지표 신호 대상 심볼에 맞춰 WS 구독 추가/해제
+    for symbol in wanted - subscribed:
+        await _stream.subscribe_ticker(symbol)
+    for symbol in subscribed - wanted:
+        await _stream.unsubscribe_ticker(symbol)
+    subscribed.clear()
+    subscribed.update(wanted)
+
+
+async def _poll_price_loop():
+    client = get_bitget_client()
+    subscribed: set[str] = set()
+
     while True:
+        cycle_start = time.perf_counter()
         try:
-            qty = monitor_state.get("position_qty", 0)
-            entry_price = monitor_state.get("entry_price", 0)
+            watched = {p.symbol for p in positions.open_positions()} | signal_engine.symbols
 
-            if qty > 0 and entry_price > 0:
-                # ✅ 공식 SDK의 mix_market_api 사용
-                ticker = client.mix_market_api.get_ticker(symbol=symbol, productType=product_type)
-                current_price = float(ticker["data"]["last"])
+            if _stream is not None:
+                await _sync_subscriptions(subscribed, watched)
 
-                pnl = (current_price / entry_price - 1) * 100
-                now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+            # ✅ 소켓이 끊긴 (또는 푸시가 끊긴) 심볼만 REST 로 보충, 심볼 수와 무관하게 1회 일괄 조회
+            stale = [s for s in watched if not _stream_fresh(s)]
+            if stale:
+                tickers = await client.mix_market_api.get_tickers(productType=product_type)
+                by_symbol = {base_symbol(t.get("symbol")): t for t in tickers.get("data", [])}
 
-                monitor_state.update({
-                    "current_price": current_price,
-                    "pnl": pnl,
-                    "last_checked": now
-                })
+                for symbol in stale:
+                    t = by_symbol.get(symbol)
+                    if t is None:
+                        continue
+                    current_price = float(t["last"])
+                    mark_price = float(t.get("markPrice") or current_price)
+                    _apply_price(symbol, current_price, mark_price, "rest")
 
-                logger.info(f"[{now}] {symbol} 현재가: {current_price}, 수익률: {pnl:.2f}%")
+                    pos = positions.get(symbol)
+                    if pos is None or not pos.is_open:
+                        continue
+                    logger.info(
+                        f"[{pos.last_checked}] {pos.symbol} 현재가: {current_price}, "
+                        f"수익률: {pos.pnl:.2f}% (REST)"
+                    )
 
-            time.sleep(POLL_INTERVAL)
+            await asyncio.sleep(POLL_INTERVAL)
+            # 주기 초과분 = 조회 시간 + 이벤트 루프 지연
+            metrics.monitor_lag_seconds.set(max(time.perf_counter() - cycle_start - POLL_INTERVAL, 0.0))
 
         except Exception as e:
             logger.exception(f"가격 모니터링 중 오류 발생: {e}")
-            time.sleep(POLL_INTERVAL)
+            await asyncio.sleep(POLL_INTERVAL)
+
+def start_monitor() -> asyncio.Task:
+    global _stream
 
-def start_monitor():
     logger.info("Bitget 가격 모니터 시작")
-    thread = Thread(target=_poll_price_loop, daemon=True)
-    thread.start()
\ No newline at end of file
+    # DRY_RUN 은 모의 거래소 가격을 REST 폴링으로 반영 (실시세 소켓 미사용)
+    if WS_ENABLED and not DRY_RUN and _stream is None:
+        _stream = BitgetPublicStream(on_ticker=_on_ticker)
+        asyncio.create_task(_stream.run())
+    return asyncio.create_task(_poll_price_loop())
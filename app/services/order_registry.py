@@ -0,0 +1,259 @@
+import asyncio
+import logging
+import time
+
+from app import deadline, metrics
+from app.clients.bitget_client import get_bitget_client, BitgetAPIError
+from app.config import ORDER_SWEEP_INTERVAL, MAX_WAIT
+from app.services.account_stream import account_view
+from app.services.shared_state import shared_state
+from app.state import Position, positions, add_listener
+
+logger = logging.getLogger("order_registry")
+logger.setLevel(logging.INFO)
+
+margin_coin = "USDT"
+plan_type = "normal_plan"   # placePlan 으로 낸 TP/SL
+
+
+class _Tracked:
+    __slots__ = ("order_id", "symbol", "generation", "leg", "placed_at")
+
+    def __init__(self, order_id: str, symbol: str, generation: int, leg: str):
+        self.order_id = order_id
+        self.symbol = symbol
+        self.generation = generation
+        self.leg = leg
+        self.placed_at = time.time()
+
+
+def _gone(e: Exception) -> bool:
+    # 이미 발동/취소된 주문 등 다시 보내도 실패하는 4xx → 취소 완료로 간주
+    return isinstance(e, BitgetAPIError) and 400 <= e.status < 500 and e.status != 429
+
+
+class OrderRegistry:
+    """
+    심볼 × 포지션 세대별 보호 주문 (TP/SL 플랜 주문) 장부
+    - 포지션북에서 새 포지션이 열리면 세대 +1, 청산/전환되면 이전 세대 주문은 stale
+    - stale 주문은 목록 조회 없이 orderId 로 동시 취소 (≈ 1 RTT), 실패분은 주기 점검에서 재시도
+    - 주기 점검: 포지션이 없어진 심볼의 남은 주문 (거래소에서 손절 발동 후 남은 익절 등) 정리
+    - 세대 장부는 워커 메모리 → 죽은 워커가 남긴 주문은 리더 점검이 거래소 미체결 플랜 주문으로 재구성해 정리
+      (공유 포지션북 기준: 청산된 심볼의 주문 전부, 열린 포지션은 현재 보호 주문 (pos.orders) 보다 먼저 낸 주문)
+    """
+
+    def __init__(self):
+        self._generation: dict[str, int] = {}
+        self._owner: dict[str, Position] = {}            # 현재 세대의 포지션 레코드
+        self._live: dict[str, dict[str, _Tracked]] = {}  # symbol → orderId → 현재 세대 주문
+        self._stale: dict[str, _Tracked] = {}            # orderId → 취소 대기 주문
+        self._tasks: set[asyncio.Task] = set()
+        self._sweeper: asyncio.Task | None = None
+        self._reconciled: dict[str, tuple] = {}          # symbol → 마지막으로 거래소와 맞춘 포지션 상태
+
+    def generation(self, symbol: str) -> int:
+        return self._generation.get(symbol, 0)
+
+    def live_orders(self, symbol: str) -> list[str]:
+        return list(self._live.get(symbol, {}))
+
+    def register(self, symbol: str, generation: int, leg: str, order_id: str | None):
+        """
+        주문 응답 수신 시 기록. 제출 중에 포지션이 바뀌었으면 (세대 불일치) 바로 취소 대상
+        """
+        if not order_id:
+            return
+        tracked = _Tracked(order_id, symbol, generation, leg)
+        if generation == self.generation(symbol):
+            self._live.setdefault(symbol, {})[order_id] = tracked
+        else:
+            logger.info(f"[ORDERS] {symbol} {leg} 세대 {generation} 주문이 늦게 도착 → 취소")
+            self._stale[order_id] = tracked
+            self._spawn(self.cancel_stale(symbol))
+
+    def retire(self, symbol: str) -> asyncio.Task | None:
+        """
+        현재 세대 종료: 세대 +1, 남은 주문은 stale 로 옮기고 동시 취소 태스크 시작
+        """
+        self._generation[symbol] = self.generation(symbol) + 1
+        self._owner.pop(symbol, None)
+        live = self._live.pop(symbol, None)
+        if not live:
+            return None
+        self._stale.update(live)
+        return self._spawn(self.cancel_stale(symbol))
+
+    async def cancel_stale(self, symbol: str) -> dict[str, str]:
+        """
+        심볼의 stale 주문 전부 동시 취소 → {orderId: "cancelled" | "gone" | "failed"}
+        """
+        targets = [t for t in self._stale.values() if t.symbol == symbol]
+        if not targets:
+            return {}
+        client = get_bitget_client()
+        results = await asyncio.gather(*(
+            client.mix_order_api.cancel_plan_order(symbol=symbol, marginCoin=margin_coin,
+                                                   orderId=t.order_id, planType=plan_type)
+            for t in targets
+        ), return_exceptions=True)
+
+        outcome = {}
+        for t, res in zip(targets, results):
+            if not isinstance(res, Exception):
+                status = "cancelled"
+            elif _gone(res):
+                status = "gone"
+            else:
+                status = "failed"
+                logger.warning(f"[ORDERS] {symbol} {t.leg} {t.order_id} 취소 실패 (점검 시 재시도): {res}")
+            if status != "failed":
+                self._stale.pop(t.order_id, None)
+            outcome[t.order_id] = status
+            metrics.order_cancels.inc(result=status)
+        logger.info(f"[ORDERS] {symbol} 이전 세대 주문 정리: {outcome}")
+        return outcome
+
+    def _spawn(self, coro) -> asyncio.Task:
+        # 신호 처리 중에 시작돼도 신호 예산과 무관하게 끝까지 진행
+        task = deadline.spawn(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # —— 포지션북 리스너 ——
+    def _on_state_change(self, kind: str, obj):
+        if kind != "position":
+            return
+        owner = self._owner.get(obj.symbol)
+        if obj.is_open and owner is obj:
+            return      # 같은 포지션의 필드 변경 (부분 익절 등)
+        if owner is not None or self._live.get(obj.symbol):
+            self.retire(obj.symbol)
+        if obj.is_open:
+            self._generation[obj.symbol] = self.generation(obj.symbol) + 1
+            self._owner[obj.symbol] = obj
+
+    # —— 주기 점검 ——
+    async def _net_position(self, symbol: str) -> float:
+        if account_view.ready:
+            return account_view.net_position(symbol)
+        resp = await get_bitget_client().mix_account_api.get_account(symbol=symbol, marginCoin=margin_coin)
+        return float(resp["data"]["total"])
+
+    @staticmethod
+    def _orphans(pos: Position, plans: list[dict], now_ms: int) -> tuple[list[dict], int]:
+        """
+        (취소할 주문, 유예 중인 후보 수): 청산된 포지션은 전부, 열린 포지션은 현재 보호 주문보다 먼저 낸 것
+        방금 낸 주문 (다른 워커가 진입 직후 기록 전일 수 있음) 은 MAX_WAIT 동안 유예
+        """
+        if pos.is_open:
+            if not pos.orders:
+                return [], 0
+            first = min(placed for _, placed in pos.orders.values())
+            plans = [o for o in plans if o.get("orderId") not in pos.orders and int(o.get("cTime") or 0) < first]
+        settled = [o for o in plans if int(o.get("cTime") or 0) < now_ms - MAX_WAIT * 1000]
+        return settled, len(plans) - len(settled)
+
+    async def reconcile_exchange(self, symbol: str) -> int:
+        """
+        거래소 미체결 플랜 주문과 공유 포지션북 대조 → 어느 워커 장부에도 없는 이전 세대 주문 취소, 취소 건수 반환
+        포지션 상태 (열림 여부 + 보호 주문 목록) 가 바뀐 심볼만 조회
+        """
+        pos = positions.get(symbol)
+        if pos is None:
+            return 0
+        state = (pos.is_open, tuple(sorted(pos.orders)))
+        if self._reconciled.get(symbol) == state:
+            return 0
+        async with shared_state.symbol_lock(symbol):
+            resp = await get_bitget_client().mix_order_api.get_plan_orders(symbol=symbol)
+            plans = resp.get("data") or []
+            orphans, waiting = self._orphans(pos, plans, int(time.time() * 1000))
+            for o in orphans:
+                self._stale[o["orderId"]] = _Tracked(o["orderId"], symbol, -1, o.get("side", "plan"))
+            if orphans:
+                logger.warning(f"[ORDERS] {symbol} 장부에 없는 이전 세대 주문 {len(orphans)}건 → 취소")
+                outcome = await self.cancel_stale(symbol)
+                if "failed" in outcome.values():
+                    return len(orphans)
+            # 유예 중인 후보가 남았으면 다음 점검에 다시 확인
+            if not waiting:
+                self._reconciled[symbol] = state
+        return len(orphans)
+
+    async def sweep(self):
+        """
+        1) 취소 실패했던 stale 주문 재시도
+        2) 거래소 포지션이 없는데 현재 세대 주문이 남은 심볼 → 세대 종료 (고아 주문 정리)
+        3) 포지션 상태가 바뀐 심볼은 거래소 플랜 주문으로 재구성 → 다른 (죽은) 워커가 남긴 주문 정리
+        """
+        for symbol in {t.symbol for t in self._stale.values()}:
+            await self.cancel_stale(symbol)
+
+        now = time.time()
+        for symbol, live in list(self._live.items()):
+            # 막 진입한 포지션은 푸시/조회 반영 전일 수 있으므로 유예
+            if not live or min(t.placed_at for t in live.values()) > now - MAX_WAIT:
+                continue
+            try:
+                if await self._net_position(symbol) == 0:
+                    logger.warning(f"[ORDERS] {symbol} 포지션 없음 → 남은 보호 주문 {len(live)}건 정리")
+                    self.retire(symbol)
+            except Exception:
+                logger.exception(f"[ORDERS] {symbol} 포지션 확인 실패")
+
+        for pos in list(positions):
+            try:
+                await self.reconcile_exchange(pos.symbol)
+            except Exception:
+                logger.exception(f"[ORDERS] {pos.symbol} 플랜 주문 대조 실패")
+
+    async def adopt(self):
+        """
+        기동 시: 재시작 전에 낸 플랜 주문을 거래소에서 1회 조회
+        열린 포지션의 주문은 현재 세대로 등록, 포지션이 없는 심볼의 주문은 취소
+        """
+        client = get_bitget_client()
+        for pos in list(positions):
+            try:
+                resp = await client.mix_order_api.get_plan_orders(symbol=pos.symbol)
+            except Exception:
+                logger.exception(f"[ORDERS] {pos.symbol} 플랜 주문 조회 실패")
+                continue
+            if pos.is_open:
+                self._owner[pos.symbol] = pos
+            for o in resp.get("data") or []:
+                if pos.is_open:
+                    self.register(pos.symbol, self.generation(pos.symbol), o.get("side", "plan"), o.get("orderId"))
+                else:
+                    self._stale[o["orderId"]] = _Tracked(o["orderId"], pos.symbol, -1, o.get("side", "plan"))
+            if not pos.is_open:
+                await self.cancel_stale(pos.symbol)
+
+    async def _sweep_loop(self):
+        try:
+            await self.adopt()
+        except Exception:
+            logger.exception("[ORDERS] 기동 시 주문 확인 실패")
+        while True:
+            await asyncio.sleep(ORDER_SWEEP_INTERVAL)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("[ORDERS] 주문 점검 오류")
+
+    def start(self):
+        # 포지션 변경 감시는 모든 워커, 주기 점검은 start_sweeper 를 호출한 워커 (리더) 만
+        add_listener(self._on_state_change)
+
+    def start_sweeper(self):
+        if self._sweeper is None and ORDER_SWEEP_INTERVAL > 0:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+
+order_registry = OrderRegistry()
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+import uuid
+
+from app import deadline, metrics
+from app.clients.bitget_client import get_bitget_client, BitgetAPIError
+from app.config import (
+    PLAN_ORDER_RETRIES, PLAN_ORDER_RETRY_DELAY, TRIGGER_MODE, BACKSTOP_PCT,
+    TP1_PCT, TP2_PCT, SL_PCT, TP1_PART, TP2_PART,
+)
+from app.services.contracts import ContractSpec, get_contract_spec
+from app.services.order_registry import order_registry
+from app.services.triggers import trigger_engine
+from app.state import positions
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+margin_coin = "USDT"
+DUPLICATE_CLIENT_OID = "40786"    # 같은 clientOid 재제출 → 이전 요청이 이미 접수됨
+
+
+def _retryable(e: Exception) -> bool:
+    """
+    재시도 정책: 네트워크 오류 / 429 / 5xx 만 재시도.
+    그 외 4xx (가격·수량 검증 실패 등)는 같은 요청을 다시 보내도 실패하므로 즉시 포기
+    """
+    if isinstance(e, BitgetAPIError):
+        return e.status == 429 or e.status >= 500
+    return True
+
+
+async def _find_plan(symbol: str, client_oid: str) -> str | None:
+    # 응답을 못 받은 제출이 실제로 접수됐는지 clientOid 로 확인 → 접수된 orderId
+    resp = await get_bitget_client().mix_order_api.get_plan_orders(symbol=symbol)
+    for plan in resp.get("data") or []:
+        if plan.get("clientOid") == client_oid:
+            return plan.get("orderId")
+    return None
+
+
+async def _place_leg(name: str, symbol: str, side: str, qty: float, trigger_price: float, client_oid: str) -> dict:
+    """
+    레그 1개 제출: 재시도에도 같은 clientOid 를 보내 중복 플랜 주문 방지
+    - 응답 없는 실패 (타임아웃 등) 후에는 재제출 전에 미체결 플랜 조회로 접수 여부 확인
+    - 중복 clientOid 거절 = 이전 제출이 접수된 것 → 성공 처리
+    """
+    client = get_bitget_client()
+    attempts = 0
+    ambiguous = False
+    while True:
+        attempts += 1
+        try:
+            order_id = await _find_plan(symbol, client_oid) if ambiguous else None
+            if order_id is None:
+                resp = await client.mix_order_api.place_plan_order(
+                    symbol=symbol,
+                    marginCoin=margin_coin,
+                    size=str(qty),
+                    side=side,
+                    orderType="market",
+                    triggerPrice=str(trigger_price),
+                    executePrice=str(trigger_price),
+                    triggerType="market_price",
+                    clientOid=client_oid
+                )
+                order_id = (resp.get("data") or {}).get("orderId")
+            return {"status": "ok", "orderId": order_id, "attempts": attempts,
+                    "price": trigger_price, "qty": qty}
+        except Exception as e:
+            if isinstance(e, BitgetAPIError) and e.code == DUPLICATE_CLIENT_OID:
+                # 이전 제출이 이미 접수됨 → 성공 (그 사이 발동/취소됐으면 orderId 없음)
+                try:
+                    order_id = await _find_plan(symbol, client_oid)
+                except Exception:
+                    order_id = None
+                logger.info(f"[PLAN DUP] {symbol} {name} 이미 접수됨 ({client_oid} → {order_id})")
+                return {"status": "ok", "orderId": order_id, "attempts": attempts,
+                        "price": trigger_price, "qty": qty}
+            # 응답을 못 받았거나 5xx → 접수됐을 수 있으므로 다음 시도는 조회부터
+            ambiguous = ambiguous or not isinstance(e, BitgetAPIError) or e.status >= 500
+            if attempts > PLAN_ORDER_RETRIES or not _retryable(e):
+                logger.error(f"[PLAN FAIL] {symbol} {name} ({attempts}회): {e}")
+                return {"status": "failed", "error": str(e), "attempts": attempts,
+                        "price": trigger_price, "qty": qty}
+            logger.warning(f"[PLAN RETRY] {symbol} {name} {attempts}회 실패: {e}")
+            metrics.retries.inc(kind="plan_order", leg=name)
+            await asyncio.sleep(PLAN_ORDER_RETRY_DELAY * attempts)
+
+
+def protective_legs(spec: ContractSpec, sign: int, entry: float, qty: float) -> dict[str, tuple[float, float]]:
+    """
+    진입가·수량 → TP/SL 레그 {"tp1": (qty, trigger_price), ...} (sign: 롱 1, 숏 -1)
+    execute_buy / execute_sell / reverse_position 공통
+    """
+    tp1_qty = spec.round_qty(qty * TP1_PART)
+    return {
+        "tp1": (tp1_qty, spec.round_price(entry * (1 + sign * TP1_PCT), round_up=True)),
+        "tp2": (spec.round_qty((qty - tp1_qty) * TP2_PART), spec.round_price(entry * (1 + sign * TP2_PCT), round_up=True)),
+        "sl":  (qty, spec.round_price(entry * (1 - sign * SL_PCT))),
+    }
+
+
+@metrics.timed("protect")
+async def place_protective_orders(symbol: str, side: str, legs: dict[str, tuple[float, float]]) -> dict:
+    """
+    TP/SL 플랜 주문을 동시에 제출 (진입 체결 후 보호 완료까지 ≈ 1 RTT)
+    legs: {"tp1": (qty, trigger_price), ...}, side: "close_long" 또는 "close_short"
+    반환: 레그별 결과 {"tp1": {"status": "ok", "orderId": ...}, ...}
+    접수된 주문은 현재 포지션 세대로 주문 장부에 기록 (청산/전환 시 일괄 취소 대상)
+    + 포지션 레코드에도 기록 (체결 대사가 플랜 체결을 단계별 익절/손절로 매핑)
+    TRIGGER_MODE=client: 레벨은 트리거 엔진이 실행, 거래소에는 손절보다 BACKSTOP_PCT 먼 비상 손절만 제출
+    """
+    # 진입이 이미 체결된 뒤이므로 신호 예산이 소진돼도 보호 주문은 끝까지 제출
+    with deadline.unbounded():
+        trigger_engine.set_levels(symbol, legs)
+        if TRIGGER_MODE == "client" and "sl" in legs:
+            qty, price = legs["sl"]
+            spec = await get_contract_spec(symbol)
+            if side == "close_long":
+                legs = {"sl": (qty, spec.round_price(price * (1 - BACKSTOP_PCT)))}
+            else:
+                legs = {"sl": (qty, spec.round_price(price * (1 + BACKSTOP_PCT), round_up=True))}
+
+        generation = order_registry.generation(symbol)
+        submitted_ms = int(time.time() * 1000)
+        # clientOid: 제출 1회마다 고유 (세대 번호는 재시작 시 초기화되므로 임의 토큰 포함)
+        token = uuid.uuid4().hex[:10]
+        names = list(legs)
+        results = await asyncio.gather(*(
+            _place_leg(name, symbol, side, qty, price, f"{symbol}-{generation}-{name}-{token}")
+            for name, (qty, price) in legs.items()
+        ))
+        outcome = dict(zip(names, results))
+        for name, res in outcome.items():
+            order_registry.register(symbol, generation, name, res.get("orderId"))
+
+        placed = {res["orderId"]: [name, submitted_ms] for name, res in outcome.items() if res.get("orderId")}
+        pos = positions.get(symbol)
+        if placed and pos is not None and pos.is_open and order_registry.generation(symbol) == generation:
+            pos.orders = {**pos.orders, **placed}
+            positions.touch(symbol)
+
+        if outcome.get("sl", {}).get("status") == "ok":
+            metrics.mark_protected()
+        else:
+            logger.error(f"[UNPROTECTED] {symbol} 손절 주문 미설정 → 수동 확인 필요")
+    return outcome
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app import deadline
+from app.clients.bitget_client import get_bitget_client
+from app.config import POSITION_MODE, TRADE_LEVERAGE
+from app.metrics import timed
+from app.services.buy import execute_buy
+from app.services.fills import order_fill_price
+from app.services.ledger import ledger
+from app.services.pretrade import PreTradeSnapshot
+from app.services.protection import place_protective_orders, protective_legs
+from app.services.sell import execute_sell
+from app.state import monitor_state, positions, counters_changed
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+margin_coin = "USDT"
+FLATTEN_ATTEMPTS = 3    # 청산 실패 시 신규 진입 되돌림 시도 횟수
+
+# 신호별 주문 파라미터 (one_way: 단일 주문 side, hedge: 청산/진입 side)
+_SIDES = {
+    "BUY":  {"side": "long",  "single": "buy_single",  "close": "close_short", "open": "open_long",
+             "protect": "close_long",  "sign": 1, "key": "buy"},
+    "SELL": {"side": "short", "single": "sell_single", "close": "close_long",  "open": "open_short",
+             "protect": "close_short", "sign": -1, "key": "sell"},
+}
+
+
+def _record_close(symbol: str, pos, qty: float, price: float) -> float:
+    # 청산 손익 원장 기록 + 손실이면 손절 카운터 (switch_position 순차 경로와 동일 규칙)
+    pnl = pos.pnl_at(price) if pos else 0.0
+    if pos:
+        ledger.record(symbol, "sl" if pnl < 0 else "close", pos.side, qty, price,
+                      pnl=pnl, pnl_usdt=pos.pnl_usdt_at(price, qty))
+    if pnl < 0:
+        monitor_state["sl_count"] += 1
+        monitor_state["daily_pnl"] += pnl
+        counters_changed()
+        now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+        logger.info(f"Stop-loss on reversal {symbol}: {pnl:.2f}% at {now}")
+    return pnl
+
+
+async def _flatten(symbol: str, s: dict, qty: float) -> bool:
+    # 동시 주문 중 신규 진입만 체결된 경우 그 포지션 청산 (감소 전용 side 라 재시도해도 초과 청산 없음)
+    client = get_bitget_client()
+    for attempt in range(1, FLATTEN_ATTEMPTS + 1):
+        try:
+            with deadline.unbounded():
+                await client.mix_order_api.place_order(
+                    symbol=symbol, marginCoin=margin_coin, size=str(qty),
+                    side=s["protect"], orderType="market"
+                )
+            return True
+        except Exception as e:
+            logger.warning(f"[REVERSAL] {symbol} 신규 {s['side']} 되돌림 실패 ({attempt}/{FLATTEN_ATTEMPTS}): {e}")
+    logger.critical(f"[REVERSAL] {symbol} 신규 {s['side']} {qty} 미보호 상태 → 수동 청산 필요")
+    return False
+
+
+@timed("reverse")
+async def reverse_position(symbol: str, action: str, close_qty: float, snapshot: PreTradeSnapshot) -> dict:
+    """
+    반대 방향 포지션을 최소 왕복으로 전환
+    - one_way: (보유 수량 + 신규 수량) 반대 주문 1건 → 청산과 진입이 한 번에 체결
+    - hedge:   청산 주문과 신규 진입 주문을 동시에 제출
+    신규 수량은 평가 자산 기준 (청산으로 풀릴 증거금 포함), 청산 손익은 체결가로 계산
+    """
+    client = get_bitget_client()
+    s = _SIDES[action]
+    spec = snapshot.spec
+    price = snapshot.price
+
+    qty = spec.round_qty(snapshot.equity * 0.98 * TRADE_LEVERAGE / price)
+    if qty < spec.min_qty:
+        logger.warning(f"[REVERSAL] {symbol} 신규 수량 {qty} < min {spec.min_qty} → 청산만 진행")
+        qty = 0.0
+
+    opened = qty > 0
+    if POSITION_MODE == "one_way":
+        res = await client.mix_order_api.place_order(
+            symbol=symbol,
+            marginCoin=margin_coin,
+            size=str(round(close_qty + qty, 10)),
+            side=s["single"],
+            orderType="market"
+        )
+        close_id = (res.get("data") or {}).get("orderId")
+    else:
+        close_order = client.mix_order_api.place_order(
+            symbol=symbol, marginCoin=margin_coin, size=str(close_qty),
+            side=s["close"], orderType="market"
+        )
+        open_order = client.mix_order_api.place_order(
+            symbol=symbol, marginCoin=margin_coin, size=str(qty),
+            side=s["open"], orderType="market"
+        ) if opened else asyncio.sleep(0)
+        close_res, open_res = await asyncio.gather(close_order, open_order, return_exceptions=True)
+
+        if isinstance(close_res, Exception):
+            # 기존 포지션이 남아 있으므로 새로 열린 반대 방향 포지션은 장부·보호 없이 두지 않고 즉시 청산
+            flattened = not opened or isinstance(open_res, Exception) or await _flatten(symbol, s, qty)
+            logger.error(f"[REVERSAL] {symbol} 청산 실패: {close_res} (신규 진입 되돌림: {flattened})")
+            return {"skipped": "close_failed", "error": str(close_res), "flattened": flattened}
+        if isinstance(open_res, Exception):
+            logger.warning(f"[REVERSAL] {symbol} 동시 진입 실패 → 청산 후 순차 진입: {open_res}")
+            opened = False
+        close_id = (close_res.get("data") or {}).get("orderId")
+
+    logger.info(f"[REVERSAL] {symbol} {POSITION_MODE} close {close_qty} + open {qty if opened else 0} {s['side']}")
+
+    # 포지션북: 기존 포지션 종료 → 신규 진입
+    pos = positions.close(symbol)
+    fill = asyncio.create_task(order_fill_price(symbol, close_id, price))
+    if not opened:
+        close_price = await fill
+        pnl = _record_close(symbol, pos, close_qty, close_price)
+        if qty == 0:
+            return {"skipped": "qty_too_low", "reversal": {"closed": close_qty, "close_price": close_price, "pnl": pnl}}
+        await snapshot.refresh()
+        return await (execute_buy if action == "BUY" else execute_sell)(symbol, snapshot)
+
+    positions.open(symbol, s["side"], price, qty)
+    ledger.record(symbol, "entry", s["side"], qty, price)
+
+    # 신규 포지션 보호 주문과 청산 체결가 조회를 동시에
+    orders, close_price = await asyncio.gather(
+        place_protective_orders(symbol, s["protect"], protective_legs(spec, s["sign"], price, qty)),
+        fill,
+    )
+    pnl = _record_close(symbol, pos, close_qty, close_price)
+
+    return {
+        s["key"]: {"filled": qty, "entry": price},
+        "orders": orders,
+        "protected": orders["sl"]["status"] == "ok",
+        "reversal": {"mode": POSITION_MODE, "closed": close_qty, "close_price": close_price, "pnl": pnl},
+    }
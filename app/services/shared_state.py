@@ -0,0 +1,509 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable
+
+try:
+    import fcntl
+except ImportError:     # Windows (로컬 개발)
+    fcntl = None
+    import msvcrt
+
+from app.config import (
+    SHARED_STATE_ENABLED, SHARED_STATE_PATH, SHARED_SYNC_INTERVAL, LEADER_RETRY_INTERVAL,
+    JOURNAL_ENABLED, SIGNAL_DEDUP_TTL,
+)
+from app.services.ledger import ledger
+from app.state import Position, positions, monitor_state, add_listener, notify
+
+logger = logging.getLogger("shared_state")
+logger.setLevel(logging.INFO)
+
+# 카운터 갱신 방식: 누적 카운터는 증분(+=) 으로 원자 반영, 나머지는 값 덮어쓰기
+_ADD_KEYS = ("trade_count", "first_tp_count", "second_tp_count", "sl_count", "daily_pnl")
+_SET_KEYS = ("last_reset", "sl_triggered", "fill_cursor")
+
+# 가격 필드: 리더 (모니터 실행 워커) 가 주기적으로 게시, 더 최신 값이 있으면 덮어쓰지 않음
+_PRICE_FIELDS = ("current_price", "mark_price", "pnl", "last_checked", "price_ts", "price_source")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    id      INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (id, version) VALUES (1, 0);
+CREATE TABLE IF NOT EXISTS positions (
+    symbol  TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS positions_version ON positions (version);
+CREATE TABLE IF NOT EXISTS counters (
+    name    TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    value
+);
+CREATE TABLE IF NOT EXISTS fills (
+    seq     INTEGER PRIMARY KEY AUTOINCREMENT,
+    version INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fills_version ON fills (version);
+CREATE TABLE IF NOT EXISTS signal_keys (
+    key     TEXT PRIMARY KEY,
+    expires REAL NOT NULL
+);
+"""
+
+
+def _identity(payload: dict) -> tuple:
+    # 같은 포지션 레코드인지 (진입 단위) 판별
+    return payload.get("side"), payload.get("entry_price"), payload.get("entry_time")
+
+
+class SharedStore:
+    """
+    워커 간 공유 SQLite(WAL) 저장소
+    - 모든 쓰기는 BEGIN IMMEDIATE 트랜잭션 + 전역 버전 +1 → 행마다 마지막 변경 버전 기록
+    - 포지션은 필드 단위 병합 (json_patch), 카운터는 증분 UPDATE → 워커가 동시에 써도 유실 없음
+    - 읽기는 단일 읽기 트랜잭션 (WAL 스냅샷) → 버전 기준 일관된 변경분
+    """
+
+    def __init__(self, path: str = SHARED_STATE_PATH):
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("UPDATE meta SET version = version + 1 WHERE id = 1 RETURNING version").fetchone()[0]
+            yield version
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def patch_positions(self, patches: dict[str, dict]) -> int:
+        with self._write() as version:
+            self._conn.executemany(
+                "INSERT INTO positions (symbol, version, payload) VALUES (?, ?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET version = excluded.version, "
+                "payload = json_patch(payload, excluded.payload)",
+                [(symbol, version, json.dumps(fields)) for symbol, fields in patches.items()],
+            )
+        return version
+
+    def update_counters(self, deltas: dict, values: dict) -> dict:
+        """
+        deltas 는 현재 값에 더하고 values 는 덮어씀 → 반영 후 전체 카운터 반환
+        """
+        with self._write() as version:
+            self._conn.executemany(
+                "INSERT INTO counters (name, version, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET version = excluded.version, value = value + excluded.value",
+                [(k, version, v) for k, v in deltas.items()],
+            )
+            self._conn.executemany(
+                "INSERT INTO counters (name, version, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET version = excluded.version, value = excluded.value",
+                [(k, version, v) for k, v in values.items()],
+            )
+            return dict(self._conn.execute("SELECT name, value FROM counters"))
+
+    def append_fill(self, fill: dict) -> int:
+        with self._write() as version:
+            self._conn.execute("INSERT INTO fills (version, payload) VALUES (?, ?)", (version, json.dumps(fill)))
+        return version
+
+    def claim(self, key: str, ttl: float) -> bool:
+        # 멱등 키 선점: 처음 기록한 워커만 True
+        now = time.time()
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM signal_keys WHERE expires < ?", (now,))
+            claimed = conn.execute(
+                "INSERT OR IGNORE INTO signal_keys (key, expires) VALUES (?, ?)", (key, now + ttl)
+            ).rowcount == 1
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return claimed
+
+    def seed(self, state: dict, fills: list[dict]) -> bool:
+        # 빈 저장소일 때만 저널 상태로 초기화 (여러 워커가 동시에 기동해도 1회)
+        with self._write() as version:
+            if version != 1:
+                return False
+            self._conn.executemany(
+                "INSERT INTO positions (symbol, version, payload) VALUES (?, ?, ?)",
+                [(s, version, json.dumps(p)) for s, p in state["positions"].items()],
+            )
+            self._conn.executemany(
+                "INSERT INTO counters (name, version, value) VALUES (?, ?, ?)",
+                [(k, version, v) for k, v in state["counters"].items()],
+            )
+            self._conn.executemany(
+                "INSERT INTO fills (version, payload) VALUES (?, ?)",
+                [(version, json.dumps(f)) for f in fills],
+            )
+        return True
+
+    def changes(self, since: int) -> tuple[int, list, list, list]:
+        """
+        since 이후 변경분 → (현재 버전, 포지션 [(symbol, payload)], 카운터 [(name, value)], 체결 [(version, payload)])
+        """
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            version = conn.execute("SELECT version FROM meta WHERE id = 1").fetchone()[0]
+            rows = conn.execute("SELECT symbol, payload FROM positions WHERE version > ?", (since,)).fetchall()
+            counters = conn.execute("SELECT name, value FROM counters WHERE version > ?", (since,)).fetchall()
+            fills = conn.execute(
+                "SELECT version, payload FROM fills WHERE version > ? ORDER BY seq", (since,)
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        return version, rows, counters, fills
+
+    def version(self) -> int:
+        return self._conn.execute("SELECT version FROM meta WHERE id = 1").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+class _FileLock:
+    """
+    프로세스 간 배타 락 (flock / Windows msvcrt). 프로세스가 죽으면 OS 가 자동 해제
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: int | None = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        # 소유자/횟수를 세지 않음 → 이미 잡은 락은 다시 잡지 않음 (리더 락: 미보유일 때만 호출)
+        if self._fd is not None:
+            return False
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def acquire(self):
+        """
+        잡힐 때까지 대기 (블로킹 → 이벤트 루프 밖 스레드에서 호출)
+        """
+        if self._fd is not None:
+            raise RuntimeError(f"{self.path} 이미 보유 중")
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)   # 10초 재시도 후 OSError
+                        break
+                    except OSError:
+                        continue
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+class SharedState:
+    """
+    여러 uvicorn 워커가 같은 거래 상태를 보도록 연결
+    - 로컬 포지션북 / monitor_state / 체결 원장은 그대로 두고 공유 저장소의 복제본으로 사용
+      (로컬 변경 → 리스너가 즉시 저장소 기록, 다른 워커 변경 → SHARED_SYNC_INTERVAL 마다 반영)
+    - 신호 실행은 심볼별 파일 락으로 워커 간 직렬화, 실행 직전 최신 상태 반영
+      (워커 안에서는 심볼별 asyncio.Lock 을 먼저 잡음 → 파일 락 보유자는 항상 1개)
+    - 저장소 읽기/쓰기는 전용 스레드 1개에서 순서대로 (이벤트 루프는 작업을 넣기만 함), 멱등 키 선점만 별도 연결로 즉시
+    - 리더 락을 잡은 워커 1개만 모니터 / 개인 채널 / 주문 점검 루프 실행 (리더 종료 시 다른 워커가 인계)
+    비활성 (단일 워커) 이면 모든 메서드가 아무 일도 하지 않음
+    """
+
+    def __init__(self, enabled: bool = SHARED_STATE_ENABLED, path: str = SHARED_STATE_PATH):
+        self.enabled = enabled
+        self.path = path
+        self.version = 0
+        self._store: SharedStore | None = None      # 저장소 스레드 전용 연결
+        self._keys: SharedStore | None = None       # 멱등 키 선점용 연결 (이벤트 루프)
+        self._executor: ThreadPoolExecutor | None = None
+        self._leader = _FileLock(path + ".leader")
+        self._locks: dict[str, _FileLock] = {}
+        self._guards: dict[str, asyncio.Lock] = {}  # 워커 내부 심볼 락 (파일 락보다 먼저)
+        self._written: dict[str, dict] = {}     # 심볼별 저장소에 반영된 마지막 포지션 값
+        self._counters: dict = {}               # 저장소에 반영된 마지막 카운터 값 (증분 계산 기준)
+        self._own_fills: set[int] = set()         # 저장소 스레드 전용
+        self._syncing = asyncio.Lock()
+        self._applying = False
+        self._on_leader: Callable[[], Awaitable[None]] | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader.held
+
+    async def start(self, on_leader: Callable[[], Awaitable[None]]):
+        """
+        저장소 열기 → (빈 저장소면 저널로 초기화) → 전체 상태 적재 → 리스너 등록 + 동기화/리더 선출 루프
+        """
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-state")
+        self._store = await self._run(SharedStore, self.path)
+        self._keys = SharedStore(self.path)
+        os.makedirs(self.path + ".locks", exist_ok=True)
+        if JOURNAL_ENABLED:
+            await self._run(self._seed_from_journal)
+        await self.sync()
+        add_listener(self._on_state_change)
+        self._on_leader = on_leader
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"[SHARED] 공유 상태 사용 (pid={os.getpid()}, version={self.version}, 포지션 {len(positions)}개)")
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._leader.release()
+        if self._executor is not None:
+            # 남은 기록 flush 후 저장소 스레드에서 연결 닫기
+            if self._store is not None:
+                self._executor.submit(self._store.close)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._store = None
+        if self._keys is not None:
+            self._keys.close()
+            self._keys = None
+
+    def _run(self, fn, *args) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _submit(self, fn, *args):
+        # 결과를 기다리지 않는 기록 (순서는 저장소 스레드에서 유지)
+        self._executor.submit(self._guarded, fn, *args)
+
+    @staticmethod
+    def _guarded(fn, *args):
+        try:
+            fn(*args)
+        except Exception:
+            logger.exception(f"[SHARED] 공유 저장소 기록 실패 ({fn.__name__})")
+
+    def _seed_from_journal(self):
+        from app.services.journal import journal
+        if self._store.version() > 0:
+            return
+        state = journal.load()
+        if self._store.seed(state, journal.load_fills()):
+            logger.info(f"[SHARED] 저널 상태로 공유 저장소 초기화 (포지션 {len(state['positions'])}개)")
+
+    # —— 로컬 변경 → 저장소 (리스너는 저장소 스레드에 작업만 넣음) ——
+    def _on_state_change(self, kind: str, obj):
+        if self._applying or self._executor is None:
+            return
+        if kind == "position":
+            self._write_position(obj)
+        elif kind == "counters":
+            self._write_counters()
+        elif kind == "fill":
+            self._submit(self._append_fill, dict(obj))
+
+    def _append_fill(self, fill: dict):
+        # 저장소 스레드: 기록한 버전을 sync 의 변경분 조회 (같은 스레드, 이후 순서) 전에 표시
+        self._own_fills.add(self._store.append_fill(fill))
+
+    def _write_position(self, pos: Position):
+        current = pos.to_dict()
+        known = self._written.get(pos.symbol)
+        if known is None or _identity(known) != _identity(current):
+            patch = current                     # 새 진입: 레코드 전체
+        else:
+            patch = {k: v for k, v in current.items() if known.get(k) != v}
+            if not patch:
+                return
+        self._submit(self._store.patch_positions, {pos.symbol: patch})
+        self._written[pos.symbol] = {**(known or {}), **patch}
+
+    def _write_counters(self):
+        deltas = {k: monitor_state[k] - self._counters.get(k, 0) for k in _ADD_KEYS
+                  if monitor_state.get(k, 0) != self._counters.get(k, 0)}
+        values = {k: monitor_state[k] for k in _SET_KEYS if monitor_state.get(k) != self._counters.get(k)}
+        if not deltas and not values:
+            return
+        # 증분 기준은 즉시 갱신, 다른 워커 증분이 합쳐진 값은 다음 sync 에서 반영
+        self._counters.update({k: monitor_state[k] for k in (*deltas, *values)})
+        self._submit(self._store.update_counters, deltas, values)
+
+    def _apply_counters(self, items) -> bool:
+        changed = False
+        for name, value in items:
+            if name in monitor_state and isinstance(monitor_state[name], bool):
+                value = bool(value)
+            self._counters[name] = value
+            if monitor_state.get(name) != value:
+                monitor_state[name] = value
+                changed = True
+        return changed
+
+    def publish_prices(self):
+        # 리더: 모니터가 갱신한 현재가/수익률을 다른 워커 (대시보드/리포트) 에 게시
+        patches = {}
+        for pos in positions.open_positions():
+            known = self._written.get(pos.symbol)
+            if known is None or known.get("price_ts", 0) < pos.price_ts:
+                patches[pos.symbol] = {k: getattr(pos, k) for k in _PRICE_FIELDS}
+        if patches:
+            self._submit(self._store.patch_positions, patches)
+            for symbol, patch in patches.items():
+                self._written.setdefault(symbol, {}).update(patch)
+
+    # —— 저장소 → 로컬 ——
+    async def sync(self):
+        """
+        마지막으로 본 버전 이후 변경분을 로컬 복제본에 반영 (한 번의 읽기 트랜잭션 → 일관된 버전)
+        조회는 저장소 스레드에서 앞서 넣은 기록 뒤에 실행
+        """
+        if self._store is None:
+            return
+        # 동기화 루프와 심볼 락이 겹치면 같은 변경분 (체결) 을 두 번 반영하지 않도록 한 번에 하나씩
+        async with self._syncing:
+            version, rows, counters, remote = await self._run(self._changes, self.version)
+            if self._store is None or version == self.version:
+                return
+            self._applying = True
+            try:
+                for symbol, payload in rows:
+                    self._apply_position(symbol, json.loads(payload))
+                if self._apply_counters(counters):
+                    notify("counters", monitor_state)
+                if remote:
+                    ledger.load(remote)
+            finally:
+                self._applying = False
+            self.version = version
+
+    def _changes(self, since: int) -> tuple[int, list, list, list[dict]]:
+        # 저장소 스레드: 변경분 조회 + 자기 체결 제외 (자기 체결 버전은 이 스레드에서만 다룸)
+        version, rows, counters, fills = self._store.changes(since)
+        remote = [json.loads(p) for v, p in fills if v not in self._own_fills]
+        self._own_fills = {v for v in self._own_fills if v > version}
+        return version, rows, counters, remote
+
+    def _apply_position(self, symbol: str, payload: dict):
+        self._written[symbol] = payload
+        pos = positions.get(symbol)
+        if pos is None or _identity(pos.to_dict()) != _identity(payload):
+            pos = Position.from_dict(payload)
+            positions.restore(pos)
+            notify("position", pos)
+            return
+
+        fresh_price = payload.get("price_ts", 0) >= pos.price_ts
+        changed = False
+        for name, value in payload.items():
+            if name in _PRICE_FIELDS and not fresh_price:
+                continue
+            if name in Position.__slots__ and getattr(pos, name) != value:
+                setattr(pos, name, value)
+                changed = changed or name not in _PRICE_FIELDS
+        if changed:
+            notify("position", pos)
+
+    # —— 워커 간 조정 ——
+    def claim(self, key: str) -> bool:
+        if self._keys is None:
+            return True
+        return self._keys.claim(key, SIGNAL_DEDUP_TTL)
+
+    @asynccontextmanager
+    async def symbol_lock(self, symbol: str):
+        """
+        심볼 단위 워커 간 배타 실행 + 진입 직전 최신 상태 반영
+        워커 안 (실행 큐 / 주문 점검) 은 asyncio.Lock 으로, 워커 간은 파일 락으로 (대기는 스레드에서)
+        """
+        if self._store is None:
+            yield
+            return
+        lock = self._locks.get(symbol)
+        if lock is None:
+            lock = self._locks[symbol] = _FileLock(os.path.join(self.path + ".locks", f"{symbol}.lock"))
+        guard = self._guards.setdefault(symbol, asyncio.Lock())
+        await guard.acquire()
+        acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except BaseException:
+            # 스레드의 파일 락 대기는 취소할 수 없음 → 잡히는 즉시 풀고 다음 대기자에게 넘김
+            acquiring.add_done_callback(lambda _: self._unlock(lock, guard))
+            raise
+        try:
+            await self.sync()
+            yield
+        finally:
+            self._unlock(lock, guard)
+
+    @staticmethod
+    def _unlock(lock: _FileLock, guard: asyncio.Lock):
+        try:
+            lock.release()
+        finally:
+            guard.release()
+
+    async def _loop(self):
+        next_election = 0.0
+        while True:
+            try:
+                if not self.is_leader and time.monotonic() >= next_election:
+                    next_election = time.monotonic() + LEADER_RETRY_INTERVAL
+                    if self._leader.try_acquire():
+                        logger.info(f"[SHARED] 리더 선출 (pid={os.getpid()}) → 모니터/계정 스트림 실행")
+                        await self.sync()
+                        await self._on_leader()
+                if self.is_leader:
+                    self.publish_prices()
+                await self.sync()
+            except Exception:
+                logger.exception("[SHARED] 상태 동기화 오류")
+            await asyncio.sleep(SHARED_SYNC_INTERVAL)
+
+
+shared_state = SharedState()
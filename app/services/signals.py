@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+
+from app.clients.bitget_client import get_bitget_client
+from app.config import (
+    STRATEGY_ENABLED, STRATEGY_SYMBOLS, STRATEGY_TIMEFRAMES, STRATEGY_EMA_FAST, STRATEGY_EMA_SLOW,
+    STRATEGY_RSI_PERIOD, STRATEGY_RSI_HIGH, STRATEGY_RSI_LOW, STRATEGY_ATR_PERIOD, STRATEGY_MIN_ATR_PCT,
+    STRATEGY_BB_PERIOD, STRATEGY_BB_K, STRATEGY_WARMUP,
+)
+from app.services.executor import submit
+from app.services.indicators import (
+    ATR, EMA, RSI, Bollinger, Candle, CandleAggregator, bitget_granularity, timeframe_seconds,
+)
+
+logger = logging.getLogger("signals")
+logger.setLevel(logging.INFO)
+
+
+class _Stream:
+    """
+    심볼 × 봉 주기 1개: 봉 집계 + 지표 상태 (모두 고정 크기, 봉 마감마다 O(1) 갱신)
+    """
+    __slots__ = ("symbol", "tf", "candles", "fast", "slow", "rsi", "atr", "bb", "trend", "last", "last_signal")
+
+    def __init__(self, symbol: str, tf: str):
+        self.symbol = symbol
+        self.tf = tf
+        self.candles = CandleAggregator(timeframe_seconds(tf))
+        self.fast = EMA(STRATEGY_EMA_FAST)
+        self.slow = EMA(STRATEGY_EMA_SLOW)
+        self.rsi = RSI(STRATEGY_RSI_PERIOD)
+        self.atr = ATR(STRATEGY_ATR_PERIOD)
+        self.bb = Bollinger(STRATEGY_BB_PERIOD, STRATEGY_BB_K)
+        self.trend = 0              # 단기 EMA 가 장기 EMA 위 1 / 아래 -1 (준비 전 0)
+        self.last: Candle | None = None
+        self.last_signal = ""
+
+    @property
+    def ready(self) -> bool:
+        return self.slow.ready and self.rsi.ready and self.atr.ready and self.bb.ready
+
+    def close(self, c: Candle) -> str | None:
+        """
+        마감된 봉 반영 → EMA 교차가 생기면 필터 통과 시 "BUY" / "SELL"
+        """
+        fast = self.fast.update(c.close)
+        slow = self.slow.update(c.close)
+        rsi = self.rsi.update(c.close)
+        atr = self.atr.update(c.high, c.low, c.close)
+        _, upper, lower = self.bb.update(c.close)
+        self.last = c
+        if not self.ready:
+            return None
+
+        trend = 1 if fast > slow else -1 if fast < slow else self.trend
+        crossed, self.trend = self.trend != 0 and trend != self.trend, trend
+        if not crossed:
+            return None
+
+        action = "BUY" if trend > 0 else "SELL"
+        if STRATEGY_MIN_ATR_PCT and atr / c.close * 100 < STRATEGY_MIN_ATR_PCT:
+            reason = f"ATR {atr / c.close * 100:.3f}% < {STRATEGY_MIN_ATR_PCT}%"
+        elif action == "BUY" and (rsi >= STRATEGY_RSI_HIGH or c.close > upper):
+            reason = f"과매수 (RSI {rsi:.1f}, 종가 {c.close} / 상단 {upper:.4f})"
+        elif action == "SELL" and (rsi <= STRATEGY_RSI_LOW or c.close < lower):
+            reason = f"과매도 (RSI {rsi:.1f}, 종가 {c.close} / 하단 {lower:.4f})"
+        else:
+            return action
+        logger.info(f"[SIGNAL] {self.symbol} {self.tf} {action} 교차 보류: {reason}")
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "trend": self.trend,
+            "ema_fast": self.fast.value,
+            "ema_slow": self.slow.value,
+            "rsi": self.rsi.value,
+            "atr": self.atr.value,
+            "bb": [self.bb.lower, self.bb.mid, self.bb.upper],
+            "last_candle": self.last.to_dict() if self.last else None,
+            "last_signal": self.last_signal,
+        }
+
+
+class SignalEngine:
+    """
+    서버 자체 지표 신호 (TradingView 알림 대체/보완)
+    - 틱마다: 심볼의 봉 집계만 갱신 (O(심볼당 봉 주기 수), 수 µs)
+    - 봉 마감 시: 스트리밍 EMA / RSI / ATR / 볼린저 갱신 후 교차 평가
+    - 신호는 웹훅과 같은 실행 큐 (executor.submit → switch_position), 멱등 키는 심볼·주기·봉 시작 시각
+    """
+
+    def __init__(self):
+        self._streams: dict[str, list[_Stream]] = {}
+
+    @property
+    def symbols(self) -> set[str]:
+        return set(self._streams)
+
+    def configure(self, symbols: list[str], timeframes: list[str]):
+        self._streams = {s: [_Stream(s, tf) for tf in timeframes] for s in symbols}
+
+    def on_tick(self, symbol: str, price: float, ts: float | None = None):
+        streams = self._streams.get(symbol)
+        if streams is None:
+            return
+        ts = time.time() if ts is None else ts
+        for stream in streams:
+            closed = stream.candles.on_tick(price, ts)
+            if closed is None:
+                continue
+            action = stream.close(closed)
+            if action is not None:
+                self._emit(stream, action, closed)
+
+    def _emit(self, stream: _Stream, action: str, c: Candle):
+        stream.last_signal = f"{action} @ {c.close} ({c.start})"
+        logger.info(f"[SIGNAL] {stream.symbol} {stream.tf} EMA 교차 → {action} (종가 {c.close})")
+        submit(stream.symbol, action, key=f"strategy:{stream.symbol}:{stream.tf}:{c.start}")
+
+    async def _warm_up(self, stream: _Stream):
+        # 과거 마감 봉으로 지표 채우기 (신호 없음), 진행 중인 봉은 집계기로
+        seconds = stream.candles.seconds
+        now = time.time()
+        resp = await get_bitget_client().mix_market_api.get_candles(
+            symbol=stream.symbol, granularity=bitget_granularity(stream.tf),
+            startTime=int((now - seconds * (STRATEGY_WARMUP + 1)) * 1000), endTime=int(now * 1000),
+            limit=STRATEGY_WARMUP + 1)
+        rows = resp.get("data") or []
+        for row in rows:
+            c = Candle(int(row[0]) // 1000, float(row[1]))
+            c.high, c.low, c.close = float(row[2]), float(row[3]), float(row[4])
+            if c.start + seconds > now:
+                stream.candles.current = c
+                break
+            stream.close(c)
+        logger.info(f"[SIGNAL] {stream.symbol} {stream.tf} 과거 봉 {len(rows)}개 적재 (준비: {stream.ready})")
+
+    async def start(self):
+        if not STRATEGY_ENABLED:
+            return
+        symbols = [s.strip().upper() for s in STRATEGY_SYMBOLS.split(",") if s.strip()]
+        timeframes = [tf.strip() for tf in STRATEGY_TIMEFRAMES.split(",") if tf.strip()]
+        self.configure(symbols, timeframes)
+        results = await asyncio.gather(*(
+            self._warm_up(stream) for streams in self._streams.values() for stream in streams
+        ), return_exceptions=True)
+        for res in results:
+            if isinstance(res, Exception):
+                logger.warning(f"[SIGNAL] 과거 봉 적재 실패 → 실시간 틱으로만 채움: {res}")
+        logger.info(f"[SIGNAL] 지표 신호 시작: {symbols} × {timeframes}")
+
+    def snapshot(self) -> dict:
+        return {s: {st.tf: st.to_dict() for st in streams} for s, streams in self._streams.items()}
+
+
+signal_engine = SignalEngine()
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+
+from app.config import FEED_INTERVAL, FEED_QUEUE_SIZE
+from app.state import positions, monitor_state
+
+logger = logging.getLogger("state_feed")
+logger.setLevel(logging.INFO)
+
+# 화면에 필요 없는 고빈도 필드는 제외 (불필요한 델타 방지)
+_SKIP_FIELDS = {"price_ts"}
+_COUNTER_KEYS = ("trade_count", "first_tp_count", "second_tp_count", "sl_count", "daily_pnl")
+
+
+def _capture() -> dict:
+    return {
+        "positions": {
+            p.symbol: {k: v for k, v in p.to_dict().items() if k not in _SKIP_FIELDS}
+            for p in positions
+        },
+        "counters": {k: monitor_state.get(k) for k in _COUNTER_KEYS},
+    }
+
+
+def _diff(old: dict, new: dict) -> dict:
+    """
+    변경된 필드만 남긴 중첩 dict (삭제된 키는 None)
+    """
+    delta = {}
+    for key, value in new.items():
+        prev = old.get(key)
+        if isinstance(value, dict) and isinstance(prev, dict):
+            sub = _diff(prev, value)
+            if sub:
+                delta[key] = sub
+        elif value != prev or key not in old:
+            delta[key] = value
+    for key in old.keys() - new.keys():
+        delta[key] = None
+    return delta
+
+
+class StateFeed:
+    """
+    버전 붙은 상태 스냅샷 + 변경분 브로드캐스트
+    - 상태 캡처/비교는 구독자 수와 무관하게 FEED_INTERVAL 마다 1회
+    - 구독자에게는 미리 직렬화한 델타 문자열을 그대로 전달
+    """
+    def __init__(self):
+        self.version = 0
+        self.snapshot: dict = _capture()
+        self.snapshot_json = json.dumps(self.snapshot, ensure_ascii=False)
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+
+    def refresh(self) -> bool:
+        new = _capture()
+        delta = _diff(self.snapshot, new)
+        if not delta:
+            return False
+
+        self.version += 1
+        self.snapshot = new
+        self.snapshot_json = json.dumps(new, ensure_ascii=False)
+        message = (self.version, json.dumps(delta, ensure_ascii=False))
+
+        for q in list(self._subscribers):
+            try:
+                q.put_nowait(message)
+            except asyncio.QueueFull:
+                # 따라오지 못한 구독자는 밀린 델타를 버리고 전체 스냅샷으로 재동기화 (None)
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(None)
+        return True
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=FEED_QUEUE_SIZE)
+        self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue):
+        self._subscribers.discard(q)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    async def _loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("[FEED] 상태 캡처 실패")
+            await asyncio.sleep(FEED_INTERVAL)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+
+state_feed = StateFeed()
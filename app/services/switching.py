@@ -1,13 +1,21 @@
+import asyncio
 import logging
 import time
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+from app import deadline
 from app.clients.bitget_client import get_bitget_client
-from app.config import DRY_RUN, POLL_INTERVAL, MAX_WAIT
+from app.metrics import timed
+from app.config import POLL_INTERVAL, MAX_WAIT, REVERSAL_MODE
+from app.services.account_stream import account_view
 from app.services.buy import execute_buy
+from app.services.fills import order_fill_price
+from app.services.ledger import ledger
+from app.services.pretrade import fetch_pretrade
+from app.services.reversal import reverse_position
 from app.services.sell import execute_sell
-from app.state import monitor_state
+from app.state import monitor_state, positions, counters_changed
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -15,12 +23,27 @@ logger.setLevel(logging.INFO)
 product_type = "umcbl"
 margin_coin = "USDT"
 
-def _wait_for(symbol: str, target_amt: float) -> bool:
+@timed("wait_flat")
+async def _wait_for(symbol: str, target_amt: float) -> bool:
+    # 대기 한도: MAX_WAIT 와 신호 남은 예산 중 작은 값 (예산이 먼저 끝나면 DeadlineExceeded)
+    left = deadline.check("wait_flat")
+    wait = MAX_WAIT if left is None else min(MAX_WAIT, left)
+
+    # ✅ 개인 채널 연결 중이면 포지션 푸시 이벤트 대기 (폴링 없음)
+    if account_view.ready:
+        if await account_view.wait_position(symbol, target_amt, wait):
+            return True
+        if wait < MAX_WAIT:
+            raise deadline.exceeded("wait_flat")
+        logger.warning(f"[SWITCH TIMEOUT] target {target_amt}, current {account_view.net_position(symbol)}")
+        return False
+
     client = get_bitget_client()
     start = time.time()
+    current_amt = None
 
-    while time.time() - start < MAX_WAIT:
-        resp = client.mix_account_api.get_account(symbol=symbol, productType=product_type)
+    while time.time() - start < wait:
+        resp = await client.mix_account_api.get_account(symbol=symbol, marginCoin=margin_coin)
         current_amt = float(resp["data"]["total"])
 
         if target_amt > 0 and current_amt > 0:
@@ -30,44 +53,142 @@ def _wait_for(symbol: str, target_amt: float) -> bool:
         if target_amt == 0 and current_amt == 0:
             return True
 
-        time.sleep(POLL_INTERVAL)
+        await asyncio.sleep(max(min(POLL_INTERVAL, wait - (time.time() - start)), 0.0))
 
+    if wait < MAX_WAIT:
+        raise deadline.exceeded("wait_flat")
     logger.warning(f"[SWITCH TIMEOUT] target {target_amt}, current {current_amt}")
     return False
 
 
-def _cancel_open_reduceonly_orders(symbol: str):
-    client = get_bitget_client()
-    open_orders = client.mix_order_api.get_all_open_orders(productType=product_type, symbol=symbol)
-    for o in open_orders.get("data", []):
-        if o.get("reduceOnly"):
-            client.mix_order_api.cancel_order(productType=product_type, symbol=symbol, orderId=o["orderId"])
-            logger.info(f"[Cleanup] Canceled reduceOnly order: {o['orderId']}")
+async def _pretrade_result(task: asyncio.Task):
+    # 미리 조회한 스냅샷, 실패했으면 None → execute_buy/sell 이 직접 다시 조회
+    try:
+        return await task
+    except deadline.DeadlineExceeded:
+        raise
+    except Exception:
+        logger.exception("[PRETRADE] 진입 전 정보 조회 실패")
+        return None
+
+
+async def _close_price(symbol: str, order_id: str | None, snapshot) -> float:
+    # 청산 체결가 조회와 재진입용 스냅샷 갱신을 동시에 (체결가를 모르면 갱신된 현재가)
+    price, _ = await asyncio.gather(order_fill_price(symbol, order_id, 0.0), snapshot.refresh())
+    return price or snapshot.price
+
+
+async def _net_position(symbol: str) -> float:
+    # 순포지션 1회 확인 (개인 채널 로컬 상태 우선)
+    if account_view.ready:
+        return account_view.net_position(symbol)
+    resp = await get_bitget_client().mix_account_api.get_account(symbol=symbol, marginCoin=margin_coin)
+    return float(resp["data"]["total"])
+
+
+def _record_close(symbol: str, pos, qty: float, close_price: float, label: str):
+    pnl = pos.pnl_at(close_price) if pos else 0.0
+    if pos:
+        ledger.record(symbol, "sl" if pnl < 0 else "close", pos.side, qty, close_price,
+                      pnl=pnl, pnl_usdt=pos.pnl_usdt_at(close_price, qty))
+    if pnl < 0:
+        monitor_state["sl_count"] += 1
+        monitor_state["daily_pnl"] += pnl
+        counters_changed()
+        now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+        logger.info(f"Stop-loss on switch {label}: {pnl:.2f}% at {now}")
+
+
+async def _flat_now(symbol: str) -> bool:
+    # 청산 주문은 이미 나갔으므로 대기 실패/예산 소진이어도 순포지션 1회 재확인 (예산 무관)
+    with deadline.unbounded():
+        try:
+            flat = await _net_position(symbol) == 0
+        except Exception:
+            logger.exception(f"[SWITCH] {symbol} 청산 재확인 실패")
+            return False
+    if flat:
+        logger.warning(f"[SWITCH] {symbol} 대기 한도 후 재확인: 청산 완료 → 장부 청산")
+    return flat
+
+
+async def _reconcile_close(symbol: str, qty: float, close_id: str | None, label: str):
+    """
+    예산 소진으로 진입은 하지 않지만, 청산됐으면 장부 청산 (이전 TP/SL 정리) + 손익 기록
+    """
+    if not await _flat_now(symbol):
+        return
+    pos = positions.close(symbol)
+    fallback = (pos.current_price or pos.entry_price) if pos else 0.0
+    with deadline.unbounded():
+        close_price = await order_fill_price(symbol, close_id, fallback)
+    _record_close(symbol, pos, qty, close_price, label)
+
+
+async def _settle_close(symbol: str, qty: float, close_id: str | None, pretrade: asyncio.Task, label: str) -> bool:
+    """
+    청산 주문 제출 후: 평탄화 대기 (한도 초과면 1회 재확인) → 장부 청산 + 손익 기록, 청산되지 않았으면 False
+    """
+    try:
+        flat = await _wait_for(symbol, 0.0) or await _flat_now(symbol)
+    except deadline.DeadlineExceeded:
+        pretrade.cancel()
+        await _reconcile_close(symbol, qty, close_id, label)
+        raise
+    if not flat:
+        pretrade.cancel()
+        return False
+
+    # 청산 → 주문 장부가 이전 포지션의 TP/SL 을 백그라운드로 일괄 취소
+    pos = positions.close(symbol)
+    try:
+        # 손익은 청산 주문 체결가로, 스냅샷은 청산으로 풀린 증거금 반영해 재진입에 사용
+        snapshot = await pretrade
+        _record_close(symbol, pos, qty, await _close_price(symbol, close_id, snapshot), label)
+    except Exception:
+        logger.exception(f"[PNL] {label} 손익 계산 실패")
+    return True
+
+
+def _count_transition():
+    # 실제로 거래소에 주문이 나가는 전환 (신규 진입 / 반대 방향 스위칭) 만 집계
+    monitor_state["trade_count"] += 1
+    monitor_state["sl_triggered"] = False
+    counters_changed()
 
 
-def switch_position(symbol: str, action: str) -> dict:
+@timed("switch")
+async def switch_position(symbol: str, action: str) -> dict:
     client = get_bitget_client()
 
-    if DRY_RUN:
-        logger.info(f"[DRY_RUN] switch_position {action} {symbol}")
-        return {"skipped": "dry_run"}
-
-    monitor_state["trade_count"] += 1
-    monitor_state["sl_triggered"] = False
+    # 진입 전 정보 (레버리지/잔고/현재가/스펙) 는 포지션 확인과 동시에 미리 조회
+    pretrade = asyncio.create_task(fetch_pretrade(symbol))
 
-    # 현재 보유 포지션 확인
-    resp = client.mix_account_api.get_account(symbol=symbol, productType=product_type)
-    current_amt = float(resp["data"]["total"])
+    # 현재 보유 포지션 확인 (개인 채널 로컬 상태 우선)
+    try:
+        current_amt = await _net_position(symbol)
+    except Exception:
+        pretrade.cancel()
+        raise
 
     # LONG 진입
     if action.upper() == "BUY":
         if current_amt > 0:
+            pretrade.cancel()
             return {"skipped": "already_long"}
+        _count_transition()
 
         if current_amt < 0:
             qty = abs(current_amt)
+
+            # ✅ 1회 전환 모드: 청산+진입을 최소 왕복으로 (스냅샷 조회 실패 시 순차 경로)
+            if REVERSAL_MODE == "single":
+                snapshot = await _pretrade_result(pretrade)
+                if snapshot is not None:
+                    return await reverse_position(symbol, "BUY", qty, snapshot)
+
             logger.info(f"[Switch] Closing SHORT {qty} @ market for {symbol}")
-            client.mix_order_api.place_order(
+            res = await client.mix_order_api.place_order(
                 symbol=symbol,
                 productType=product_type,
                 marginCoin=margin_coin,
@@ -76,36 +197,31 @@ def switch_position(symbol: str, action: str) -> dict:
                 orderType="market",
                 reduceOnly=True
             )
+            close_id = (res.get("data") or {}).get("orderId")
 
-            if not _wait_for(symbol, 0.0):
+            if not await _settle_close(symbol, qty, close_id, pretrade, "SHORT→LONG"):
                 return {"skipped": "close_failed"}
 
-            if monitor_state.get("sl_triggered"):
-                _cancel_open_reduceonly_orders(symbol)
-
-            try:
-                entry = monitor_state.get("entry_price", 0.0)
-                cur_price = float(client.mix_market_api.get_ticker(symbol=symbol, productType=product_type)["data"]["last"])
-                pnl = (cur_price / entry - 1) * 100
-                if pnl < 0:
-                    monitor_state["sl_count"] += 1
-                    monitor_state["daily_pnl"] += pnl
-                    now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
-                    logger.info(f"Stop-loss on switch SHORT→LONG: {pnl:.2f}% at {now}")
-            except Exception:
-                logger.exception("[PNL] SHORT→LONG 손익 계산 실패")
-
-        return execute_buy(symbol)
+        return await execute_buy(symbol, await _pretrade_result(pretrade))
 
     # SHORT 진입
     if action.upper() == "SELL":
         if current_amt < 0:
+            pretrade.cancel()
             return {"skipped": "already_short"}
+        _count_transition()
 
         if current_amt > 0:
             qty = abs(current_amt)
+
+            # ✅ 1회 전환 모드: 청산+진입을 최소 왕복으로 (스냅샷 조회 실패 시 순차 경로)
+            if REVERSAL_MODE == "single":
+                snapshot = await _pretrade_result(pretrade)
+                if snapshot is not None:
+                    return await reverse_position(symbol, "SELL", qty, snapshot)
+
             logger.info(f"[Switch] Closing LONG {qty} @ market for {symbol}")
-            client.mix_order_api.place_order(
+            res = await client.mix_order_api.place_order(
                 symbol=symbol,
                 productType=product_type,
                 marginCoin=margin_coin,
@@ -114,26 +230,13 @@ def switch_position(symbol: str, action: str) -> dict:
                 orderType="market",
                 reduceOnly=True
             )
+            close_id = (res.get("data") or {}).get("orderId")
 
-            if not _wait_for(symbol, 0.0):
+            if not await _settle_close(symbol, qty, close_id, pretrade, "LONG→SHORT"):
                 return {"skipped": "close_failed"}
 
-            if monitor_state.get("sl_triggered"):
-                _cancel_open_reduceonly_orders(symbol)
-
-            try:
-                entry = monitor_state.get("entry_price", 0.0)
-                cur_price = float(client.mix_market_api.get_ticker(symbol=symbol, productType=product_type)["data"]["last"])
-                pnl = (entry / cur_price - 1) * 100
-                if pnl < 0:
-                    monitor_state["sl_count"] += 1
-                    monitor_state["daily_pnl"] += pnl
-                    now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
-                    logger.info(f"Stop-loss on switch LONG→SHORT: {pnl:.2f}% at {now}")
-            except Exception:
-                logger.exception("[PNL] LONG→SHORT 손익 계산 실패")
-
-        return execute_sell(symbol)
+        return await execute_sell(symbol, await _pretrade_result(pretrade))
 
+    pretrade.cancel()
     logger.error(f"[SWITCH ERROR] Unknown action: {action}")
     return {"skipped": "unknown_action"}
\ No newline at end of file
@@ -0,0 +1,438 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from app import deadline, metrics
+from app.clients.bitget_client import get_bitget_client
+from app.config import TRIGGER_MODE, TRAIL_PCT, BREAKEVEN_AFTER_TP1, POSITION_MODE, FILL_SYNC_INTERVAL
+from app.services.ledger import ledger
+from app.state import Position, positions, monitor_state, add_listener, counters_changed
+
+logger = logging.getLogger("triggers")
+logger.setLevel(logging.INFO)
+
+margin_coin = "USDT"
+CONFIRM_ATTEMPTS = 3        # exchange 모드 로컬 교차 → 플랜 발동 이력 확인 횟수
+CONFIRM_DELAY = 1.0         # 확인 간격 (초, 발동 직후 이력 반영 지연)
+
+# 익절 단계 → (Position 필드 접두사, 카운터 키)
+_STAGES = {
+    "tp1": ("first_tp", "first_tp_count"),
+    "tp2": ("second_tp", "second_tp_count"),
+}
+
+
+class _Trigger:
+    __slots__ = ("kind", "leg", "level", "qty")
+
+    def __init__(self, kind: str, level: float, leg: str = "", qty: float = 0.0):
+        self.kind = kind        # "tp" | "stop" | "peak" (트레일링 기준 고점/저점 갱신)
+        self.leg = leg
+        self.level = level
+        self.qty = qty
+
+
+class _LevelIndex:
+    """
+    가격 오름차순 트리거 레벨 (bisect) → 틱마다 넘어선 레벨만 O(log n + k) 로 꺼냄
+    """
+    __slots__ = ("_levels", "_triggers")
+
+    def __init__(self):
+        self._levels: list[float] = []
+        self._triggers: list[_Trigger] = []
+
+    def __len__(self):
+        return len(self._levels)
+
+    def add(self, t: _Trigger):
+        i = bisect_right(self._levels, t.level)
+        self._levels.insert(i, t.level)
+        self._triggers.insert(i, t)
+
+    def remove(self, t: _Trigger):
+        i = bisect_left(self._levels, t.level)
+        while i < len(self._levels) and self._levels[i] == t.level:
+            if self._triggers[i] is t:
+                del self._levels[i], self._triggers[i]
+                return
+            i += 1
+
+    def pop_upto(self, price: float) -> list[_Trigger]:
+        # level <= price (가격이 올라서 넘은 레벨)
+        i = bisect_right(self._levels, price)
+        fired = self._triggers[:i]
+        del self._levels[:i], self._triggers[:i]
+        return fired
+
+    def pop_from(self, price: float) -> list[_Trigger]:
+        # level >= price (가격이 내려서 넘은 레벨)
+        i = bisect_left(self._levels, price)
+        fired = self._triggers[i:]
+        del self._levels[i:], self._triggers[i:]
+        return fired
+
+
+class _Book:
+    """
+    심볼 1개의 활성 트리거: 롱은 익절/고점이 상승 인덱스, 손절이 하락 인덱스 (숏은 반대)
+    """
+    __slots__ = ("pos", "sign", "rising", "falling", "stop", "peak", "signature")
+
+    def __init__(self, pos: Position):
+        self.pos = pos
+        self.sign = -1 if pos.side == "short" else 1
+        self.rising = _LevelIndex()
+        self.falling = _LevelIndex()
+        self.stop: _Trigger | None = None
+        self.peak: _Trigger | None = None
+        self.signature = None
+
+    def _index(self, favorable: bool) -> _LevelIndex:
+        # favorable: 포지션에 유리한 방향 (롱 상승 / 숏 하락) 으로 넘는 레벨
+        return self.rising if favorable == (self.sign > 0) else self.falling
+
+    def add(self, t: _Trigger):
+        self._index(t.kind != "stop").add(t)
+
+    def remove(self, t: _Trigger):
+        self._index(t.kind != "stop").remove(t)
+
+    def __len__(self):
+        return len(self.rising) + len(self.falling)
+
+
+def _signature(pos: Position) -> tuple:
+    return id(pos), pos.stop_price, pos.peak_price, tuple(sorted(pos.targets))
+
+
+def _drop_target(pos: Position, leg: str):
+    # 새 dict 로 교체 (스냅샷 비교 측이 이전 dict 를 참조하므로 제자리 변경 금지)
+    pos.targets = {k: v for k, v in pos.targets.items() if k != leg}
+
+
+def _now() -> str:
+    return datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class TriggerEngine:
+    """
+    틱 단위 클라이언트 측 TP/SL 평가
+    - 레벨은 포지션 레코드 (targets / stop_price / peak_price) 에 기록 → 저널·공유 상태로 복구/전파
+    - 심볼별 정렬 인덱스: 틱마다 넘어선 레벨만 확인 (활성 트리거 수와 무관)
+    - TRIGGER_MODE=exchange: 체결은 거래소 플랜 주문, 기록은 체결 대사
+      (FILL_SYNC_INTERVAL=0 이면 로컬 교차 후 플랜 발동 이력으로 확인된 단계만 기록, 로컬 교차만으로는 기록 안 함)
+    - TRIGGER_MODE=client: 엔진이 시장가 감소 주문으로 단계별 익절 / 손절 실행
+      + 심볼별 순차 실행, 익절 수량은 실행 전에 예약 → 같은 틱의 익절·손절이 겹쳐도 초과 청산 없음
+      + 시장가 실패 시 레벨 재무장 (다음 교차에 재시도), 예약은 기록/실패 확정 후 해제
+      + 1차 익절 후 손절을 진입가로 (BREAKEVEN_AFTER_TP1), 고점 대비 TRAIL_PCT 트레일링 스톱
+    """
+
+    def __init__(self):
+        self._books: dict[str, _Book] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._firing: str | None = None     # 평가 중인 심볼 (자기 변경으로 인한 재구성 방지)
+        self._locks: dict[str, asyncio.Lock] = {}   # 심볼별 시장가 실행 순서 보장
+        self._reserved: dict[str, float] = {}       # 심볼별 실행 대기 중인 익절 수량
+        self._confirming: set[tuple[str, str]] = set()  # 발동 확인 중인 (심볼, 단계)
+
+    @property
+    def active(self) -> int:
+        return sum(len(b) for b in self._books.values())
+
+    def set_levels(self, symbol: str, legs: dict[str, tuple[float, float]]):
+        """
+        진입 직후 보호 레벨 기록: legs = {"tp1": (qty, price), "tp2": ..., "sl": (qty, price)}
+        """
+        pos = positions.get(symbol)
+        if pos is None or not pos.is_open:
+            return
+        pos.targets = {leg: [price, qty] for leg, (qty, price) in legs.items() if leg in _STAGES}
+        pos.stop_price = legs["sl"][1] if "sl" in legs else 0.0
+        pos.peak_price = pos.entry_price
+        positions.touch(symbol)
+
+    def arm(self, pos: Position):
+        book = _Book(pos)
+        for leg, (level, qty) in pos.targets.items():
+            book.add(_Trigger("tp", level, leg, qty))
+        if pos.stop_price > 0:
+            book.stop = _Trigger("stop", pos.stop_price)
+            book.add(book.stop)
+        if TRIGGER_MODE == "client" and TRAIL_PCT > 0:
+            self._track_peak(book, pos.peak_price or pos.entry_price)
+        book.signature = _signature(pos)
+        self._books[pos.symbol] = book
+
+    def disarm(self, symbol: str):
+        self._books.pop(symbol, None)
+
+    def _on_state_change(self, kind: str, obj):
+        if kind != "position" or obj.symbol == self._firing:
+            return
+        if not obj.is_open:
+            self.disarm(obj.symbol)
+            return
+        book = self._books.get(obj.symbol)
+        if book is None or book.signature != _signature(obj):
+            if obj.targets or obj.stop_price > 0:
+                self.arm(obj)
+
+    # —— 틱 평가 ——
+    def on_price(self, symbol: str, price: float):
+        book = self._books.get(symbol)
+        if book is None:
+            return
+        fired = book.rising.pop_upto(price) + book.falling.pop_from(price)
+        if not fired:
+            return
+
+        pos = book.pos
+        if positions.get(symbol) is not pos or not pos.is_open:
+            self.disarm(symbol)
+            return
+
+        # 고점 갱신 → 익절 → 손절 순
+        fired.sort(key=lambda t: ("peak", "tp", "stop").index(t.kind))
+        self._firing = symbol
+        try:
+            for t in fired:
+                metrics.triggers_fired.inc(kind=t.kind)
+                if t.kind == "peak":
+                    self._on_peak(book, price)
+                elif t.kind == "tp":
+                    self._on_take_profit(book, t, price)
+                else:
+                    self._on_stop(book, price)
+                    return
+        finally:
+            self._firing = None
+        book.signature = _signature(pos)
+
+    def _track_peak(self, book: _Book, peak: float):
+        # 다음 갱신 레벨: 트레일 거리의 1/10 만큼 더 유리해지면
+        book.peak = _Trigger("peak", peak * (1 + book.sign * TRAIL_PCT / 10))
+        book.add(book.peak)
+
+    def _move_stop(self, book: _Book, level: float, reason: str):
+        pos = book.pos
+        # 손절은 유리한 방향으로만 이동
+        if book.stop is not None and (level - book.stop.level) * book.sign <= 0:
+            return
+        if book.stop is not None:
+            book.remove(book.stop)
+        book.stop = _Trigger("stop", level)
+        book.add(book.stop)
+        pos.stop_price = level
+        logger.info(f"[TRIGGER] {pos.symbol} 손절 이동 ({reason}) → {level}")
+
+    def _on_peak(self, book: _Book, price: float):
+        pos = book.pos
+        pos.peak_price = price
+        self._move_stop(book, price * (1 - book.sign * TRAIL_PCT), "trailing")
+        self._track_peak(book, price)
+        positions.touch(pos.symbol)
+
+    def _on_take_profit(self, book: _Book, t: _Trigger, price: float):
+        pos = book.pos
+        if TRIGGER_MODE == "client":
+            _drop_target(pos, t.leg)
+            if BREAKEVEN_AFTER_TP1 and t.leg == "tp1":
+                self._move_stop(book, pos.entry_price, "break-even")
+            # 같은 틱에 이어지는 손절·다른 익절이 이 수량을 다시 쓰지 않도록 실행 전에 예약
+            qty = min(t.qty, pos.qty - self._reserved.get(pos.symbol, 0.0))
+            if qty > 0:
+                self._reserved[pos.symbol] = self._reserved.get(pos.symbol, 0.0) + qty
+                self._spawn(self._take_profit(pos, t, qty, price))
+        elif not FILL_SYNC_INTERVAL and (pos.symbol, t.leg) not in self._confirming:
+            self._spawn(self._confirm(pos, t.leg, price))
+
+    def _on_stop(self, book: _Book, price: float):
+        pos = book.pos
+        self.disarm(pos.symbol)
+        if TRIGGER_MODE == "client":
+            # 수량은 실행 시점 잔량 (앞선 익절 실행·기록 이후)
+            self._spawn(self._execute(pos, "sl", None, price))
+        elif not FILL_SYNC_INTERVAL and (pos.symbol, "sl") not in self._confirming:
+            self._spawn(self._confirm(pos, "sl", price))
+
+    # —— 확인 (exchange 모드, 체결 대사 없음) ——
+    async def _confirm(self, pos: Position, leg: str, price: float):
+        """
+        로컬 교차는 신호일 뿐 → 해당 단계 플랜 주문의 발동 이력이 확인될 때만 체결가로 기록
+        (손절을 로컬에서 먼저 기록하면 포지션 종료 → 주문 장부가 거래소 손절까지 취소)
+        확인되지 않으면 레벨을 다시 걸어 다음 교차에 재확인
+        """
+        self._confirming.add((pos.symbol, leg))
+        try:
+            await self._confirm_plan(pos, leg, price)
+        finally:
+            self._confirming.discard((pos.symbol, leg))
+
+    async def _confirm_plan(self, pos: Position, leg: str, price: float):
+        # fills → triggers 순환 import 방지
+        from app.services.fills import order_fill_price
+
+        plans = {oid: placed for oid, (name, placed) in pos.orders.items() if name == leg}
+        if not plans:
+            logger.warning(f"[TRIGGER] {pos.symbol} {leg} 로컬 교차 @ {price} 이나 확인할 플랜 주문 없음 → 기록 보류")
+            return
+        client = get_bitget_client()
+        for attempt in range(CONFIRM_ATTEMPTS):
+            if positions.get(pos.symbol) is not pos or not pos.is_open:
+                return
+            if attempt:
+                await asyncio.sleep(CONFIRM_DELAY)
+            try:
+                resp = await client.mix_order_api.get_plan_history(
+                    symbol=pos.symbol, startTime=min(plans.values()), endTime=int(time.time() * 1000))
+            except Exception as e:
+                logger.warning(f"[TRIGGER] {pos.symbol} {leg} 발동 이력 조회 실패: {e}")
+                continue
+            executed = next((h["executeOrderId"] for h in resp.get("data") or []
+                             if h.get("orderId") in plans and h.get("executeOrderId")), None)
+            if executed is None:
+                continue
+            fill = await order_fill_price(pos.symbol, executed, price)
+            if positions.get(pos.symbol) is not pos or not pos.is_open:
+                return
+            if leg == "sl":
+                self.book_stop(pos, fill)
+            else:
+                book = pos.targets.get(leg)
+                self.book_take_profit(pos, leg, book[1] if book else pos.qty, fill)
+            return
+        logger.warning(f"[TRIGGER] {pos.symbol} {leg} 로컬 교차 @ {price} 이나 플랜 발동 미확인 → 기록 보류")
+        if positions.get(pos.symbol) is pos and pos.is_open:
+            self.arm(pos)
+
+    # —— 실행 (client 모드) ——
+    async def _take_profit(self, pos: Position, t: _Trigger, qty: float, price: float):
+        # 시장가 실패 → 레벨 복구 (다음 교차에 재시도), 예약 수량은 기록/실패가 확정된 뒤 해제
+        if await self._execute(pos, t.leg, qty, price) is not False:
+            return
+        if positions.get(pos.symbol) is not pos or not pos.is_open:
+            return
+        if not getattr(pos, f"{_STAGES[t.leg][0]}_done") and t.leg not in pos.targets:
+            pos.targets = {**pos.targets, t.leg: [t.level, t.qty]}
+            positions.touch(pos.symbol)     # 변경 감지 → 레벨 재무장 + 저널/공유 상태 반영
+            logger.info(f"[TRIGGER] {pos.symbol} {t.leg} 레벨 재무장 @ {t.level}")
+
+    async def _execute(self, pos: Position, leg: str, qty: float | None, price: float) -> bool | None:
+        """
+        심볼별 순서대로 시장가 청산 → 성공 True / 주문 실패 False / 이미 청산·전환된 포지션 None
+        """
+        symbol = pos.symbol
+        lock = self._locks.get(symbol)
+        if lock is None:
+            lock = self._locks[symbol] = asyncio.Lock()
+        try:
+            async with lock:
+                if positions.get(symbol) is not pos or not pos.is_open:
+                    return None
+                if qty is None:
+                    qty = pos.qty
+                return await self._place_close(pos, leg, qty, price)
+        finally:
+            if leg != "sl":
+                left = self._reserved.get(symbol, 0.0) - qty
+                if left > 1e-12:
+                    self._reserved[symbol] = left
+                else:
+                    self._reserved.pop(symbol, None)
+
+    async def _place_close(self, pos: Position, leg: str, qty: float, price: float) -> bool:
+        long = pos.side == "long"
+        if POSITION_MODE == "one_way":
+            side, reduce_only = ("sell_single" if long else "buy_single"), True
+        else:
+            side, reduce_only = ("close_long" if long else "close_short"), None
+        try:
+            await get_bitget_client().mix_order_api.place_order(
+                symbol=pos.symbol,
+                marginCoin=margin_coin,
+                size=str(qty),
+                side=side,
+                orderType="market",
+                reduceOnly=reduce_only
+            )
+        except Exception as e:
+            # 포지션북은 열린 채 유지 → 익절은 레벨 재무장, 손절은 다음 교차 재시도 + 거래소 비상 손절
+            logger.error(f"[TRIGGER] {pos.symbol} {leg} 시장가 실행 실패: {e}")
+            if leg == "sl" and positions.get(pos.symbol) is pos and pos.is_open:
+                self.arm(pos)
+            return False
+        if positions.get(pos.symbol) is not pos or not pos.is_open:
+            return True
+        if leg == "sl":
+            self.book_stop(pos, price)
+        else:
+            self.book_take_profit(pos, leg, qty, price)
+        return True
+
+    def _spawn(self, coro) -> asyncio.Task:
+        # 신호 처리 중에 시작돼도 신호 예산과 무관하게 끝까지 진행
+        task = deadline.spawn(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    # —— 상태 기록 (체결 대사도 실제 체결가·수수료로 호출) ——
+    def book_take_profit(self, pos: Position, leg: str, qty: float, price: float, fee: float = 0.0):
+        prefix, counter = _STAGES[leg]
+        qty = min(qty, pos.qty)
+        pnl = pos.pnl_at(price)
+        if getattr(pos, f"{prefix}_done"):
+            # 같은 단계의 나머지 분할 체결 → 수량·원장만
+            ledger.record(pos.symbol, leg, pos.side, qty, price, pnl=pnl,
+                          pnl_usdt=pos.pnl_usdt_at(price, qty), fee=fee)
+            pos.qty = max(pos.qty - qty, 0.0)
+            positions.touch(pos.symbol)
+            return
+        setattr(pos, f"{prefix}_done", True)
+        setattr(pos, f"{prefix}_price", price)
+        setattr(pos, f"{prefix}_qty", qty)
+        setattr(pos, f"{prefix}_time", _now())
+        setattr(pos, f"{prefix}_pnl", pnl)
+        _drop_target(pos, leg)
+        ledger.record(pos.symbol, leg, pos.side, qty, price, pnl=pnl, pnl_usdt=pos.pnl_usdt_at(price, qty), fee=fee)
+
+        monitor_state[counter] += 1
+        monitor_state["daily_pnl"] += pnl
+        counters_changed()
+
+        pos.qty = max(pos.qty - qty, 0.0)
+        logger.info(f"[TRIGGER] {pos.symbol} {leg} {qty} @ {price} ({pnl:.2f}%)")
+        positions.touch(pos.symbol)
+
+    def book_stop(self, pos: Position, price: float, fee: float = 0.0):
+        qty = pos.qty
+        pnl = pos.pnl_at(price)
+        pos.sl_done = True
+        pos.sl_price = price
+        pos.sl_qty = qty
+        pos.sl_time = _now()
+        pos.sl_pnl = pnl
+        ledger.record(pos.symbol, "sl" if pnl < 0 else "close", pos.side, qty, price,
+                      pnl=pnl, pnl_usdt=pos.pnl_usdt_at(price, qty), fee=fee)
+
+        if pnl < 0:
+            monitor_state["sl_count"] += 1
+        monitor_state["daily_pnl"] += pnl
+        monitor_state["sl_triggered"] = True
+        counters_changed()
+
+        logger.info(f"[TRIGGER] {pos.symbol} 손절/청산 {qty} @ {price} ({pnl:.2f}%)")
+        positions.close(pos.symbol)
+
+    def start(self):
+        add_listener(self._on_state_change)
+        for pos in positions.open_positions():
+            if pos.targets or pos.stop_price > 0:
+                self.arm(pos)
+
+
+trigger_engine = TriggerEngine()
@@ -1,46 +1,193 @@
 # app/state.py
 
+import logging
 from datetime import datetime
+from typing import Callable
 from zoneinfo import ZoneInfo
 
+logger = logging.getLogger("state")
+
+# 상태 변경 리스너 (저널 등). kind: "position" | "counters" | "fill"
+_listeners: list[Callable[[str, object], None]] = []
+
+
+def add_listener(fn: Callable[[str, object], None]):
+    _listeners.append(fn)
+
+
+def notify(kind: str, obj):
+    for fn in _listeners:
+        try:
+            fn(kind, obj)
+        except Exception:
+            logger.exception(f"상태 리스너 오류 ({kind})")
+
+
+class Position:
+    """
+    심볼별 포지션 레코드 (__slots__ 로 심볼 수가 늘어도 메모리/접근 비용 최소화)
+    """
+    __slots__ = (
+        "symbol", "side",
+
+        # 진입 정보
+        "entry_price", "qty", "entry_time",
+
+        # 현재가 & PnL
+        "current_price", "mark_price", "pnl", "last_checked", "price_ts", "price_source",
+
+        # 1차 익절 정보
+        "first_tp_done", "first_tp_price", "first_tp_qty", "first_tp_time", "first_tp_pnl",
+
+        # 2차 익절 정보
+        "second_tp_done", "second_tp_price", "second_tp_qty", "second_tp_time", "second_tp_pnl",
+
+        # 손절 정보
+        "sl_done", "sl_price", "sl_qty", "sl_time", "sl_pnl",
+
+        # 트리거 엔진 레벨 (남은 익절 단계, 현재 손절 트리거, 트레일링 기준가)
+        "targets", "stop_price", "peak_price",
+
+        # 거래소 보호 주문 (체결 대사 시 체결 → 단계 매핑)
+        "orders",
+    )
+
+    def __init__(self, symbol: str, side: str = "", entry_price: float = 0.0, qty: float = 0.0,
+                 entry_time: str = ""):
+        self.symbol = symbol
+        self.side = side                # "long" 또는 "short"
+
+        self.entry_price = entry_price
+        self.qty = qty
+        self.entry_time = entry_time
+
+        self.current_price = 0.0
+        self.mark_price = 0.0
+        self.pnl = 0.0
+        self.last_checked = ""
+        self.price_ts = 0.0             # 마지막 시세 수신 시각 (epoch)
+        self.price_source = ""          # "ws" 또는 "rest"
+
+        self.first_tp_done = False
+        self.first_tp_price = 0.0
+        self.first_tp_qty = 0.0
+        self.first_tp_time = ""
+        self.first_tp_pnl = 0.0
+
+        self.second_tp_done = False
+        self.second_tp_price = 0.0
+        self.second_tp_qty = 0.0
+        self.second_tp_time = ""
+        self.second_tp_pnl = 0.0
+
+        self.sl_done = False
+        self.sl_price = 0.0
+        self.sl_qty = 0.0
+        self.sl_time = ""
+        self.sl_pnl = 0.0
+
+        self.targets: dict[str, list[float]] = {}   # 단계 → [트리거 가격, 수량]
+        self.stop_price = 0.0
+        self.peak_price = 0.0
+
+        self.orders: dict[str, list] = {}           # 플랜 orderId → [단계, 제출 시각 ms]
+
+    @property
+    def is_open(self) -> bool:
+        return self.qty > 0 and self.entry_price > 0
+
+    def pnl_at(self, price: float) -> float:
+        # 방향을 반영한 수익률(%)
+        if self.entry_price <= 0 or price <= 0:
+            return 0.0
+        if self.side == "short":
+            return (self.entry_price / price - 1) * 100
+        return (price / self.entry_price - 1) * 100
+
+    def pnl_usdt_at(self, price: float, qty: float) -> float:
+        # qty 만큼 price 에 청산했을 때 실현 손익 (USDT)
+        direction = -1 if self.side == "short" else 1
+        return (price - self.entry_price) * qty * direction
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Position":
+        pos = cls(data["symbol"])
+        for name in cls.__slots__:
+            if name in data:
+                setattr(pos, name, data[name])
+        return pos
+
+
+class PositionBook:
+    """
+    심볼 → Position 포지션북
+    """
+    def __init__(self):
+        self._positions: dict[str, Position] = {}
+
+    def get(self, symbol: str) -> Position | None:
+        return self._positions.get(symbol)
+
+    def open(self, symbol: str, side: str, entry_price: float, qty: float) -> Position:
+        # 신규 진입 시 TP/SL 진행 상태는 새 레코드로 초기화
+        now = datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d %H:%M:%S")
+        pos = Position(symbol, side, entry_price, qty, now)
+        self._positions[symbol] = pos
+        notify("position", pos)
+        return pos
+
+    def close(self, symbol: str) -> Position | None:
+        pos = self._positions.get(symbol)
+        if pos is not None:
+            pos.qty = 0.0
+            notify("position", pos)
+        return pos
+
+    def touch(self, symbol: str):
+        # 레코드 필드를 직접 바꾼 뒤 호출 → 리스너에 변경 전달
+        pos = self._positions.get(symbol)
+        if pos is not None:
+            notify("position", pos)
+
+    def restore(self, pos: Position):
+        # 저널 복구용 (리스너 호출 없음)
+        self._positions[pos.symbol] = pos
+
+    def open_positions(self) -> list[Position]:
+        return [p for p in self._positions.values() if p.is_open]
+
+    def snapshot(self) -> dict[str, dict]:
+        return {sym: p.to_dict() for sym, p in self._positions.items()}
+
+    def __iter__(self):
+        return iter(list(self._positions.values()))
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, symbol: str):
+        return symbol in self._positions
+
+
+positions = PositionBook()
+
 monitor_state = {
-    "symbol": "ETHUSDT",
-
-    # 진입 정보
-    "entry_price": 0.0,
-    "position_qty": 0.0,
-    "entry_time": "",
-
-    # 1차 익절 정보
-    "first_tp_done": False,
-    "first_tp_price": 0.0,
-    "first_tp_qty": 0.0,
-    "first_tp_time": "",
-    "first_tp_pnl": 0.0,
-
-    # 2차 익절 정보
-    "second_tp_done": False,
-    "second_tp_price": 0.0,
-    "second_tp_qty": 0.0,
-    "second_tp_time": "",
-    "second_tp_pnl": 0.0,
-
-    # 손절 정보
-    "sl_done": False,
-    "sl_price": 0.0,
-    "sl_qty": 0.0,
-    "sl_time": "",
-    "sl_pnl": 0.0,
-
-    # 현재가 & PnL
-    "current_price": 0.0,
-    "pnl": 0.0,
-    
-    # —— 아래가 새로 추가된 일일 정산용 카운터들 ——  
-    "trade_count": 0,       # 신호 받을 때마다 +1  
-    "first_tp_count": 0,    # 1차 익절 시 +1  
-    "second_tp_count": 0,   # 2차 익절 시 +1  
-    "sl_count": 0,          # 손절 시 +1  
-    "daily_pnl": 0.0,       # 모든 익절/손절 PnL 합산(%)  
-    "last_reset": ""        # 마지막 리셋 일자(YYYY-MM-DD)  
-}
\ No newline at end of file
+    # —— 아래가 새로 추가된 일일 정산용 카운터들 ——
+    "trade_count": 0,       # 신호 받을 때마다 +1
+    "first_tp_count": 0,    # 1차 익절 시 +1
+    "second_tp_count": 0,   # 2차 익절 시 +1
+    "sl_count": 0,          # 손절 시 +1
+    "daily_pnl": 0.0,       # 모든 익절/손절 PnL 합산(%)
+    "last_reset": "",       # 마지막 리셋 일자(YYYY-MM-DD)
+
+    "sl_triggered": False,
+
+    "fill_cursor": "",      # 체결 대사 커서 ("체결시각ms:tradeId,...")
+}
+
+
+def counters_changed():
+    notify("counters", monitor_state)
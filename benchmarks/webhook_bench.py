@@ -0,0 +1,308 @@
+"""
+웹훅 → 시장가 주문 / 손절 주문까지의 지연, 다중 심볼 처리량, 이벤트 루프 응답성 벤치마크
+
+- 실제 FastAPI 앱에 POST /webhook 을 보내 전체 경로 (큐 → 스위칭 → 진입 → 플랜 주문) 를 측정
+- 거래소는 get_bitget_client() 로 주입한 모의 거래소 (호출별 지연 고정, 시드 고정 → 재현 가능)
+- 결과는 JSON 으로 출력, --baseline 으로 이전 결과와 비교
+
+사용 예:
+  python benchmarks/webhook_bench.py --out bench.json
+  python benchmarks/webhook_bench.py --rate 200 --symbols 50 --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# 앱 import 전에 환경 고정 (모의 거래소, 저널/소켓 비활성, 빠른 폴링)
+os.environ.update({
+    "DRY_RUN": "true",
+    "WS_ENABLED": "false",
+    "JOURNAL_ENABLED": "false",
+    "STATE_DB_PATH": os.path.join(tempfile.gettempdir(), "webhook_bench.db"),
+    "SIM_FEED": "none",
+    "POLL_INTERVAL": os.environ.get("POLL_INTERVAL", "0.05"),
+    # 신호마다 실행되도록 병합 대기 없음 (몰린 신호의 대체는 superseded 로 따로 집계)
+    "SIGNAL_COALESCE_WINDOW": "0",
+})
+
+import httpx  # noqa: E402
+
+import app.clients.bitget_client as bitget_client  # noqa: E402
+from app.clients.bitget_sim import SimExchange  # noqa: E402
+from app.main import app  # noqa: E402
+
+# 호출별 왕복 지연 (초) — Bitget 실측치 근사
+LATENCIES = {
+    "place_order": 0.030,
+    "place_plan_order": 0.035,
+    "get_account": 0.020,
+    "get_ticker": 0.015,
+    "get_tickers": 0.025,
+    "set_leverage": 0.025,
+    "get_all_symbols": 0.050,
+    "get_all_open_orders": 0.020,
+    "cancel_order": 0.025,
+    "cancel_plan_order": 0.025,
+    "get_plan_orders": 0.020,
+    "get_order_detail": 0.020,
+    "get_fills": 0.030,
+    "get_plan_history": 0.030,
+}
+
+
+class BenchExchange(SimExchange):
+    """
+    모의 거래소 + 주문 이벤트 기록
+    - 잔고는 고정 (동시 다심볼 진입에서도 증거금 부족 없음)
+    - 시장가 진입 주문 제출 시각 / 손절 플랜 주문 완료 시각을 심볼별로 기록
+    """
+
+    def __init__(self, symbols: list[str]):
+        super().__init__(latency=0.0, jitter=0.0, feed="none", seed=0, latencies=LATENCIES)
+        for s in symbols:
+            self.specs[s] = (2, 2, 0.01)
+            self.prices[s] = 100.0
+        self.entries: dict[str, list[float]] = {}
+        self.stops: dict[str, list[float]] = {}
+
+        place_order = self.mix_order_api.place_order
+        place_plan_order = self.mix_order_api.place_plan_order
+
+        async def recorded_order(**kw):
+            if not kw.get("reduceOnly"):
+                self.entries.setdefault(kw["symbol"], []).append(time.perf_counter())
+            return await place_order(**kw)
+
+        async def recorded_plan(**kw):
+            price = self.prices[kw["symbol"]]
+            trigger = float(kw["triggerPrice"])
+            resp = await place_plan_order(**kw)
+            is_stop = trigger < price if kw["side"] == "close_long" else trigger > price
+            if is_stop:
+                self.stops.setdefault(kw["symbol"], []).append(time.perf_counter())
+            return resp
+
+        self.mix_order_api.place_order = recorded_order
+        self.mix_order_api.place_plan_order = recorded_plan
+
+    @property
+    def available(self) -> float:
+        return self.balance
+
+
+def _pct(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def _summary(values: list[float]) -> dict:
+    # 초 → 밀리초
+    ms = [v * 1000 for v in values]
+    return {
+        "n": len(ms),
+        "p50_ms": _pct(ms, 50),
+        "p90_ms": _pct(ms, 90),
+        "p99_ms": _pct(ms, 99),
+        "max_ms": max(ms) if ms else None,
+        "mean_ms": statistics.fmean(ms) if ms else None,
+    }
+
+
+class LoopProbe:
+    """
+    주기적으로 sleep 하며 예정 대비 늦게 깨어난 정도 (이벤트 루프 지연) 측정
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(time.perf_counter() - t0 - self.interval, 0.0))
+
+    def start(self):
+        self.lags.clear()
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> dict:
+        self._task.cancel()
+        return _summary(self.lags)
+
+
+async def _send(client: httpx.AsyncClient, symbol: str, action: str) -> tuple[float, float, str]:
+    """
+    신호 1건 → (전송 시각, 응답 시각, 결과: ok / superseded / skipped / failed)
+    """
+    t0 = time.perf_counter()
+    r = await client.post("/webhook", json={"symbol": symbol, "action": action})
+    body = r.json() if r.status_code == 200 else {}
+    if body.get("status") == "ok":
+        outcome = "ok"
+    elif body.get("status") == "skipped":
+        outcome = "superseded" if body.get("reason") == "superseded" else "skipped"
+    else:
+        outcome = "failed"
+    return t0, time.perf_counter(), outcome
+
+
+def _match(sent: dict[str, list[tuple[float, str]]], events: dict[str, list[float]]) -> list[float]:
+    # 심볼별로 실제 진입한 (ok) 신호만 순서대로 이벤트와 짝지음 (심볼 큐는 FIFO, 진입 1회당 이벤트 1개)
+    out = []
+    for symbol, items in sent.items():
+        ran = [t0 for t0, outcome in items if outcome == "ok"]
+        for t0, t1 in zip(ran, events.get(symbol, [])):
+            out.append(t1 - t0)
+    return out
+
+
+async def bench_latency(client, ex: BenchExchange, iterations: int) -> dict:
+    """
+    단일 심볼 순차 신호 (BUY/SELL 교대) → 신호 수신 ~ 시장가 제출 / 손절 완료 / 응답
+    """
+    symbol = "LATUSDT"
+    sent, done = [], []
+    probe = LoopProbe()
+    probe.start()
+    for i in range(iterations):
+        t0, t1, outcome = await _send(client, symbol, "BUY" if i % 2 == 0 else "SELL")
+        sent.append((t0, outcome))
+        done.append(t1 - t0)
+    return {
+        "signal_to_order": _summary(_match({symbol: sent}, ex.entries)),
+        "signal_to_sl": _summary(_match({symbol: sent}, ex.stops)),
+        "signal_to_response": _summary(done),
+        "loop_lag": probe.stop(),
+    }
+
+
+async def bench_throughput(client, ex: BenchExchange, symbols: list[str], rate: float, duration: float) -> dict:
+    """
+    여러 심볼에 일정 속도로 신호 투입 (개루프) → 처리량 / 지연 분포 / 루프 응답성
+    """
+    actions = {s: "SELL" for s in symbols}
+    tasks = []
+    probe = LoopProbe()
+    probe.start()
+
+    start = time.perf_counter()
+    total = int(rate * duration)
+    for i in range(total):
+        # 예정 시각까지 대기 (밀리면 바로 전송 → 투입 속도 유지)
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        symbol = symbols[i % len(symbols)]
+        actions[symbol] = "BUY" if actions[symbol] == "SELL" else "SELL"
+        tasks.append((symbol, asyncio.create_task(_send(client, symbol, actions[symbol]))))
+
+    results = await asyncio.gather(*(task for _, task in tasks))
+    elapsed = time.perf_counter() - start
+    sent: dict[str, list[tuple[float, str]]] = {s: [] for s in symbols}
+    for (symbol, _), (t0, _, outcome) in zip(tasks, results):
+        sent[symbol].append((t0, outcome))
+    outcomes = [outcome for *_, outcome in results]
+    ok = outcomes.count("ok")
+    return {
+        "offered_rate": rate,
+        "sent": total,
+        "completed": ok,
+        # 실행 전 같은 심볼의 최신 신호로 대체됨 (정상 동작, 실패 아님)
+        "superseded": outcomes.count("superseded"),
+        "skipped": outcomes.count("skipped"),
+        "failed": outcomes.count("failed"),
+        "elapsed_s": elapsed,
+        "signals_per_s": ok / elapsed,
+        "signal_to_order": _summary(_match(sent, ex.entries)),
+        "signal_to_sl": _summary(_match(sent, ex.stops)),
+        "signal_to_response": _summary([t1 - t0 for t0, t1, _ in results]),
+        "loop_lag": probe.stop(),
+    }
+
+
+def _meta(args) -> dict:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                         stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": vars(args),
+        "latencies": LATENCIES,
+    }
+
+
+def _compare(current: dict, baseline: dict, prefix: str = "") -> list[str]:
+    # 숫자 항목별 변화율 (지연 항목은 + 가 악화)
+    lines = []
+    for key, value in current.items():
+        base = baseline.get(key) if isinstance(baseline, dict) else None
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            lines += _compare(value, base or {}, name + ".")
+        elif isinstance(value, (int, float)) and isinstance(base, (int, float)) and base:
+            lines.append(f"{name:45s} {base:12.3f} → {value:12.3f} ({(value / base - 1) * 100:+6.1f}%)")
+    return lines
+
+
+async def main(args):
+    symbols = [f"S{i:03d}USDT" for i in range(args.symbols)]
+    ex = BenchExchange(symbols + ["LATUSDT"])
+    bitget_client._bitget_client = ex
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            # 워밍업 (계약 스펙 캐시, 레버리지 메모, 심볼 워커 생성)
+            await _send(client, "LATUSDT", "SELL")
+            ex.entries.clear()
+            ex.stops.clear()
+
+            latency = await bench_latency(client, ex, args.iterations)
+            ex.entries.clear()
+            ex.stops.clear()
+            throughput = await bench_throughput(client, ex, symbols, args.rate, args.duration)
+
+    result = {"meta": _meta(args), "latency": latency, "throughput": throughput}
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for line in _compare({k: result[k] for k in ("latency", "throughput")}, baseline):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="웹훅 경로 지연/처리량 벤치마크")
+    p.add_argument("--iterations", type=int, default=50, help="지연 측정용 순차 신호 수")
+    p.add_argument("--symbols", type=int, default=20, help="처리량 측정 심볼 수")
+    p.add_argument("--rate", type=float, default=50.0, help="처리량 측정 투입 속도 (신호/초)")
+    p.add_argument("--duration", type=float, default=5.0, help="처리량 측정 시간 (초)")
+    p.add_argument("--out", help="결과 JSON 저장 경로 (없으면 stdout)")
+    p.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    asyncio.run(main(p.parse_args()))
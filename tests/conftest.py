@@ -0,0 +1,39 @@
+import os
+import sys
+
+# app 모듈 import 전에 환경 고정 (모의 거래소, 저널/공유 상태/소켓 비활성)
+os.environ.update({
+    "DRY_RUN": "true",
+    "WS_ENABLED": "false",
+    "JOURNAL_ENABLED": "false",
+    "SHARED_STATE_ENABLED": "false",
+    "STRATEGY_ENABLED": "false",
+    "SIM_FEED": "none",
+    "SIM_PARTIAL_FILL": "0",
+    "SIM_LATENCY": "0.001",
+    "SIM_JITTER": "0",
+    "MAX_WAIT": "5",
+})
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest  # noqa: E402
+
+import app.clients.bitget_client as bitget_client  # noqa: E402
+from app.clients.bitget_sim import SimExchange  # noqa: E402
+from app.services import pretrade  # noqa: E402
+from app.services.order_registry import order_registry  # noqa: E402
+from app.services.triggers import trigger_engine  # noqa: E402
+
+# 포지션북 리스너는 프로세스당 한 번만 등록
+order_registry.start()
+trigger_engine.start()
+
+
+@pytest.fixture
+def sim():
+    # 테스트마다 새 모의 거래소 (시드 고정, 가격 피드 없음)
+    ex = SimExchange(latency=0.001, jitter=0.0, partial_fill=0.0, feed="none", seed=0)
+    bitget_client._bitget_client = ex
+    pretrade._applied_leverage.clear()     # 새 거래소는 레버리지 기본값
+    yield ex
+    bitget_client._bitget_client = None
@@ -0,0 +1,112 @@
+import asyncio
+
+import app.clients.bitget_ws as bitget_ws
+from app.clients.bitget_ws import BitgetPrivateStream
+from app.services.account_stream import AccountView
+from ws_standin import StandIn, until
+
+CHANNELS = [{"instType": "UMCBL", "channel": ch, "instId": "default"} for ch in ("account", "positions", "orders")]
+
+
+def _push(channel: str, data: list, action: str = "snapshot") -> dict:
+    return {"action": action, "arg": {"instType": "UMCBL", "channel": channel, "instId": "default"}, "data": data}
+
+
+def _connect(view: AccountView, url: str) -> BitgetPrivateStream:
+    view.stream = BitgetPrivateStream("key", "secret", "pass", on_data=view.apply, on_reset=view.reset, url=url)
+    return view.stream
+
+
+def test_login_subscribe_and_snapshot_make_view_ready():
+    async def main():
+        view = AccountView()
+        async with StandIn() as server:
+            stream = _connect(view, server.url)
+            task = asyncio.create_task(stream.run())
+            try:
+                await until(lambda: server.subscribed and len(server.subscribed[-1]) == 3)
+                assert server.logins[0]["apiKey"] == "key" and server.logins[0]["sign"]
+                assert sorted(server.subscribed[-1], key=str) == sorted(CHANNELS, key=str)
+                assert not view.ready
+
+                await server.push(_push("account", [{"marginCoin": "USDT", "available": "900", "equity": "1000"}]))
+                await server.push(_push("positions", [{"instId": "ETHUSDT_UMCBL", "holdSide": "long", "total": "0.5"}]))
+                await until(lambda: view.ready)
+                assert (view.available, view.equity) == (900.0, 1000.0)
+                assert view.net_position("ETHUSDT") == 0.5
+
+                await server.push(_push("orders", [{"ordId": "o1", "avgPx": "3001"}], "update"))
+                await until(lambda: "o1" in view.orders)
+            finally:
+                task.cancel()
+    asyncio.run(main())
+
+
+def test_wait_position_resolves_on_push():
+    async def main():
+        view = AccountView()
+        async with StandIn() as server:
+            stream = _connect(view, server.url)
+            task = asyncio.create_task(stream.run())
+            try:
+                await until(lambda: server.subscribed and server.subscribed[-1])
+                await server.push(_push("positions", [{"instId": "ETHUSDT_UMCBL", "holdSide": "short", "total": "1"}]))
+                await until(lambda: view.net_position("ETHUSDT") == -1.0)
+
+                waiter = asyncio.create_task(view.wait_position("ETHUSDT", 0.0, timeout=5))
+                await asyncio.sleep(0.01)
+                assert not waiter.done()
+                await server.push(_push("positions", [{"instId": "ETHUSDT_UMCBL", "holdSide": "short", "total": "0"}],
+                                        "update"))
+                assert await waiter is True
+                assert not await view.wait_position("ETHUSDT", 1.0, timeout=0.05)
+            finally:
+                task.cancel()
+    asyncio.run(main())
+
+
+def test_reconnect_resets_state_and_relogs_in(monkeypatch):
+    monkeypatch.setattr(bitget_ws.random, "random", lambda: 0.0)
+
+    async def main():
+        view = AccountView()
+        async with StandIn() as server:
+            stream = _connect(view, server.url)
+            task = asyncio.create_task(stream.run())
+            try:
+                await until(lambda: server.subscribed and server.subscribed[-1])
+                await server.push(_push("account", [{"marginCoin": "USDT", "available": "1", "equity": "1"}]))
+                await server.push(_push("positions", [{"instId": "BTCUSDT_UMCBL", "holdSide": "long", "total": "2"}]))
+                await until(lambda: view.ready)
+
+                await server.sockets[-1].close()
+                await until(lambda: server.connections == 2 and len(server.subscribed[-1]) == 3)
+                # 끊긴 사이 변경분을 모르므로 snapshot 전까지는 REST 대체
+                assert not view.ready
+                assert len(server.logins) == 2
+
+                # 재동기화 snapshot 이 이전 포지션을 대체
+                await server.push(_push("account", [{"marginCoin": "USDT", "available": "1", "equity": "1"}]))
+                await server.push(_push("positions", []))
+                await until(lambda: view.ready)
+                assert view.net_position("BTCUSDT") == 0.0
+            finally:
+                task.cancel()
+    asyncio.run(main())
+
+
+def test_rejected_login_retries_without_subscribing(monkeypatch):
+    monkeypatch.setattr(bitget_ws.random, "random", lambda: 0.0)
+
+    async def main():
+        view = AccountView()
+        async with StandIn(login_code="30005") as server:
+            stream = _connect(view, server.url)
+            task = asyncio.create_task(stream.run())
+            try:
+                await until(lambda: len(server.logins) >= 2)
+                assert not any(server.subscribed)
+                assert not stream.connected
+            finally:
+                task.cancel()
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from app.backtest import param_grid, simulate, sweep
+from app.services.contracts import ContractSpec
+
+SPEC = ContractSpec("TESTUSDT", min_qty=0.01, price_scale=2, size_scale=2)
+
+
+def _candles(highs, lows, closes):
+    return {"ts": np.arange(len(closes), dtype=float), "high": np.asarray(highs, dtype=float),
+            "low": np.asarray(lows, dtype=float), "close": np.asarray(closes, dtype=float)}
+
+
+def _signals(*rows):
+    return {"ts": np.array([r[0] for r in rows], dtype=float), "action": np.array([r[1] for r in rows], dtype=np.int8)}
+
+
+def test_stop_loss_wins_a_same_bar_tie():
+    # 진입 100 × 9.8 (잔고 1000, 1배), tp1 100.3 × 1.96 / tp2 100.7 × 3.92 / sl 99.7
+    candles = _candles([100, 100.4, 100.8, 100], [100, 100, 99.6, 100], [100, 100.2, 100, 100])
+    grid = param_grid(tp1=0.003, tp2=0.007, sl=0.003, leverage=1, tp1_part=0.2, tp2_part=0.5)
+    res = simulate(candles, _signals((0, 1)), grid, SPEC, balance=1000.0, fee_rate=0.0)
+
+    # 봉 1: tp1 체결, 봉 2: tp2 와 sl 동시 도달 → 손절 우선으로 남은 7.84 청산
+    assert res["tp1_hits"][0] == 1 and res["tp2_hits"][0] == 0 and res["sl_hits"][0] == 1
+    assert res["trades"][0] == 1
+    assert res["pnl"][0] == pytest.approx(0.3 * 1.96 - 0.3 * 7.84)
+
+
+def test_reverse_signal_closes_at_bar_close_and_grid_matches_sweep():
+    candles = _candles([100, 101, 101, 99], [100, 99.8, 99.9, 98], [100, 101, 100.5, 98])
+    signals = _signals((0, 1), (1.5, -1))
+    grid = param_grid(tp1=[0.002, 0.02], tp2=0.05, sl=0.05, leverage=1)
+    res = simulate(candles, signals, grid, SPEC, balance=1000.0, fee_rate=0.0)
+
+    # 조합 0: 롱 tp1 100.2 × 1.96, 봉 1 종가 101 에서 7.84 청산 → 숏 9.78 @101, tp1 100.8 × 1.95, 마지막 종가 98 로 7.83
+    assert res["pnl"][0] == pytest.approx(0.2 * 1.96 + 1.0 * 7.84 + 0.2 * 1.95 + 3.0 * 7.83)
+    # 조합 1: 롱 익절 없이 9.8 청산 → 숏 9.79 @101, tp1 98.98 × 1.95, 마지막 종가 98 로 7.84
+    assert res["pnl"][1] == pytest.approx(1.0 * 9.8 + 2.02 * 1.95 + 3.0 * 7.84)
+    assert list(res["trades"]) == [2, 2]
+    assert list(res["tp1_hits"]) == [2, 1]
+
+    parallel = sweep(candles, signals, grid, SPEC, balance=1000.0, fee_rate=0.0, workers=2)
+    np.testing.assert_allclose(parallel["pnl"], res["pnl"])
@@ -0,0 +1,94 @@
+import asyncio
+
+import app.clients.bitget_ws as bitget_ws
+from app.clients.bitget_ws import BitgetPublicStream
+from ws_standin import StandIn, until as _until
+
+
+def _ticker(symbol: str, last: str, mark: str | None = None) -> dict:
+    item = {"instId": symbol, "last": last}
+    if mark is not None:
+        item["markPrice"] = mark
+    return {"action": "snapshot", "arg": {"instType": "MC", "channel": "ticker", "instId": symbol}, "data": [item]}
+
+
+def test_ticker_stream_delivers_prices_and_skips_bad_items():
+    async def main():
+        ticks = []
+        async with StandIn() as server:
+            stream = BitgetPublicStream(on_ticker=lambda *t: ticks.append(t), url=server.url)
+            task = asyncio.create_task(stream.run())
+            try:
+                await _until(lambda: stream.connected)
+                await stream.subscribe_ticker("BTCUSDT")
+                await _until(lambda: server.subscribed[-1])
+                assert server.subscribed[-1] == [{"instType": "MC", "channel": "ticker", "instId": "BTCUSDT"}]
+
+                await server.push("pong")
+                await server.push(_ticker("BTCUSDT", "bad"))
+                await server.push(_ticker("BTCUSDT", "60000.5", "60001"))
+                await server.push(_ticker("BTCUSDT", "60002"))
+                await server.push({"arg": {"channel": "books"}, "data": [{"last": "1"}]})
+                await _until(lambda: len(ticks) == 2)
+                assert ticks == [("BTCUSDT", 60000.5, 60001.0), ("BTCUSDT", 60002.0, 60002.0)]
+            finally:
+                task.cancel()
+    asyncio.run(main())
+
+
+def test_reconnects_and_restores_subscriptions(monkeypatch):
+    # 재연결 대기 최소화 (지터 0 → 백오프 절반)
+    monkeypatch.setattr(bitget_ws.random, "random", lambda: 0.0)
+
+    async def main():
+        ticks = []
+        async with StandIn() as server:
+            stream = BitgetPublicStream(on_ticker=lambda *t: ticks.append(t), url=server.url)
+            task = asyncio.create_task(stream.run())
+            try:
+                await _until(lambda: stream.connected)
+                await stream.subscribe_ticker("BTCUSDT")
+                await stream.subscribe_ticker("ETHUSDT")
+                await stream.unsubscribe_ticker("BTCUSDT")
+                await _until(lambda: len(server.subscribed[-1]) == 1)
+
+                await server.sockets[-1].close()
+                await _until(lambda: server.connections == 2 and server.subscribed[-1])
+                assert server.subscribed[-1] == [{"instType": "MC", "channel": "ticker", "instId": "ETHUSDT"}]
+                await _until(lambda: stream.connected)
+
+                await server.push(_ticker("ETHUSDT", "3000"))
+                await _until(lambda: ticks)
+                assert ticks == [("ETHUSDT", 3000.0, 3000.0)]
+            finally:
+                task.cancel()
+    asyncio.run(main())
+
+
+def test_subscribe_while_disconnected_is_sent_on_connect():
+    async def main():
+        async with StandIn() as server:
+            stream = BitgetPublicStream(on_ticker=lambda *t: None, url=server.url)
+            await stream.subscribe_ticker("SOLUSDT")     # 연결 전 → 연결 시 복원 목록으로
+            task = asyncio.create_task(stream.run())
+            try:
+                await _until(lambda: server.subscribed and server.subscribed[-1])
+                assert server.subscribed[-1] == [{"instType": "MC", "channel": "ticker", "instId": "SOLUSDT"}]
+            finally:
+                task.cancel()
+    asyncio.run(main())
+
+
+def test_silent_server_forces_reconnect(monkeypatch):
+    monkeypatch.setattr(bitget_ws, "WS_PING_INTERVAL", 0.05)
+    monkeypatch.setattr(bitget_ws.random, "random", lambda: 0.0)
+
+    async def main():
+        async with StandIn(pong=False) as server:
+            stream = BitgetPublicStream(on_ticker=lambda *t: None, url=server.url)
+            task = asyncio.create_task(stream.run())
+            try:
+                await _until(lambda: server.connections >= 2)
+            finally:
+                task.cancel()
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+import asyncio
+
+from app import deadline
+from app.services import executor
+
+
+def _fake_run(monkeypatch, calls: list, delay: float = 0.05):
+    async def run_signal(sym, action):
+        calls.append((sym, action))
+        await asyncio.sleep(delay)
+        return {"status": "ok", "result": {"action": action}}
+    monkeypatch.setattr(executor, "run_signal", run_signal)
+
+
+def test_same_key_returns_original_job(monkeypatch):
+    calls = []
+    _fake_run(monkeypatch, calls)
+
+    async def main():
+        first = executor.submit("KEYUSDT", "BUY", key="alert-1")
+        again = executor.submit("KEYUSDT", "BUY", key="alert-1")
+        assert again is first
+        await first.wait()
+        assert first.status == "done"
+        assert calls == [("KEYUSDT", "BUY")]
+    asyncio.run(main())
+
+
+def test_keyless_repeats_are_not_folded(monkeypatch):
+    calls = []
+    _fake_run(monkeypatch, calls, delay=0.0)
+
+    async def main():
+        a = executor.submit("NOKEYUSDT", "BUY")
+        await a.wait()
+        b = executor.submit("NOKEYUSDT", "BUY")
+        assert b is not a
+        await b.wait()
+        assert calls == [("NOKEYUSDT", "BUY")] * 2
+    asyncio.run(main())
+
+
+def test_burst_runs_latest_and_duplicate_follows_replacement(monkeypatch):
+    calls = []
+    _fake_run(monkeypatch, calls)
+
+    async def main():
+        running = executor.submit("BURSTUSDT", "BUY", key="b1")
+        await asyncio.sleep(0.01)
+        middle = executor.submit("BURSTUSDT", "SELL", key="b2")
+        last = executor.submit("BURSTUSDT", "BUY", key="b3")
+        assert middle.status == "superseded"
+        assert middle.result["superseded_by"] == last.id
+        # 대체된 신호의 재전송은 실제로 실행되는 작업을 받음
+        assert executor.submit("BURSTUSDT", "SELL", key="b2") is last
+
+        await last.wait()
+        assert running.status == last.status == "done"
+        assert calls == [("BURSTUSDT", "BUY"), ("BURSTUSDT", "BUY")]
+    asyncio.run(main())
+
+
+def test_coalesce_window_only_delays_busy_symbols(monkeypatch):
+    calls = []
+    _fake_run(monkeypatch, calls, delay=0.05)
+    monkeypatch.setattr(executor, "SIGNAL_COALESCE_WINDOW", 0.3)
+
+    async def main():
+        idle = executor.submit("IDLEUSDT", "BUY")
+        await idle.wait()
+        assert idle.started_at - idle.created_at < 0.1
+
+        busy = executor.submit("IDLEUSDT", "SELL")
+        await asyncio.sleep(0.01)
+        queued = executor.submit("IDLEUSDT", "BUY")
+        await queued.wait()
+        assert queued.started_at - queued.created_at >= 0.3 - 0.01
+        assert busy.status == "done"
+    asyncio.run(main())
+
+
+def test_deadline_exceeded_is_reported(monkeypatch):
+    async def run_signal(sym, action):
+        raise deadline.exceeded("place_order")
+    monkeypatch.setattr(executor, "run_signal", run_signal)
+
+    async def main():
+        job = await executor.submit("DLUSDT", "BUY").wait()
+        assert job.status == "deadline_exceeded"
+        assert job.result == {"status": "deadline_exceeded", "stage": "place_order"}
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+import app.services.triggers as triggers
+from app.services.fills import fill_reconciler
+from app.services.switching import switch_position
+from app.state import positions, monitor_state
+
+
+@pytest.fixture
+def reconciled(monkeypatch):
+    # 로컬 교차는 기록하지 않고 체결 대사만 기록
+    monkeypatch.setattr(triggers, "TRIGGER_MODE", "exchange")
+    monkeypatch.setattr(triggers, "FILL_SYNC_INTERVAL", 5)
+    monitor_state["fill_cursor"] = ""
+
+
+def test_plan_fills_book_stages_at_fill_price(sim, reconciled):
+    async def main():
+        assert await fill_reconciler.sync() == 0          # 첫 실행: 커서만 설정
+        await asyncio.sleep(0.002)
+        await switch_position("XRPUSDT", "BUY")
+        pos = positions.get("XRPUSDT")
+        tp1, q1 = pos.targets["tp1"]
+        tp1_count = monitor_state["first_tp_count"]
+
+        price = tp1 + 0.0004
+        sim.set_price("XRPUSDT", price)
+        triggers.trigger_engine.on_price("XRPUSDT", price)
+        assert not pos.first_tp_done                      # 로컬 교차만으로는 기록 안 함
+
+        assert await fill_reconciler.sync() == 2          # 진입 체결 (수수료만) + tp1 발동 체결
+        assert pos.first_tp_done and pos.first_tp_price == pytest.approx(price)
+        assert pos.first_tp_qty == q1
+        assert monitor_state["first_tp_count"] == tp1_count + 1
+        assert await fill_reconciler.sync() == 0          # 같은 체결은 다시 반영하지 않음
+
+        stop = pos.stop_price - 0.001
+        sim.set_price("XRPUSDT", stop)
+        assert await fill_reconciler.sync() == 1
+        assert pos.sl_done and not pos.is_open
+        assert pos.sl_price == pytest.approx(stop)
+    asyncio.run(main())
+
+
+def test_history_failure_keeps_cursor(sim, reconciled, monkeypatch):
+    async def main():
+        await fill_reconciler.sync()
+        await asyncio.sleep(0.002)
+        await switch_position("BTCUSDT", "BUY")
+        pos = positions.get("BTCUSDT")
+        sim.set_price("BTCUSDT", pos.targets["tp1"][0] + 1)
+
+        async def broken(**kw):
+            raise ConnectionError("down")
+        original = sim.mix_order_api.get_plan_history
+        monkeypatch.setattr(sim.mix_order_api, "get_plan_history", broken)
+        cursor = monitor_state["fill_cursor"]
+        assert await fill_reconciler.sync() == 0
+        assert monitor_state["fill_cursor"] == cursor and not pos.first_tp_done
+
+        monkeypatch.setattr(sim.mix_order_api, "get_plan_history", original)
+        assert await fill_reconciler.sync() == 2
+        assert pos.first_tp_done
+    asyncio.run(main())
+
+
+def test_fill_waits_for_lagging_plan_history(sim, reconciled, monkeypatch):
+    async def main():
+        await fill_reconciler.sync()
+        await asyncio.sleep(0.002)
+        await switch_position("XRPUSDT", "SELL")
+        pos = positions.get("XRPUSDT")
+        tp1_count = monitor_state["first_tp_count"]
+        sim.set_price("XRPUSDT", pos.targets["tp1"][0] - 0.0004)
+
+        # 플랜은 발동됐지만 이력에는 아직 없음 → 진입 체결까지만 반영, 커서는 tp1 체결 앞에서 멈춤
+        history = sim.plan_history
+        monkeypatch.setattr(sim, "plan_history", {})
+        assert await fill_reconciler.sync() == 1
+        assert not pos.first_tp_done
+        assert await fill_reconciler.sync() == 0
+
+        monkeypatch.setattr(sim, "plan_history", history)
+        assert await fill_reconciler.sync() == 1
+        assert pos.first_tp_done and monitor_state["first_tp_count"] == tp1_count + 1
+    asyncio.run(main())
+
+
+def test_signal_close_is_not_held_back(sim, reconciled):
+    async def main():
+        await fill_reconciler.sync()
+        await asyncio.sleep(0.002)
+        await switch_position("XRPUSDT", "BUY")
+        await switch_position("XRPUSDT", "SELL")
+        # 신호 청산 체결은 어떤 플랜에도 매핑되지 않지만 보호 주문이 모두 남아 있으므로 기다리지 않음
+        assert await fill_reconciler.sync() == len(sim.fills)
+        assert await fill_reconciler.sync() == 0
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.ledger import TradeLedger, trading_day
+
+NOW = time.time()
+DAY = 86400
+
+
+@pytest.fixture
+def book():
+    rng = random.Random(7)
+    ledger = TradeLedger(capacity=4)        # 용량 확장 경로도 거침
+    for ts in sorted(NOW - rng.uniform(0, 400 * DAY) for _ in range(2000)):
+        ledger.record(rng.choice("ABC"), rng.choice(["entry", "tp1", "sl", "close"]), "long", 1.0, 100.0,
+                      pnl=rng.uniform(-1, 1), fee=0.01, ts=ts)
+    return ledger
+
+
+def _scan(ledger: TradeLedger, start: date, end: date, symbol: str | None = None) -> tuple[int, float]:
+    # 기준값: 원본 체결 전체 스캔
+    f = ledger.fills(0, float("inf"))
+    rows = [(t, p) for t, s, p in zip(f["ts"], f["symbol"], f["pnl"])
+            if start <= trading_day(t) <= end and (symbol is None or s == symbol)]
+    return len(rows), round(sum(p for _, p in rows), 4)
+
+
+def _count(summary: dict) -> int:
+    return summary["entries"] + summary["tp1"] + summary["tp2"] + summary["sl"] + summary["closes"]
+
+
+@pytest.mark.parametrize("days, symbol", [(1, None), (30, "B"), (365, None), (100000, "A")])
+def test_summary_matches_full_scan(book, days, symbol):
+    end = trading_day(NOW)
+    start = end - timedelta(days=days - 1)
+    s = book.summary(start, end, symbol)
+    assert (_count(s), s["pnl"]) == pytest.approx(_scan(book, start, end, symbol))
+
+
+def test_ranges_outside_data_and_unknown_symbols_are_empty(book):
+    assert _count(book.summary(date(1990, 1, 1), date(1990, 12, 31))) == 0
+    assert _count(book.summary(date(1990, 1, 1), date(2200, 1, 1), "ZZZ")) == 0
+    assert _count(book.summary(date(1990, 1, 1), date(2200, 1, 1))) == 2000
+
+
+def test_by_symbol_sums_to_total(book):
+    start, end = date(1990, 1, 1), date(2200, 1, 1)
+    per = book.by_symbol(start, end)
+    assert set(per) == {"A", "B", "C"}
+    assert sum(_count(s) for s in per.values()) == _count(book.summary(start, end))
+
+
+def test_trading_day_rolls_at_nine_kst():
+    # 2024-01-02 08:59 KST → 1일 정산, 09:00 KST → 2일 정산
+    nine = 1704153600   # 2024-01-02 00:00 UTC = 09:00 KST
+    assert trading_day(nine - 60) == date(2024, 1, 1)
+    assert trading_day(nine) == date(2024, 1, 2)
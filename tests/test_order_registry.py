@@ -0,0 +1,64 @@
+import asyncio
+
+from app.services.order_registry import OrderRegistry
+from app.services.switching import switch_position
+from app.state import positions
+
+
+async def _orphan_plan(sim, symbol: str, side: str, trigger: float) -> str:
+    # 다른 (죽은) 워커가 낸 주문: 어느 장부에도 없음, 유예 시간 지남
+    resp = await sim.mix_order_api.place_plan_order(symbol=symbol, marginCoin="USDT", size="0.01", side=side,
+                                                   orderType="market", triggerPrice=str(trigger),
+                                                   triggerType="market_price")
+    order_id = resp["data"]["orderId"]
+    sim.plans[order_id].created_at -= 60
+    return order_id
+
+
+def test_leader_cancels_orders_left_by_another_worker(sim):
+    async def main():
+        leader = OrderRegistry()     # 주문을 낸 적 없는 워커 (빈 세대 장부)
+        await switch_position("ETHUSDT", "BUY")
+        pos = positions.get("ETHUSDT")
+        current = set(pos.orders)
+        for oid in current:
+            sim.plans[oid].created_at -= 30
+        orphan = await _orphan_plan(sim, "ETHUSDT", "close_short", 2900.0)
+        # 현재 보호 주문보다 먼저 낸 주문으로 만들기
+        sim.plans[orphan].created_at -= 60
+
+        assert await leader.reconcile_exchange("ETHUSDT") == 1
+        assert set(sim.plans) == current
+
+        # 포지션 상태가 그대로면 다시 조회하지 않음
+        calls = []
+        original = sim.mix_order_api.get_plan_orders
+
+        async def counted(**kw):
+            calls.append(kw)
+            return await original(**kw)
+        sim.mix_order_api.get_plan_orders = counted
+        assert await leader.reconcile_exchange("ETHUSDT") == 0
+        assert not calls
+    asyncio.run(main())
+
+
+def test_closed_position_orders_are_cancelled_after_grace(sim):
+    async def main():
+        leader = OrderRegistry()
+        positions.open("SOLUSDT", "long", 150.0, 1.0)
+        positions.close("SOLUSDT")
+        old = await _orphan_plan(sim, "SOLUSDT", "close_long", 140.0)
+        resp = await sim.mix_order_api.place_plan_order(symbol="SOLUSDT", marginCoin="USDT", size="0.1",
+                                                       side="close_long", orderType="market",
+                                                       triggerPrice="141", triggerType="market_price")
+        fresh = resp["data"]["orderId"]
+
+        assert await leader.reconcile_exchange("SOLUSDT") == 1
+        assert old not in sim.plans and fresh in sim.plans
+
+        # 유예 중인 주문이 있었으므로 다음 점검에서 다시 확인
+        sim.plans[fresh].created_at -= 60
+        assert await leader.reconcile_exchange("SOLUSDT") == 1
+        assert not [p for p in sim.plans.values() if p.symbol == "SOLUSDT"]
+    asyncio.run(main())
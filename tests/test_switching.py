@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+import app.services.switching as switching
+from app import deadline
+from app.services.ledger import ledger
+from app.services.switching import switch_position
+from app.state import positions
+
+
+def _closes(symbol: str) -> int:
+    today = ledger.rolling(1, symbol)
+    return today["closes"] + today["sl"]
+
+
+def test_timed_out_close_is_booked_when_exchange_is_flat(sim, monkeypatch):
+    async def main():
+        await switch_position("BTCUSDT", "BUY")
+        before = _closes("BTCUSDT")
+
+        # 청산 주문은 체결됐지만 대기는 한도 초과로 끝난 경우 → 재확인 후 장부 청산, 반대 진입 진행
+        async def timed_out(symbol, target):
+            return False
+        monkeypatch.setattr(switching, "_wait_for", timed_out)
+        res = await switch_position("BTCUSDT", "SELL")
+        assert "skipped" not in res
+        assert positions.get("BTCUSDT").side == "short"
+        assert _closes("BTCUSDT") == before + 1
+    asyncio.run(main())
+
+
+def test_deadline_after_close_still_closes_the_book(sim, monkeypatch):
+    async def main():
+        await switch_position("BTCUSDT", "SELL")
+        old = positions.get("BTCUSDT")
+        before = _closes("BTCUSDT")
+
+        async def exhausted(symbol, target):
+            raise deadline.exceeded("wait_flat")
+        monkeypatch.setattr(switching, "_wait_for", exhausted)
+        with pytest.raises(deadline.DeadlineExceeded):
+            await switch_position("BTCUSDT", "BUY")
+        assert not old.is_open
+        assert _closes("BTCUSDT") == before + 1
+        await asyncio.sleep(0.05)       # 이전 TP/SL 백그라운드 취소
+        assert not [p for p in sim.plans.values() if p.symbol == "BTCUSDT"]
+    asyncio.run(main())
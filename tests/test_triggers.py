@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+import app.services.protection as protection
+import app.services.triggers as triggers
+from app.services.switching import switch_position
+from app.services.triggers import _LevelIndex, _Trigger, trigger_engine
+from app.state import positions
+
+
+@pytest.fixture
+def mode(monkeypatch):
+    def set_mode(name: str):
+        monkeypatch.setattr(triggers, "TRIGGER_MODE", name)
+        monkeypatch.setattr(protection, "TRIGGER_MODE", name)
+        monkeypatch.setattr(triggers, "FILL_SYNC_INTERVAL", 0)
+        monkeypatch.setattr(triggers, "CONFIRM_DELAY", 0.01)
+    return set_mode
+
+
+def _legs(ex) -> dict:
+    return {k: round(p.qty, 6) for k, p in ex.positions.items() if p.qty}
+
+
+def test_level_index_pops_only_crossed_levels():
+    index = _LevelIndex()
+    for level in (105.0, 101.0, 103.0, 101.0):
+        index.add(_Trigger("tp", level))
+    assert [t.level for t in index.pop_upto(102.0)] == [101.0, 101.0]
+    assert [t.level for t in index.pop_from(104.0)] == [105.0]
+    assert len(index) == 1
+
+
+def test_exchange_mode_books_stop_only_after_plan_fires(sim, mode):
+    mode("exchange")
+
+    async def main():
+        await switch_position("ETHUSDT", "BUY")
+        pos = positions.get("ETHUSDT")
+        assert pos.stop_price and len(sim.plans) == 3
+
+        # 로컬 시세만 손절선 통과, 거래소 플랜은 미발동 → 기록·청산 없음, 레벨 재무장
+        trigger_engine.on_price("ETHUSDT", pos.stop_price - 10)
+        await asyncio.sleep(0.1)
+        assert pos.is_open and len(sim.plans) == 3
+        assert len(trigger_engine._books["ETHUSDT"]) == 3
+
+        # 거래소 플랜 발동 후 교차 → 발동 주문 체결가로 기록
+        sim.set_price("ETHUSDT", pos.stop_price - 10)
+        trigger_engine.on_price("ETHUSDT", pos.stop_price - 10)
+        await asyncio.sleep(0.1)
+        assert not pos.is_open and pos.sl_done
+        assert pos.sl_price == pos.stop_price - 10
+        assert _legs(sim) == {}
+    asyncio.run(main())
+
+
+def test_client_mode_same_tick_closes_never_exceed_position(sim, mode):
+    mode("client")
+
+    async def main():
+        await switch_position("SOLUSDT", "BUY")
+        pos = positions.get("SOLUSDT")
+        qty = pos.qty
+        (tp1, q1), (tp2, q2) = pos.targets["tp1"], pos.targets["tp2"]
+
+        # 손절선이 익절선들 위로 (트레일링 등) → 한 틱에 tp1 / tp2 / 손절 모두 교차
+        pos.stop_price = tp2 + 5
+        positions.touch("SOLUSDT")
+        price = tp2 + 1
+        sim.set_price("SOLUSDT", price)
+        trigger_engine.on_price("SOLUSDT", price)
+        await asyncio.sleep(0.2)
+
+        assert (pos.first_tp_qty, pos.second_tp_qty) == (q1, q2)
+        assert pos.sl_qty == pytest.approx(qty - q1 - q2)
+        assert not pos.is_open
+        assert _legs(sim) == {}
+        assert not trigger_engine._reserved
+    asyncio.run(main())
+
+
+def test_client_mode_failed_take_profit_is_rearmed(sim, mode, monkeypatch):
+    mode("client")
+
+    async def main():
+        await switch_position("SOLUSDT", "SELL")
+        pos = positions.get("SOLUSDT")
+        tp1, q1 = pos.targets["tp1"]
+
+        original = sim.mix_order_api.place_order
+        failures = []
+
+        async def flaky(**kw):
+            if not failures:
+                failures.append(kw)
+                raise ConnectionError("reset")
+            return await original(**kw)
+        monkeypatch.setattr(sim.mix_order_api, "place_order", flaky)
+
+        price = tp1 - 0.1
+        sim.set_price("SOLUSDT", price)
+        trigger_engine.on_price("SOLUSDT", price)
+        await asyncio.sleep(0.1)
+        # 실패한 익절은 기록되지 않고 레벨·예약 수량이 원래대로
+        assert failures and not pos.first_tp_done
+        assert pos.targets["tp1"] == [tp1, q1]
+        assert not trigger_engine._reserved
+
+        trigger_engine.on_price("SOLUSDT", price)
+        await asyncio.sleep(0.1)
+        assert pos.first_tp_done and pos.first_tp_qty == q1
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import websockets
+
+
+class StandIn:
+    """
+    로컬 Bitget WebSocket 대역: 로그인 응답, 구독 요청 기록, 지정 메시지 푸시, 연결 강제 종료
+    """
+
+    def __init__(self, pong: bool = True, login_code: str = "0"):
+        self.pong = pong            # False: 하트비트 무응답 서버
+        self.login_code = login_code
+        self.logins: list[dict] = []
+        self.connections = 0
+        self.subscribed: list[list[dict]] = []     # 연결별 구독 args
+        self.sockets = []
+        self.server = None
+
+    async def handler(self, ws):
+        self.connections += 1
+        args: list[dict] = []
+        self.subscribed.append(args)
+        self.sockets.append(ws)
+        async for raw in ws:
+            if raw == "ping":
+                if self.pong:
+                    await ws.send("pong")
+                continue
+            msg = json.loads(raw)
+            if msg["op"] == "login":
+                self.logins.append(msg["args"][0])
+                await ws.send(json.dumps({"event": "login", "code": self.login_code}))
+            elif msg["op"] == "subscribe":
+                args.extend(msg["args"])
+                for arg in msg["args"]:
+                    await ws.send(json.dumps({"event": "subscribe", "arg": arg}))
+            elif msg["op"] == "unsubscribe":
+                for arg in msg["args"]:
+                    args.remove(arg)
+
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        port = next(iter(self.server.sockets)).getsockname()[1]
+        return f"ws://127.0.0.1:{port}"
+
+    async def push(self, msg):
+        await self.sockets[-1].send(msg if isinstance(msg, str) else json.dumps(msg))
+
+
+async def until(cond, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not cond():
+        assert asyncio.get_running_loop().time() < deadline, "timeout"
+        await asyncio.sleep(0.01)